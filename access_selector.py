@@ -0,0 +1,174 @@
+import numpy as np
+from scipy.spatial import cKDTree
+
+# Margin Added to the Visibility Cone Query, Covers the Difference Between Geodetic and Geocentric Elevation
+VISIBILITY_QUERY_MARGIN_DEGREES = 1
+# Maximum Number of (Epoch, Facility, Satellite) Pairs Evaluated at Once by the Series Selection, Bounds the Temporary Arrays
+ACCESS_SERIES_CHUNK_PAIR_COUNT = 2**20
+
+
+class AccessSelector:
+    """
+    Select the access satellite of every ground facility from the per-tick satellite positions.
+    """
+
+    def __init__(self, facility_dict, min_elevation):
+        """
+        facility_dict:
+            A dictionary where the key is the facility name and the value is a GeographicPosition object.
+            The order of the returned results follows the key order of this dictionary.
+
+        min_elevation:
+            Minimum elevation angle (degrees) for a satellite to be visible from a facility.
+        """
+        self.facility_name_list = list(facility_dict)
+        self.min_elevation = min_elevation
+
+        # The ITRS positions (F, 3) of facilities, unit: km
+        self.facility_positions = np.array(
+            [facility.itrs_xyz.km for facility in facility_dict.values()],
+            dtype=np.float64,
+        ).reshape(-1, 3)
+
+        # The unit zenith vectors (F, 3) of facilities on the WGS84 ellipsoid
+        latitudes = np.radians(
+            [facility.latitude.degrees for facility in facility_dict.values()]
+        )
+        longitudes = np.radians(
+            [facility.longitude.degrees for facility in facility_dict.values()]
+        )
+        self.facility_zenith_vectors = np.stack(
+            [
+                np.cos(latitudes) * np.cos(longitudes),
+                np.cos(latitudes) * np.sin(longitudes),
+                np.sin(latitudes),
+            ],
+            axis=1,
+        ).reshape(-1, 3)
+        self.facility_radii = np.linalg.norm(self.facility_positions, axis=1)
+
+    def select_access_satellites(self, sat_positions):
+        """
+        Return the Access Satellite of Every Facility Based on the ITRS Satellite Positions (N, 3):
+        Only select the nearest satellite within the visible range.
+        Returns two lists aligned with facility_name_list, the satellite index (-1 if no satellite is visible) and the distance (km, inf if no satellite is visible).
+        """
+        sat_index_list = [-1] * len(self.facility_name_list)
+        distance_list = [np.inf] * len(self.facility_name_list)
+        if len(self.facility_name_list) == 0 or len(sat_positions) == 0:
+            return sat_index_list, distance_list
+
+        candidate_index_lists = self.get_candidate_index_lists(sat_positions)
+        sin_min_elevation = np.sin(np.radians(self.min_elevation))
+        for facility_index, candidate_index_list in enumerate(candidate_index_lists):
+            if not candidate_index_list:
+                continue
+            candidate_indexes = np.asarray(candidate_index_list, dtype=np.int64)
+            line_of_sight_vectors = (
+                sat_positions[candidate_indexes]
+                - self.facility_positions[facility_index]
+            )
+            distances = np.linalg.norm(line_of_sight_vectors, axis=1)
+            heights = (
+                line_of_sight_vectors @ self.facility_zenith_vectors[facility_index]
+            )
+            visible = heights >= distances * sin_min_elevation
+            if not visible.any():
+                continue
+            nearest = np.argmin(np.where(visible, distances, np.inf))
+            sat_index_list[facility_index] = int(candidate_indexes[nearest])
+            distance_list[facility_index] = float(distances[nearest])
+        return sat_index_list, distance_list
+
+    def get_candidate_index_lists(self, sat_positions):
+        """
+        Return the Satellites Inside the Visibility Cone Query of Every Facility as a List of Index Lists Aligned with facility_name_list:
+        A superset of the visible satellites, found with a spatial index over the ITRS satellite positions (N, 3).
+        """
+        return cKDTree(sat_positions).query_ball_point(
+            self.facility_positions,
+            self.get_max_visible_ranges(sat_positions),
+        )
+
+    def select_access_satellites_series(self, sat_positions_series):
+        """
+        Return the Access Satellite of Every Facility at Every Epoch Based on the ITRS Satellite Positions (T, N, 3):
+        The same selection as select_access_satellites, evaluated densely over epochs, facilities and satellites with array operations
+        instead of one spatial index per epoch, the epochs are processed in chunks of at most ACCESS_SERIES_CHUNK_PAIR_COUNT pairs.
+        Returns two (T, F) arrays, the int32 satellite index (-1 if no satellite is visible) and the float64 distance (km, inf if no satellite is visible).
+        """
+        epoch_count, sat_count = sat_positions_series.shape[:2]
+        facility_count = len(self.facility_name_list)
+        sat_index_array = np.full((epoch_count, facility_count), -1, dtype=np.int32)
+        distance_array = np.full((epoch_count, facility_count), np.inf)
+        if facility_count == 0 or sat_count == 0:
+            return sat_index_array, distance_array
+
+        sin_min_elevation = np.sin(np.radians(self.min_elevation))
+        chunk_epoch_count = max(
+            ACCESS_SERIES_CHUNK_PAIR_COUNT // (facility_count * sat_count), 1
+        )
+        for chunk_start in range(0, epoch_count, chunk_epoch_count):
+            chunk_slice = slice(chunk_start, chunk_start + chunk_epoch_count)
+            # (t, F, N, 3) vectors from every facility to every satellite
+            line_of_sight_vectors = (
+                sat_positions_series[chunk_slice, np.newaxis, :, :]
+                - self.facility_positions[np.newaxis, :, np.newaxis, :]
+            )
+            distances = np.linalg.norm(line_of_sight_vectors, axis=-1)
+            heights = np.einsum(
+                "tfnk,fk->tfn", line_of_sight_vectors, self.facility_zenith_vectors
+            )
+            visible_distances = np.where(
+                heights >= distances * sin_min_elevation, distances, np.inf
+            )
+            nearest = np.argmin(visible_distances, axis=-1)
+            nearest_distances = np.take_along_axis(
+                visible_distances, nearest[..., np.newaxis], axis=-1
+            )[..., 0]
+            visible = np.isfinite(nearest_distances)
+            sat_index_array[chunk_slice] = np.where(visible, nearest, -1)
+            distance_array[chunk_slice] = nearest_distances
+        return sat_index_array, distance_array
+
+    def select_access_satellites_among(self, candidate_positions, facility_indices):
+        """
+        Return the Access Satellite of Given Facilities Among Their Own Candidate Satellites:
+        candidate_positions is a (K, C, 3) array of the ITRS positions of the C candidates of the facility facility_indices[k], NaN rows are padding.
+        The same selection as select_access_satellites restricted to the candidates, used when only a few facilities are evaluated at their own epochs.
+        Returns two (K,) arrays, the int64 candidate column (-1 if no candidate is visible) and the float64 distance (km, inf if no candidate is visible).
+        """
+        sin_min_elevation = np.sin(np.radians(self.min_elevation))
+        line_of_sight_vectors = (
+            candidate_positions - self.facility_positions[facility_indices, np.newaxis]
+        )
+        distances = np.linalg.norm(line_of_sight_vectors, axis=-1)
+        heights = np.einsum(
+            "kcj,kj->kc",
+            line_of_sight_vectors,
+            self.facility_zenith_vectors[facility_indices],
+        )
+        # Padding rows are NaN and compare False
+        visible_distances = np.where(
+            heights >= distances * sin_min_elevation, distances, np.inf
+        )
+        if visible_distances.shape[1] == 0:
+            return (
+                np.full(len(facility_indices), -1, dtype=np.int64),
+                np.full(len(facility_indices), np.inf),
+            )
+        nearest = np.argmin(visible_distances, axis=1)
+        nearest_distances = visible_distances[np.arange(len(nearest)), nearest]
+        return np.where(np.isfinite(nearest_distances), nearest, -1), nearest_distances
+
+    def get_max_visible_ranges(self, sat_positions):
+        """
+        Return the Radius (km) of the Visibility Cone Query for Every Facility:
+        The slant range of the highest satellite seen at the minimum elevation angle (minus a margin) from the facility.
+        """
+        max_sat_radius = float(np.max(np.linalg.norm(sat_positions, axis=1)))
+        elevation = np.radians(self.min_elevation - VISIBILITY_QUERY_MARGIN_DEGREES)
+        radii = self.facility_radii
+        return np.sqrt(
+            np.maximum(max_sat_radius**2 - (radii * np.cos(elevation)) ** 2, 0)
+        ) - radii * np.sin(elevation)
@@ -0,0 +1,336 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+# Walker-delta shells benchmarked by default as (plane count, satellites per plane)
+BENCHMARK_SHELL_LIST = [(3, 3), (6, 11), (36, 20), (72, 22)]
+BENCHMARK_FACILITY_COUNT = 10
+BENCHMARK_REPEAT = 5
+# Epoch of the synthesized TLEs, the topology is initialized at 2025-01-01 00:00 UTC
+BENCHMARK_TLE_EPOCH = "25001.00000000"
+BENCHMARK_START_UTC_TIME = datetime(2025, 1, 1, 0, 10, 0, tzinfo=timezone.utc)
+
+
+class WalkerDeltaConstellation:
+    """
+    A Walker-delta constellation i: T/P/F of circular orbits, named "<name>-<number>" plane by plane as in /data/three.tle.
+    Every satellite has four ISLs: up/down to its neighbors in the same plane, left/right to the satellites with the same index in the adjacent planes.
+    """
+
+    def __init__(
+        self,
+        plane_count,
+        sat_per_plane,
+        phasing=1,
+        inclination=53.0,
+        mean_motion=15.05,
+        name="gemini",
+    ):
+        """
+        phasing:
+            Walker phasing factor F, the satellites of neighboring planes are shifted by 360 * F / T degrees.
+
+        mean_motion:
+            Revolutions per day, 15.05 is a circular orbit at about 550 km.
+        """
+        self.plane_count = plane_count
+        self.sat_per_plane = sat_per_plane
+        self.phasing = phasing
+        self.inclination = inclination
+        self.mean_motion = mean_motion
+        self.name = name
+        self.sat_count = plane_count * sat_per_plane
+
+    def get_sat_name(self, plane_index, sat_index):
+        return f"{self.name}-{plane_index * self.sat_per_plane + sat_index + 1}"
+
+    def write_tles(self, tles_filepath):
+        with open(tles_filepath, "w") as f:
+            for plane_index in range(self.plane_count):
+                raan = 360 * plane_index / self.plane_count
+                for sat_index in range(self.sat_per_plane):
+                    mean_anomaly = (
+                        360 * sat_index / self.sat_per_plane
+                        + 360 * self.phasing * plane_index / self.sat_count
+                    ) % 360
+                    catalog_number = plane_index * self.sat_per_plane + sat_index + 1
+                    line1 = f"1 {catalog_number:05d}U 00000ABC {BENCHMARK_TLE_EPOCH}  .00000000  00000-0  00000+0 0    0"
+                    line2 = f"2 {catalog_number:05d} {self.inclination:8.4f} {raan:8.4f} 0000000  90.0000 {mean_anomaly:8.4f} {self.mean_motion:11.8f}    0"
+                    f.write(self.get_sat_name(plane_index, sat_index) + "\n")
+                    f.write(line1 + str(_get_tle_checksum(line1)) + "\n")
+                    f.write(line2 + str(_get_tle_checksum(line2)) + "\n")
+
+    def write_isls(self, isls_filepath):
+        line_list = []
+        for plane_index in range(self.plane_count):
+            for sat_index in range(self.sat_per_plane):
+                sat_name = self.get_sat_name(plane_index, sat_index)
+                for relative_position, neighbor_plane_index, neighbor_sat_index in (
+                    ("up", plane_index, (sat_index + 1) % self.sat_per_plane),
+                    ("down", plane_index, (sat_index - 1) % self.sat_per_plane),
+                    ("right", (plane_index + 1) % self.plane_count, sat_index),
+                    ("left", (plane_index - 1) % self.plane_count, sat_index),
+                ):
+                    line_list.append(
+                        f"{sat_name} {relative_position} {self.get_sat_name(neighbor_plane_index, neighbor_sat_index)}"
+                    )
+        with open(isls_filepath, "w") as f:
+            f.write("\n".join(line_list))
+
+
+def write_facilities(facilities_filepath, facility_count, max_latitude=53.0, seed=0):
+    """
+    Write facility_count ground facilities spread uniformly over the area covered by the constellation, in the format of /data/facilities.json.
+    """
+    rng = np.random.default_rng(seed)
+    max_sin_latitude = np.sin(np.radians(max_latitude))
+    latitude_array = np.degrees(
+        np.arcsin(rng.uniform(-max_sin_latitude, max_sin_latitude, facility_count))
+    )
+    longitude_array = rng.uniform(-180, 180, facility_count)
+    facility_dict = {
+        f"ue-{facility_index + 1}": {
+            "type": "ue",
+            "latitude": round(float(latitude), 4),
+            "longitude": round(float(longitude), 4),
+        }
+        for facility_index, (latitude, longitude) in enumerate(
+            zip(latitude_array, longitude_array)
+        )
+    }
+    with open(facilities_filepath, "w") as f:
+        json.dump(facility_dict, f, indent=4)
+
+
+def run_benchmark(
+    plane_count,
+    sat_per_plane,
+    facility_count=BENCHMARK_FACILITY_COUNT,
+    router_type="dijkstra",
+    repeat=BENCHMARK_REPEAT,
+    iterate_paths=True,
+):
+    """
+    Synthesize the constellation, then measure the wall time of every stage of Topology and the peak RSS of the process after it.
+    update_topology_by_time, get_neighbor_dict and get_all_pair_path_dict are run repeat times at times one minute apart.
+    If iterate_paths is True, every path of the last all pair path dict is also built once, as the ovs rule generation does.
+    Run every size in a fresh process (see run_benchmark_in_subprocess), the peak RSS of a process never decreases.
+    """
+    from topology import Topology
+
+    constellation = WalkerDeltaConstellation(plane_count, sat_per_plane)
+    stage_list = []
+
+    def measure(stage_name, function, repeat_count=1):
+        wall_seconds_list = []
+        for repeat_index in range(repeat_count):
+            start_time = time.perf_counter()
+            result = function(repeat_index)
+            wall_seconds_list.append(time.perf_counter() - start_time)
+        stage_list.append(
+            {
+                "stage": stage_name,
+                "wall_seconds": wall_seconds_list,
+                "median_wall_seconds": float(np.median(wall_seconds_list)),
+                "peak_rss_bytes": get_peak_rss_bytes(),
+            }
+        )
+        return result
+
+    with tempfile.TemporaryDirectory() as dirpath:
+        tles_filepath = os.path.join(dirpath, "constellation.tle")
+        isls_filepath = os.path.join(dirpath, "constellation.isls")
+        facilities_filepath = os.path.join(dirpath, "facilities.json")
+        constellation.write_tles(tles_filepath)
+        constellation.write_isls(isls_filepath)
+        write_facilities(facilities_filepath, facility_count, constellation.inclination)
+        topology = measure(
+            "init",
+            lambda _: Topology(
+                tles_filepath, facilities_filepath, isls_filepath, router_type
+            ),
+        )
+
+    measure(
+        "update_topology_by_time",
+        lambda repeat_index: topology.update_topology_by_time(
+            BENCHMARK_START_UTC_TIME + timedelta(minutes=repeat_index)
+        ),
+        repeat,
+    )
+    measure("get_neighbor_dict", lambda _: topology.get_neighbor_dict(), repeat)
+    all_pair_path_dict = measure(
+        "get_all_pair_path_dict", lambda _: topology.get_all_pair_path_dict(), repeat
+    )
+    if iterate_paths:
+        measure(
+            "all_pair_path_iteration",
+            lambda _: sum(
+                len(path)
+                for src_path_dict in all_pair_path_dict.values()
+                for path in src_path_dict.values()
+            ),
+        )
+    return {
+        "plane_count": plane_count,
+        "sat_per_plane": sat_per_plane,
+        "sat_count": constellation.sat_count,
+        "facility_count": facility_count,
+        "router_type": router_type,
+        "repeat": repeat,
+        "stages": stage_list,
+    }
+
+
+def run_benchmark_in_subprocess(
+    plane_count, sat_per_plane, facility_count, router_type, repeat, iterate_paths
+):
+    """
+    Run run_benchmark for one size in a fresh interpreter and return its result, so the peak RSS only covers that size.
+    """
+    cmd = [
+        sys.executable,
+        os.path.abspath(__file__),
+        "--single",
+        "--shell",
+        f"{plane_count}x{sat_per_plane}",
+        "--facility-count",
+        str(facility_count),
+        "--router-type",
+        router_type,
+        "--repeat",
+        str(repeat),
+    ]
+    if not iterate_paths:
+        cmd.append("--skip-path-iteration")
+    output = subprocess.run(
+        cmd,
+        check=True,
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def get_peak_rss_bytes():
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return peak_rss if sys.platform == "darwin" else peak_rss * 1024
+
+
+def get_environment_dict():
+    """
+    Return what the results depend on besides the code: versions, CPU count and the git commit of the tree.
+    """
+    try:
+        git_commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            check=True,
+            capture_output=True,
+            text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        git_commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_commit": git_commit,
+        "python_version": platform.python_version(),
+        "numpy_version": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def _get_tle_checksum(line):
+    """
+    TLE checksum: the sum of all digits, with every minus sign counting as 1, modulo 10.
+    """
+    return sum(int(char) if char.isdigit() else char == "-" for char in line[:68]) % 10
+
+
+def _parse_shell(shell):
+    plane_count, sat_per_plane = shell.lower().split("x")
+    return int(plane_count), int(sat_per_plane)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark Topology on synthesized Walker-delta constellations and print the results as JSON."
+    )
+    parser.add_argument(
+        "--shell",
+        action="append",
+        help="<plane count>x<satellites per plane>, e.g. 72x22, may be repeated. Default: "
+        + ", ".join(
+            f"{plane_count}x{sat_per_plane}"
+            for plane_count, sat_per_plane in BENCHMARK_SHELL_LIST
+        ),
+    )
+    parser.add_argument("--facility-count", type=int, default=BENCHMARK_FACILITY_COUNT)
+    parser.add_argument("--router-type", default="dijkstra")
+    parser.add_argument("--repeat", type=int, default=BENCHMARK_REPEAT)
+    parser.add_argument(
+        "--skip-path-iteration",
+        action="store_true",
+        help="Do not build every path of the all pair path dict.",
+    )
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    parser.add_argument(
+        "--single",
+        action="store_true",
+        help="Run the first shell in this process and print its result as one JSON line.",
+    )
+    args = parser.parse_args()
+
+    shell_list = (
+        [_parse_shell(shell) for shell in args.shell]
+        if args.shell
+        else BENCHMARK_SHELL_LIST
+    )
+    if args.single:
+        print(
+            json.dumps(
+                run_benchmark(
+                    *shell_list[0],
+                    args.facility_count,
+                    args.router_type,
+                    args.repeat,
+                    not args.skip_path_iteration,
+                )
+            )
+        )
+        sys.exit()
+
+    result_list = []
+    for plane_count, sat_per_plane in shell_list:
+        result = run_benchmark_in_subprocess(
+            plane_count,
+            sat_per_plane,
+            args.facility_count,
+            args.router_type,
+            args.repeat,
+            not args.skip_path_iteration,
+        )
+        for stage in result["stages"]:
+            print(
+                f"[INFO] {result['sat_count']} satellites, {stage['stage']}: {stage['median_wall_seconds']:.4f}s, peak RSS {stage['peak_rss_bytes'] / 2**20:.1f}MiB",
+                file=sys.stderr,
+            )
+        result_list.append(result)
+    report = {"environment": get_environment_dict(), "results": result_list}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=4)
+    else:
+        print(json.dumps(report, indent=4))
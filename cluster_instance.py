@@ -1,7 +1,14 @@
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 
 from host import Host
 from cmd_helper import CmdHelper
+from cmd_batch import HostCmdBatch
+from network_state import NetworkStateReconciler
+from tick_profiler import profile_phase
 
 from enum import Enum
 
@@ -18,10 +25,74 @@ class FacilityNeighborType(Enum):
     SAT = 1
 
 
+OVS_UPLINK_PORT = 1  # 宿主机ovs网桥上连接物理网卡的端口，跨宿主机的流量经此端口转发
+MAX_SSH_WORKERS = 32  # 并行执行SSH命令的最大线程数
+TC_DELAY_CHANGE_THRESHOLD = 0.1  # tc队列时延变化不超过该值时不重新下发，单位：ms
+TC_FILTER_MAX_HANDLE = 0xFFF  # u32过滤器编号上限，即每块网卡最多的目的ip过滤器数
+OVS_FLOW_COOKIE_TAG = (
+    0x47454D49 << 32
+)  # 本程序下发的流表cookie高32位，低32位为下发该流表的周期编号
+OVS_FLOW_COOKIE_TAG_MASK = 0xFFFFFFFF << 32
+
+
+class HostBatchResult:
+    """
+    一台主机一批命令的执行结果
+    """
+
+    def __init__(self, host_name):
+        self.host_name = host_name
+        # 每条命令或每条ovs、tc规则的执行结果 (cmd, exit_code, stdout, stderr)，顺序与执行顺序一致
+        self.cmd_result_list = []
+        # 执行这批命令的耗时，单位：秒
+        self.latency = 0.0
+        # 执行这批命令的耗时，由time.perf_counter_ns测量，单位：纳秒
+        self.latency_ns = 0
+        # 发送到主机的脚本字节数
+        self.sent_byte_count = 0
+        # 指定提交时刻时，脚本到达主机后距提交时刻的余量，单位：秒，为负表示晚于提交时刻到达；未指定提交时刻时为None
+        self.commit_slack = None
+        # 脚本未能执行完成（SSH断开、超时等）时的异常信息，此时每条命令的返回码为-1；执行完成时为None
+        self.error = None
+
+    def get_failed_cmd_result_list(self):
+        return [cmd_result for cmd_result in self.cmd_result_list if cmd_result[1] != 0]
+
+    def has_failed(self):
+        """
+        脚本未能执行完成，或者其中任意一条命令或规则执行失败
+        """
+        return self.error is not None or bool(self.get_failed_cmd_result_list())
+
+
 class ClusterInstance:
-    def __init__(self, hosts_filepath, debug_mode):
+    def __init__(
+        self,
+        hosts_filepath,
+        debug_mode,
+        max_workers=MAX_SSH_WORKERS,
+        ovs_bundle_mode=True,
+        tc_delay_change_threshold=TC_DELAY_CHANGE_THRESHOLD,
+    ):
         self.host_instance_dict = self._load_host_instances(hosts_filepath)
         self.debug_mode = debug_mode
+        # 为True时，每个周期的流表变化以bundle原子提交，流表带有周期编号cookie，清理时按cookie删除而不重启openvswitch
+        self.ovs_bundle_mode = ovs_bundle_mode
+        # 流表的周期编号，每次更新网络状态时加一，bundle模式下新增的流表以此为cookie低32位
+        self.ovs_flow_generation = 0
+        # 各主机的命令在线程池中并行执行，同一主机的命令按顺序在其持久SSH连接上执行
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        # 待执行的命令，键为主机名，值为该主机本周期的HostCmdBatch，每台主机每周期只需一次SSH往返
+        self.pending_cmd_dict = {}
+        # 各主机网卡上每个有过滤器的目的ip对应的tc过滤器编号（1 - 0xfff），用于直接替换或删除过滤器
+        # 编号只分配给实际下发过滤器的目的ip，过滤器删除后编号回收
+        self.tc_filter_handle_dict = {}
+        # 记录每台主机上次下发的ovs和tc规则，每个周期只下发发生变化的规则
+        self.network_state_reconciler = NetworkStateReconciler()
+        # 时延变化不超过该阈值的tc队列不重新下发（每次修改都会重置netem状态），变化会累积到超过阈值后再下发
+        self.tc_delay_change_threshold = tc_delay_change_threshold
+        # 累计因变化过小而跳过的tc队列时延修改次数
+        self.suppressed_tc_delay_update_count = 0
 
     def _load_host_instances(self, hosts_filepath):
         """
@@ -54,29 +125,148 @@ class ClusterInstance:
 
     def connect(self):
         """
-        执行SSH连接
+        并行执行SSH连接
         """
+        if not self.debug_mode:
+            list(
+                self.executor.map(
+                    lambda host: host.connect(), self.host_instance_dict.values()
+                )
+            )
         for host_name in self.host_instance_dict:
-            if not self.debug_mode:
-                self.host_instance_dict[host_name].connect()
             print(f"[INFO] Connect to {host_name}.")
 
     def execute_cmd(self, host_name, cmd):
         """
-        命令执行的统一入口
+        命令执行的统一入口，立即执行一条命令
         """
-        if not self.debug_mode:
-            self.host_instance_dict[host_name].execute(cmd)
-        print(f"[INFO] {host_name} execute:{cmd}")
+        cmd_batch = HostCmdBatch(ovs_bundle=self.ovs_bundle_mode)
+        cmd_batch.add_cmd(cmd)
+        return self.execute_cmd_batch({host_name: cmd_batch})[host_name]
+
+    def queue_cmd(self, host_name, cmd):
+        """
+        将shell命令加入待执行队列，由flush_cmd统一并行执行，同一主机的命令按加入顺序执行
+        """
+        self._get_pending_cmd_batch(host_name).add_cmd(cmd)
+
+    def queue_ovs_flow_mod(self, host_name, flow_mod):
+        """
+        将一条ovs流表修改加入待执行队列，连续的流表修改通过一次ovs-ofctl add-flows执行
+        """
+        self._get_pending_cmd_batch(host_name).add_ovs_flow_mod(flow_mod)
+
+    def queue_tc_cmd(self, host_name, tc_cmd):
+        """
+        将一条tc命令加入待执行队列，连续的tc命令通过一次tc -batch执行
+        """
+        self._get_pending_cmd_batch(host_name).add_tc_cmd(tc_cmd)
+
+    def _get_pending_cmd_batch(self, host_name):
+        if host_name not in self.pending_cmd_dict:
+            self.pending_cmd_dict[host_name] = HostCmdBatch(
+                ovs_bundle=self.ovs_bundle_mode
+            )
+        return self.pending_cmd_dict[host_name]
+
+    def flush_cmd(self, commit_at=None):
+        """
+        并行执行所有待执行的命令，返回各主机的执行结果
+        commit_at为POSIX时间戳时，命令提前发送到各主机，各主机等到该时刻再同时执行
+        """
+        host_cmd_batch_dict, self.pending_cmd_dict = self.pending_cmd_dict, {}
+        host_batch_result_dict = self.execute_cmd_batch(host_cmd_batch_dict, commit_at)
+        # 规则在比较时已记为已下发，执行失败的主机状态未知，清除其记录，下次更新时重新下发其全部规则
+        for host_name, host_batch_result in host_batch_result_dict.items():
+            if host_batch_result.has_failed():
+                self.network_state_reconciler.reset_host(host_name)
+                print(
+                    f"[WARN] {host_name} push failed, all its rules are resent next time"
+                )
+        return host_batch_result_dict
+
+    def execute_cmd_batch(self, host_cmd_batch_dict, commit_at=None):
+        """
+        各主机的HostCmdBatch在线程池中并行执行，每台主机的全部命令合并为一个脚本，通过一个SSH通道执行
+        返回字典，键为主机名，值为HostBatchResult，包含每条命令或规则的返回码、错误输出以及该主机的总耗时
+        """
+        host_name_list = [
+            host_name
+            for host_name in host_cmd_batch_dict
+            if len(host_cmd_batch_dict[host_name])
+        ]
+        host_batch_result_list = self.executor.map(
+            lambda host_name: self._execute_host_cmd_batch(
+                host_name, host_cmd_batch_dict[host_name], commit_at
+            ),
+            host_name_list,
+        )
+        host_batch_result_dict = {}
+        for host_batch_result in host_batch_result_list:
+            host_name = host_batch_result.host_name
+            for cmd, exit_code, _, stderr in host_batch_result.cmd_result_list:
+                # 逐条命令的输出只在调试模式下打印，否则每次更新数以万计的规则会刷屏
+                if self.debug_mode:
+                    print(f"[INFO] {host_name} execute:{cmd}")
+                if exit_code != 0:
+                    print(f"[WARN] {host_name} exit code {exit_code}: {stderr.strip()}")
+            print(
+                f"[INFO] {host_name} executed {len(host_batch_result.cmd_result_list)} commands ({host_batch_result.sent_byte_count} bytes) in {host_batch_result.latency:.3f}s"
+            )
+            if (
+                host_batch_result.commit_slack is not None
+                and host_batch_result.commit_slack < 0
+            ):
+                print(
+                    f"[WARN] {host_name} missed the commit instant by {-host_batch_result.commit_slack:.3f}s"
+                )
+            host_batch_result_dict[host_name] = host_batch_result
+        return host_batch_result_dict
+
+    def _execute_host_cmd_batch(self, host_name, cmd_batch, commit_at=None):
+        """
+        在一台主机上执行HostCmdBatch生成的脚本并解析每条命令的结果，运行在线程池中
+        """
+        host_batch_result = HostBatchResult(host_name)
+        start_time_ns = time.perf_counter_ns()
+        script = cmd_batch.build_script(commit_at)
+        host_batch_result.sent_byte_count = len(script.encode())
+        if self.debug_mode:
+            host_batch_result.cmd_result_list = [
+                (cmd, 0, "", "") for cmd in cmd_batch.get_operation_list()
+            ]
+            if commit_at is not None:
+                host_batch_result.commit_slack = commit_at - time.time()
+        else:
+            try:
+                exit_code, output, error = self.host_instance_dict[
+                    host_name
+                ].execute_script(script)
+            except Exception as e:
+                # 一台主机的失败不影响其他主机，没有输出时每条命令的返回码都为-1
+                host_batch_result.error = f"{type(e).__name__}: {e}"
+                host_batch_result.cmd_result_list = cmd_batch.parse_output("")
+                print(f"[WARN] {host_name} script failed: {host_batch_result.error}")
+            else:
+                host_batch_result.cmd_result_list = cmd_batch.parse_output(output)
+                host_batch_result.commit_slack = cmd_batch.parse_commit_slack(output)
+                if exit_code != 0 and error:
+                    print(
+                        f"[WARN] {host_name} script exit code {exit_code}: {error.strip()}"
+                    )
+        host_batch_result.latency_ns = time.perf_counter_ns() - start_time_ns
+        host_batch_result.latency = host_batch_result.latency_ns / 1e9
+        return host_batch_result
 
     def prepare_cluster_environment(self):
         """
         准备集群环境，包括重置主机ovs或tc配置，放行SSH端口流量，初始化各虚拟机的tc队列
+        各主机的命令并行执行
         """
         self.clean_host_environment()
         # Allow ssh traffic through ovs
         for host_name in self.host_instance_dict:
-            self.execute_cmd(
+            self.queue_cmd(
                 host_name,
                 CmdHelper.allow_connection_flow_through_ovs(
                     self.host_instance_dict[host_name].host_ip,
@@ -86,6 +276,7 @@ class ClusterInstance:
 
         # Set basic tc queues of kvms
         self.set_basic_tc_queue_of_all_sats_and_facilities()
+        self.flush_cmd()
 
     def set_basic_tc_queue_of_all_sats_and_facilities(self):
         """
@@ -93,103 +284,407 @@ class ClusterInstance:
         """
         for host_name in self.host_instance_dict:
             if self.host_instance_dict[host_name].type in ["core", "ue", "sat"]:
-                self.execute_cmd(
+                self.queue_cmd(
                     host_name,
                     CmdHelper.init_tc_environment(
                         self.host_instance_dict[host_name].nic_name
                     ),
                 )
                 if self.host_instance_dict[host_name].type == "sat":
-                    self.execute_cmd(
+                    self.queue_cmd(
                         host_name,
                         CmdHelper.add_tc_queue_delay(
                             self.host_instance_dict[host_name].nic_name,
-                            SatNeighborType.UP,
+                            SatNeighborType.UP.value,
                             0,
                         ),
                     )
-                    self.execute_cmd(
+                    self.queue_cmd(
                         host_name,
                         CmdHelper.add_tc_queue_delay(
                             self.host_instance_dict[host_name].nic_name,
-                            SatNeighborType.DOWN,
+                            SatNeighborType.DOWN.value,
                             0,
                         ),
                     )
-                    self.execute_cmd(
+                    self.queue_cmd(
                         host_name,
                         CmdHelper.add_tc_queue_delay(
                             self.host_instance_dict[host_name].nic_name,
-                            SatNeighborType.LEFT,
+                            SatNeighborType.LEFT.value,
                             0,
                         ),
                     )
-                    self.execute_cmd(
+                    self.queue_cmd(
                         host_name,
                         CmdHelper.add_tc_queue_delay(
                             self.host_instance_dict[host_name].nic_name,
-                            SatNeighborType.RIGHT,
+                            SatNeighborType.RIGHT.value,
                             0,
                         ),
                     )
-                    self.execute_cmd(
+                    self.queue_cmd(
                         host_name,
                         CmdHelper.add_tc_queue_delay(
                             self.host_instance_dict[host_name].nic_name,
-                            SatNeighborType.GROUND,
+                            SatNeighborType.GROUND.value,
                             0,
                         ),
                     )
                 elif self.host_instance_dict[host_name].type in ["core", "ue"]:
-                    self.execute_cmd(
+                    self.queue_cmd(
                         host_name,
                         CmdHelper.add_tc_queue_delay(
                             self.host_instance_dict[host_name].nic_name,
-                            FacilityNeighborType.SAT,
+                            FacilityNeighborType.SAT.value,
                             0,
                         ),
                     )
 
     def clean_host_environment(self):
-        """ 
-        Clean ovs rules and tc rules
         """
+        Clean ovs rules and tc rules, the commands are queued and executed by flush_cmd
+        In ovs bundle mode only the flows tagged with our cookie are deleted, without restarting openvswitch
+        """
+        self.network_state_reconciler.reset()
+        self.tc_filter_handle_dict = {}
         for host_name in self.host_instance_dict:
             if self.host_instance_dict[host_name].type == "host":
-                self.execute_cmd(host_name, CmdHelper.reset_ovs_environment())
+                if self.ovs_bundle_mode:
+                    self.queue_cmd(
+                        host_name,
+                        CmdHelper.delete_ovs_flows_by_cookie(
+                            OVS_FLOW_COOKIE_TAG, OVS_FLOW_COOKIE_TAG_MASK
+                        ),
+                    )
+                else:
+                    self.queue_cmd(host_name, CmdHelper.reset_ovs_environment())
             elif self.host_instance_dict[host_name].type in ["core", "ue", "sat"]:
-                self.execute_cmd(host_name, CmdHelper.clean_tc_environment())
+                self.queue_cmd(host_name, CmdHelper.clean_tc_environment())
 
     def set_all_tc_queue_delay_by_neighbor_dict(self, neighbor_dict):
-        pass
+        """
+        根据邻接节点时延设置各虚拟机tc队列的时延，只修改与上次下发相比变化超过阈值的队列，同一主机的修改合并为一次tc -batch
+        卫星的地面队列由所有接入的地面设备共用，使用其中最小的时延；没有邻居的队列时延恢复为0
+        """
+        desired_host_rule_dict = {}
+        for node_name, neighbor_info in neighbor_dict.items():
+            if node_name not in self.host_instance_dict:
+                continue
+            queue_delay_dict = {}
+            if "sat_neighbor_info" in neighbor_info:
+                if neighbor_info["sat_neighbor_info"] is not None:
+                    queue_delay_dict[FacilityNeighborType.SAT.value] = round(
+                        neighbor_info["sat_neighbor_info"][1], 3
+                    )
+            else:
+                for neighbor_type in [
+                    SatNeighborType.UP,
+                    SatNeighborType.DOWN,
+                    SatNeighborType.LEFT,
+                    SatNeighborType.RIGHT,
+                ]:
+                    info = neighbor_info[neighbor_type.name.lower() + "_neighbor_info"]
+                    if info is not None:
+                        queue_delay_dict[neighbor_type.value] = round(info[1], 3)
+                if neighbor_info["ground_neighbor_info"]:
+                    queue_delay_dict[SatNeighborType.GROUND.value] = round(
+                        min(
+                            delay for _, delay in neighbor_info["ground_neighbor_info"]
+                        ),
+                        3,
+                    )
+            desired_host_rule_dict[node_name] = queue_delay_dict
 
-    def set_ovs_rule_by_path(self, path):
-        pass
+        rule_change_dict = self.network_state_reconciler.reconcile(
+            "tc_queue_delay", desired_host_rule_dict, self.tc_delay_change_threshold
+        )
+        suppressed_count = self.network_state_reconciler.suppressed_count_dict[
+            "tc_queue_delay"
+        ]
+        self.suppressed_tc_delay_update_count += suppressed_count
+        if suppressed_count:
+            print(
+                f"[INFO] Suppressed {suppressed_count} tc delay updates within {self.tc_delay_change_threshold}ms, {self.suppressed_tc_delay_update_count} in total"
+            )
+        for host_name, (
+            changed_rule_dict,
+            removed_rule_key_list,
+        ) in rule_change_dict.items():
+            nic_name = self.host_instance_dict[host_name].nic_name
+            for queue_index, delay in changed_rule_dict.items():
+                self.queue_tc_cmd(
+                    host_name,
+                    CmdHelper.tc_modify_queue_delay_line(nic_name, queue_index, delay),
+                )
+            for queue_index in removed_rule_key_list:
+                self.queue_tc_cmd(
+                    host_name,
+                    CmdHelper.tc_modify_queue_delay_line(nic_name, queue_index, 0),
+                )
+
+    def set_ovs_rule_by_path(self, path, desired_host_rule_dict):
+        """
+        将一条路径上每一跳的ovs流表加入各宿主机的期望规则，规则键为(入端口, 源ip, 目的ip)，值为(出端口, 下一跳mac)
+        下一跳位于其他宿主机时，先经物理网卡端口发出，再由下一跳所在宿主机从物理网卡端口转发给下一跳
+        """
+        if len(path) < 2 or any(
+            node_name not in self.host_instance_dict for node_name in path
+        ):
+            return
+        src_ip = self.host_instance_dict[path[0]].host_ip
+        dst_ip = self.host_instance_dict[path[-1]].host_ip
+        for cur_node_name, nxt_node_name in zip(path, path[1:]):
+            cur_host = self.host_instance_dict[cur_node_name]
+            nxt_host = self.host_instance_dict[nxt_node_name]
+            if cur_host.parent_host_name == nxt_host.parent_host_name:
+                desired_host_rule_dict.setdefault(cur_host.parent_host_name, {})[
+                    (cur_host.ovs_port, src_ip, dst_ip)
+                ] = (nxt_host.ovs_port, nxt_host.mac_address)
+            else:
+                desired_host_rule_dict.setdefault(cur_host.parent_host_name, {})[
+                    (cur_host.ovs_port, src_ip, dst_ip)
+                ] = (OVS_UPLINK_PORT, nxt_host.mac_address)
+                desired_host_rule_dict.setdefault(nxt_host.parent_host_name, {})[
+                    (OVS_UPLINK_PORT, src_ip, dst_ip)
+                ] = (nxt_host.ovs_port, "")
 
     def set_all_ovs_rule_by_all_pair_path(self, all_pair_path_dict):
-        pass
+        """
+        根据所有节点对间路径设置各宿主机的ovs流表，每台宿主机只下发新增或变化的流表，并逐条删除不再需要的流表
+        bundle模式下，这些变化在一个bundle内原子提交，新增的流表带有本周期编号cookie；
+        某台宿主机首次下发（或状态重置后全量重新同步）时，先在同一个bundle内按cookie高32位一次删除以前遗留的各周期流表，再下发完整流表
+        """
+        self.ovs_flow_generation += 1
+        desired_host_rule_dict = {}
+        for src_name in all_pair_path_dict:
+            for dst_name in all_pair_path_dict[src_name]:
+                self.set_ovs_rule_by_path(
+                    all_pair_path_dict[src_name][dst_name], desired_host_rule_dict
+                )
+
+        full_resync_host_name_list = [
+            host_name
+            for host_name in desired_host_rule_dict
+            if self.ovs_bundle_mode
+            and not self.network_state_reconciler.has_applied_rules(
+                "ovs_flow", host_name
+            )
+        ]
+        rule_change_dict = self.network_state_reconciler.reconcile(
+            "ovs_flow", desired_host_rule_dict
+        )
+        cookie = (
+            OVS_FLOW_COOKIE_TAG | (self.ovs_flow_generation & 0xFFFFFFFF)
+            if self.ovs_bundle_mode
+            else None
+        )
+        for host_name in full_resync_host_name_list:
+            self.queue_ovs_flow_mod(
+                host_name,
+                CmdHelper.ovs_delete_flows_by_cookie_line(
+                    OVS_FLOW_COOKIE_TAG, OVS_FLOW_COOKIE_TAG_MASK
+                ),
+            )
+        for host_name, (
+            changed_rule_dict,
+            removed_rule_key_list,
+        ) in rule_change_dict.items():
+            for (in_port, src_ip, dst_ip), (
+                out_port,
+                nxt_mac,
+            ) in changed_rule_dict.items():
+                self.queue_ovs_flow_mod(
+                    host_name,
+                    CmdHelper.ovs_add_flow_line(
+                        in_port, src_ip, dst_ip, out_port, nxt_mac, cookie
+                    ),
+                )
+            for in_port, src_ip, dst_ip in removed_rule_key_list:
+                self.queue_ovs_flow_mod(
+                    host_name,
+                    CmdHelper.ovs_delete_flow_line(in_port, src_ip, dst_ip),
+                )
+
+    def set_all_tc_filter_by_topology_snapshot(self, topology_snapshot, neighbor_dict):
+        """
+        根据路由快照的下一跳矩阵设置各虚拟机的tc过滤器，按目的ip将流量分到下一跳方向对应的队列，只下发发生变化的过滤器
+        过滤器只取决于下一跳，直接读取下一跳矩阵的一行，不还原路径
+        """
+        node_list = topology_snapshot.node_list
+        dst_ip_array = np.array(
+            [
+                (
+                    self.host_instance_dict[node_name].host_ip
+                    if node_name in self.host_instance_dict
+                    else ""
+                )
+                for node_name in node_list
+            ]
+        )
+        desired_host_rule_dict = {}
+        for src_index, src_name in enumerate(node_list):
+            if src_name not in self.host_instance_dict:
+                continue
+            # 每个节点作为下一跳时对应的队列编号，0表示不是邻居
+            next_hop_queue_index_array = np.zeros(len(node_list) + 1, dtype=np.int64)
+            for neighbor_name, queue_index in self._get_neighbor_queue_index_dict(
+                neighbor_dict[src_name]
+            ).items():
+                if neighbor_name in topology_snapshot.node_index_dict:
+                    next_hop_queue_index_array[
+                        topology_snapshot.node_index_dict[neighbor_name]
+                    ] = queue_index
+            next_hops = np.array(topology_snapshot.next_hop_matrix[src_index])
+            # 不可达的目的节点下一跳为-1，对应最后一个元素0
+            queue_indices = next_hop_queue_index_array[next_hops]
+            queue_indices[src_index] = 0
+            filtered = (queue_indices > 0) & (dst_ip_array != "")
+            desired_host_rule_dict[src_name] = dict(
+                zip(
+                    dst_ip_array[filtered].tolist(),
+                    queue_indices[filtered].tolist(),
+                )
+            )
+
+        # 状态被清除（下发失败）的主机无法通过比较得到不再需要的过滤器，按已分配的编号删除
+        resync_host_name_list = [
+            host_name
+            for host_name, handle_dict in self.tc_filter_handle_dict.items()
+            if handle_dict
+            and not self.network_state_reconciler.has_applied_rules(
+                "tc_filter", host_name
+            )
+        ]
+        rule_change_dict = self.network_state_reconciler.reconcile(
+            "tc_filter", desired_host_rule_dict
+        )
+        for host_name in resync_host_name_list:
+            changed_rule_dict, removed_rule_key_list = rule_change_dict.get(
+                host_name, ({}, [])
+            )
+            desired_rules = desired_host_rule_dict.get(host_name, {})
+            removed_rule_key_list = removed_rule_key_list + [
+                dst_ip
+                for dst_ip in self.tc_filter_handle_dict[host_name]
+                if dst_ip not in desired_rules
+            ]
+            if changed_rule_dict or removed_rule_key_list:
+                rule_change_dict[host_name] = (changed_rule_dict, removed_rule_key_list)
+        for host_name, (
+            changed_rule_dict,
+            removed_rule_key_list,
+        ) in rule_change_dict.items():
+            nic_name = self.host_instance_dict[host_name].nic_name
+            handle_dict = self.tc_filter_handle_dict.setdefault(host_name, {})
+            # 先删除过滤器并回收编号，同一批中新增的目的ip可以复用这些编号
+            for dst_ip in removed_rule_key_list:
+                self.queue_tc_cmd(
+                    host_name,
+                    CmdHelper.tc_delete_filter_line(nic_name, handle_dict.pop(dst_ip)),
+                )
+            self._allocate_tc_filter_handles(host_name, changed_rule_dict)
+            for dst_ip, queue_index in changed_rule_dict.items():
+                self.queue_tc_cmd(
+                    host_name,
+                    CmdHelper.tc_set_filter_line(
+                        nic_name,
+                        dst_ip,
+                        queue_index,
+                        handle_dict[dst_ip],
+                    ),
+                )
+
+    def _allocate_tc_filter_handles(self, host_name, dst_ip_list):
+        """
+        为主机网卡上还没有过滤器的目的ip分配最小的空闲过滤器编号
+        u32过滤器编号只有1 - 0xfff，同时有过滤器的目的ip超过这个数量时抛出ValueError
+        """
+        handle_dict = self.tc_filter_handle_dict[host_name]
+        new_dst_ip_list = [
+            dst_ip for dst_ip in dst_ip_list if dst_ip not in handle_dict
+        ]
+        if len(handle_dict) + len(new_dst_ip_list) > TC_FILTER_MAX_HANDLE:
+            raise ValueError(
+                f"{host_name} needs tc filters for {len(handle_dict) + len(new_dst_ip_list)} destination IPs, "
+                f"but u32 filter handles only range from 1 to {TC_FILTER_MAX_HANDLE:#x}."
+            )
+        used_handle_set = set(handle_dict.values())
+        handle = 0
+        for dst_ip in new_dst_ip_list:
+            handle += 1
+            while handle in used_handle_set:
+                handle += 1
+            handle_dict[dst_ip] = handle
+
+    def _get_neighbor_queue_index_dict(self, neighbor_info):
+        """
+        返回节点的邻居名称到tc队列编号的映射
+        """
+        if "sat_neighbor_info" in neighbor_info:
+            if neighbor_info["sat_neighbor_info"] is None:
+                return {}
+            return {
+                neighbor_info["sat_neighbor_info"][0]: FacilityNeighborType.SAT.value
+            }
+        queue_index_dict = {}
+        for neighbor_type in [
+            SatNeighborType.UP,
+            SatNeighborType.DOWN,
+            SatNeighborType.LEFT,
+            SatNeighborType.RIGHT,
+        ]:
+            info = neighbor_info[neighbor_type.name.lower() + "_neighbor_info"]
+            if info is not None:
+                queue_index_dict[info[0]] = neighbor_type.value
+        for facility_name, _ in neighbor_info["ground_neighbor_info"] or []:
+            queue_index_dict[facility_name] = SatNeighborType.GROUND.value
+        return queue_index_dict
 
-    def set_all_tc_filter_by_all_pair_path(self, all_pair_path_dict):
-        pass
+    def update_network_status_by_topology(
+        self, neighbor_dict, topology_snapshot, commit_at=None, tick_profile=None
+    ):
+        """
+        根据邻接列表和路由快照（TopologySnapshot）更新ovs及tc规则，邻接列表格式参考/doc/example.json
+        与上次下发的规则比较，只执行发生变化的ovs和tc操作，各主机并行执行，返回各主机的执行结果
+        commit_at为POSIX时间戳时，各主机在该时刻同时生效
+        传入TickProfile时，记录各类规则比较及SSH下发阶段的耗时
+        """
+        with profile_phase(tick_profile, "tc_delay_diffing"):
+            self.set_all_tc_queue_delay_by_neighbor_dict(neighbor_dict)
+        # 路径在遍历时才由下一跳还原，因此该阶段包含路径的构建
+        with profile_phase(tick_profile, "ovs_rule_diffing"):
+            self.set_all_ovs_rule_by_all_pair_path(
+                topology_snapshot.get_all_pair_path_mapping()
+            )
+        with profile_phase(tick_profile, "tc_filter_diffing"):
+            self.set_all_tc_filter_by_topology_snapshot(
+                topology_snapshot, neighbor_dict
+            )
+        with profile_phase(tick_profile, "ssh_push"):
+            return self.flush_cmd(commit_at)
 
-    def update_network_status_by_topology(self, neighbor_dict, all_pair_path_dict):
+    def update_tc_queue_delay_by_neighbor_dict(self, neighbor_dict, commit_at=None):
         """
-        根据邻接列表和邻接矩阵更新ovs及tc规则，传入数据格式参考/doc/example.json
+        只根据邻接节点时延更新tc队列时延，用于两次完整拓扑更新之间的插值时延更新，不修改ovs规则和tc过滤器
+        commit_at为POSIX时间戳时，各主机在该时刻同时生效，返回各主机的执行结果
         """
         self.set_all_tc_queue_delay_by_neighbor_dict(neighbor_dict)
-        self.set_all_ovs_rule_by_all_pair_path(all_pair_path_dict)
-        self.set_all_tc_filter_by_all_pair_path(all_pair_path_dict)
+        return self.flush_cmd(commit_at)
 
     def disconnect_all(self):
         """
         关闭SSH连接
         """
+        if not self.debug_mode:
+            list(
+                self.executor.map(
+                    lambda host: host.close(), self.host_instance_dict.values()
+                )
+            )
         for host_name in self.host_instance_dict:
-            if not self.debug_mode:
-                self.host_instance_dict[host_name].close()
             print(f"[INFO] Close SSH connect with {host_name}.")
 
-
     def cleanup(self):
         """
         程序退出时，清空配置，断开SSH连接
@@ -197,4 +692,6 @@ class ClusterInstance:
         if not self.debug_mode:
             print("[INFO] Clean the SSH environment")
             self.clean_host_environment()
-            self.disconnect_all()
\ No newline at end of file
+            self.flush_cmd()
+            self.disconnect_all()
+        self.executor.shutdown()
@@ -0,0 +1,179 @@
+import re
+
+SEGMENT_MARKER = "@@GEMINI_SEGMENT"  # Printed after every segment of the script, followed by the segment index and its exit code
+HEREDOC_DELIMITER = "GEMINI_BATCH_EOF"
+TC_FAILED_LINE_PATTERN = re.compile(r"Command failed -:(\d+)")
+COMMIT_SLACK_MARKER = "@@GEMINI_COMMIT_SLACK"  # Printed before waiting for the commit instant, followed by the remaining seconds
+
+
+class HostCmdBatch:
+    """
+    All operations queued for one host during a tick, shipped as a single shell script over one SSH channel.
+    Consecutive ovs flow modifications are sent through one "ovs-ofctl add-flows br0 -",
+    consecutive tc operations through one "tc -force -batch -", other commands are run as they are.
+
+    ovs_bundle:
+        If True, every ovs segment is committed as one OpenFlow 1.4 bundle, so the bridge switches to the new flows atomically.
+    """
+
+    SHELL = "shell"
+    OVS = "ovs"
+    TC = "tc"
+
+    def __init__(self, ovs_bridge="br0", ovs_bundle=False):
+        self.ovs_bridge = ovs_bridge
+        self.ovs_bundle = ovs_bundle
+        # Every segment is [kind, [operation, ...]], a shell segment always holds a single command
+        self.segment_list = []
+
+    def add_cmd(self, cmd):
+        self.segment_list.append([self.SHELL, [cmd]])
+
+    def add_ovs_flow_mod(self, flow_mod):
+        """
+        flow_mod is one line of "ovs-ofctl add-flows", e.g. "add ip,nw_dst=10.0.0.1,actions=output:2" or "delete ip,nw_dst=10.0.0.1"
+        """
+        self._add_line(self.OVS, flow_mod)
+
+    def add_tc_cmd(self, tc_cmd):
+        """
+        tc_cmd is one line of "tc -batch", i.e. a tc command without the leading "tc"
+        """
+        self._add_line(self.TC, tc_cmd)
+
+    def _add_line(self, kind, line):
+        if self.segment_list and self.segment_list[-1][0] == kind:
+            self.segment_list[-1][1].append(line)
+        else:
+            self.segment_list.append([kind, [line]])
+
+    def __len__(self):
+        return sum(len(operation_list) for _, operation_list in self.segment_list)
+
+    def get_operation_list(self):
+        """
+        Return all operations in execution order, ovs and tc operations are prefixed with their program name
+        """
+        operation_list = []
+        for kind, segment_operation_list in self.segment_list:
+            if kind == self.OVS:
+                operation_list += [
+                    f"ovs-ofctl add-flows {self.ovs_bridge}: {flow_mod}"
+                    for flow_mod in segment_operation_list
+                ]
+            elif kind == self.TC:
+                operation_list += [f"tc {tc_cmd}" for tc_cmd in segment_operation_list]
+            else:
+                operation_list += segment_operation_list
+        return operation_list
+
+    def build_script(self, commit_at=None):
+        """
+        Build the shell script, the output of every segment is followed by a marker line with its exit code
+        If commit_at (POSIX timestamp) is given, the script is staged on the host and waits until that instant before running any segment,
+        it first prints the remaining time (negative if the script arrived late) after a commit slack marker.
+        """
+        script_line_list = []
+        if commit_at is not None:
+            script_line_list += [
+                f'GEMINI_COMMIT_SLACK=$(awk -v commit_at={commit_at:.6f} -v now="$(date +%s.%N)" \'BEGIN {{ printf "%.6f", commit_at - now }}\')',
+                f'echo "{COMMIT_SLACK_MARKER} $GEMINI_COMMIT_SLACK"',
+                'awk -v slack="$GEMINI_COMMIT_SLACK" \'BEGIN { exit !(slack > 0) }\' && sleep "$GEMINI_COMMIT_SLACK"',
+            ]
+        for segment_index, (kind, operation_list) in enumerate(self.segment_list):
+            if kind == self.SHELL:
+                script_line_list.append("{")
+                script_line_list.append(operation_list[0])
+            else:
+                if kind == self.TC:
+                    program = "tc -force -batch -"
+                elif self.ovs_bundle:
+                    program = f"ovs-ofctl -O OpenFlow14 --bundle add-flows {self.ovs_bridge} -"
+                else:
+                    program = f"ovs-ofctl add-flows {self.ovs_bridge} -"
+                script_line_list.append(f"{{ {program} <<'{HEREDOC_DELIMITER}'")
+                script_line_list += operation_list
+                script_line_list.append(HEREDOC_DELIMITER)
+            script_line_list.append(
+                f'}} 2>&1; echo "{SEGMENT_MARKER} {segment_index} $?"'
+            )
+        return "\n".join(script_line_list) + "\n"
+
+    def parse_output(self, output):
+        """
+        Return the result (operation, exit_code, output, error) of every operation, aligned with get_operation_list().
+        A failed ovs segment fails all its flow modifications, because ovs-ofctl applies nothing after a parse error
+        (and a bundle is committed or rejected as a whole).
+        A failed tc segment only fails the lines reported by "Command failed -:N".
+        Operations of segments without a marker (the script was interrupted) get the exit code -1.
+        """
+        segment_output_dict = {}
+        segment_output_line_list = []
+        for line in output.splitlines():
+            if line.startswith(COMMIT_SLACK_MARKER):
+                continue
+            if line.startswith(SEGMENT_MARKER):
+                _, segment_index, exit_code = line.split()
+                segment_output_dict[int(segment_index)] = (
+                    int(exit_code),
+                    "\n".join(segment_output_line_list),
+                )
+                segment_output_line_list = []
+            else:
+                segment_output_line_list.append(line)
+
+        result_list = []
+        operation_list = iter(self.get_operation_list())
+        for segment_index, (kind, segment_operation_list) in enumerate(
+            self.segment_list
+        ):
+            exit_code, segment_output = segment_output_dict.get(segment_index, (-1, ""))
+            if kind == self.TC and exit_code > 0:
+                failed_line_dict = self._get_tc_failed_line_dict(segment_output)
+                for line_number in range(1, len(segment_operation_list) + 1):
+                    error = failed_line_dict.get(line_number)
+                    result_list.append(
+                        (
+                            next(operation_list),
+                            exit_code if error is not None else 0,
+                            "",
+                            error or "",
+                        )
+                    )
+            else:
+                for _ in segment_operation_list:
+                    result_list.append(
+                        (
+                            next(operation_list),
+                            exit_code,
+                            segment_output if kind == self.SHELL else "",
+                            segment_output if exit_code != 0 else "",
+                        )
+                    )
+        return result_list
+
+    def parse_commit_slack(self, output):
+        """
+        Return the seconds the script waited for the commit instant (negative if it arrived late), or None if it had no commit instant.
+        """
+        for line in output.splitlines():
+            if line.startswith(COMMIT_SLACK_MARKER):
+                return float(line.split()[1])
+        return None
+
+    def _get_tc_failed_line_dict(self, segment_output):
+        """
+        Return {line_number: error} from the output of "tc -force -batch", the error is the message printed before "Command failed -:N"
+        """
+        failed_line_dict = {}
+        message_line_list = []
+        for line in segment_output.splitlines():
+            match = TC_FAILED_LINE_PATTERN.search(line)
+            if match:
+                failed_line_dict[int(match.group(1))] = (
+                    "\n".join(message_line_list) or line
+                )
+                message_line_list = []
+            else:
+                message_line_list.append(line)
+        return failed_line_dict
@@ -15,6 +15,7 @@ class CmdHelper:
         cmd = "ovs-ofctl add-flow br0 tcp,in_port=1,tcp_dst=22,nw_dst={},actions=output:{}".format(
             ip, port
         )
+        return cmd
 
     @staticmethod
     def set_ovs_flow(src_ovs_port, src_ip, dst_ip, nxt_ovs_port, nxt_mac):
@@ -26,6 +27,42 @@ class CmdHelper:
             cmd = "ovs-ofctl add-flow br0 ip,in_port={},nw_src={},nw_dst={},actions=mod_dl_dst:{},output:{};".format(
                 src_ovs_port, src_ip, dst_ip, nxt_mac, nxt_ovs_port
             )
+        return cmd
+
+    @staticmethod
+    def ovs_add_flow_line(
+        src_ovs_port, src_ip, dst_ip, nxt_ovs_port, nxt_mac, cookie=None
+    ):
+        """
+        The same flow as set_ovs_flow, as one line of "ovs-ofctl add-flows", optionally tagged with a cookie
+        """
+        match = "ip,in_port={},nw_src={},nw_dst={}".format(src_ovs_port, src_ip, dst_ip)
+        if cookie is not None:
+            match = "cookie={:#x},".format(cookie) + match
+        if nxt_mac == "":
+            line = "add {},actions=output:{}".format(match, nxt_ovs_port)
+        else:
+            line = "add {},actions=mod_dl_dst:{},output:{}".format(
+                match, nxt_mac, nxt_ovs_port
+            )
+        return line
+
+    @staticmethod
+    def ovs_delete_flow_line(src_ovs_port, src_ip, dst_ip):
+        line = "delete ip,in_port={},nw_src={},nw_dst={}".format(
+            src_ovs_port, src_ip, dst_ip
+        )
+        return line
+
+    @staticmethod
+    def ovs_delete_flows_by_cookie_line(cookie, cookie_mask):
+        line = "delete cookie={:#x}/{:#x}".format(cookie, cookie_mask)
+        return line
+
+    @staticmethod
+    def delete_ovs_flows_by_cookie(cookie, cookie_mask):
+        cmd = "ovs-ofctl del-flows br0 cookie={:#x}/{:#x}".format(cookie, cookie_mask)
+        return cmd
 
     @staticmethod
     def clean_tc_environment():
@@ -66,3 +103,31 @@ class CmdHelper:
             " add dev enp1s0 protocol ip parent 1: prio 1 u32 match ip dst {} flowid 1:{}0"
         ).format(dst_16, dst, index)
         return cmd
+
+    @staticmethod
+    def tc_modify_queue_delay_line(nic_name, index, delay_time):
+        """
+        The same command as modify_tc_queue_delay, as one line of "tc -batch"
+        """
+        line = "qdisc change dev {} parent 1:{}0 netem delay {}ms".format(
+            nic_name, str(index), str(delay_time)
+        )
+        return line
+
+    @staticmethod
+    def tc_set_filter_line(nic_name, dst, index, handle):
+        """
+        Add or replace the u32 filter classifying dst into queue index, as one line of "tc -batch".
+        Every filtered dst of a NIC keeps its own filter handle (1 - 0xfff) so that the filter can be replaced and deleted without looking it up.
+        """
+        line = "filter replace dev {} parent 1: protocol ip prio 1 handle 800::{:x} u32 match ip dst {} flowid 1:{}0".format(
+            nic_name, handle, dst, index
+        )
+        return line
+
+    @staticmethod
+    def tc_delete_filter_line(nic_name, handle):
+        line = "filter del dev {} parent 1: protocol ip prio 1 handle 800::{:x} u32".format(
+            nic_name, handle
+        )
+        return line
@@ -1,7 +1,16 @@
-from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 import time
 from topology import Topology
+from timeline import TopologyTimeline
+from topology_publisher import TopologyPublisher
 from cluster_instance import ClusterInstance
+from handover_predictor import HandoverPredictor
+from delay_interpolator import DelayInterpolator
+from tick_profiler import TickProfiler
+
+PUSH_LEAD_MARGIN = 0.1  # Lead Added on Top of the Push Latency, Unit: s
+PUSH_LATENCY_SMOOTHING = 0.3  # Weight of the Newest Push Latency in Its Moving Average
 
 
 class ConstellationSystem:
@@ -13,38 +22,235 @@ class ConstellationSystem:
         hosts_filepath,
         update_interval,
         debug_mode,
+        router_type="floyd",
+        timeline_dirpath=None,
+        publish_filepath=None,
+        trace_filepath=None,
+        metrics_filepath=None,
+        metrics_port=None,
+        delay_update_interval=None,
     ):
-        self.topology = Topology(tles_filepath, facilities_filepath, isls_filepath)
+        # With a compiled timeline the topology of every tick is looked up instead of computed
+        if timeline_dirpath is None:
+            self.topology = Topology(
+                tles_filepath, facilities_filepath, isls_filepath, router_type
+            )
+        else:
+            self.topology = TopologyTimeline(timeline_dirpath)
+        # Predict the access satellite handovers of the live topology, a compiled timeline is only looked up per slot
+        self.handover_predictor = (
+            HandoverPredictor(self.topology) if timeline_dirpath is None else None
+        )
+        # Between two full ticks, push the tc queue delays every delay_update_interval seconds, interpolated from coarse propagations
+        self.delay_interpolator = (
+            DelayInterpolator(self.topology)
+            if delay_update_interval is not None and timeline_dirpath is None
+            else None
+        )
+        self.delay_update_interval_delta = (
+            timedelta(seconds=delay_update_interval)
+            if delay_update_interval is not None
+            else None
+        )
         self.cluster_instance = ClusterInstance(hosts_filepath, debug_mode)
         self.update_interval = update_interval
+        self.update_interval_delta = timedelta(seconds=update_interval)
+        # Measured time between starting a push and the scripts arriving at the slowest host, unit: s
+        self.push_latency = 0.0
+        # Publish the topology of every tick for traffic generators, monitors and visualizers in other processes
+        self.topology_publisher = (
+            TopologyPublisher(publish_filepath, self.topology.node_list)
+            if publish_filepath is not None
+            else None
+        )
+        # Time every phase of every tick, written as a JSONL trace and exported as Prometheus metrics
+        self.tick_profiler = TickProfiler(
+            trace_filepath, metrics_filepath, metrics_port
+        )
 
     def run(self):
+        """
+        Pipelined tick loop: while the rules of tick T are pushed to the hosts, the topology of tick T+1 is computed in a worker thread.
+        Delay updates are scheduled every update_interval seconds, and an extra tick is scheduled at every predicted handover,
+        so access links change exactly when they occur. The rules of every tick take effect at its scheduled instant.
+        A tick whose topology is only ready after the next tick is due is dropped, the next pushed tick carries its changes
+        because rules are reconciled against the last applied state.
+        With a delay interpolator, the tc queue delays are also updated every delay_update_interval seconds between two ticks.
+        """
         self.cluster_instance.connect()
         self.cluster_instance.prepare_cluster_environment()
+        compute_executor = ThreadPoolExecutor(max_workers=1)
         try:
+            tick_utc_time = datetime.now(timezone.utc)
+            self.schedule_start_utc_time = tick_utc_time
+            tick_future = compute_executor.submit(self.compute_tick, tick_utc_time)
+            last_tick_dropped = False
             while True:
+                neighbor_dict, topology_snapshot, tick_profile, node_store = (
+                    tick_future.result()
+                )
                 current_utc_time = datetime.now(timezone.utc)
-                print(f"[INFO] Current time: {current_utc_time}")
-                self.topology.update_topology_by_time(current_utc_time)
-                neighbor_dict = self.topology.get_neighbor_dict()
-                all_pair_path_dict = self.topology.get_all_pair_path_dict()
-                self.cluster_instance.update_network_status_by_topology(
-                    neighbor_dict, all_pair_path_dict
+                # Never drop two ticks in a row, so rules are still pushed when one tick takes longer than the interval
+                if not last_tick_dropped and current_utc_time >= (
+                    self.get_next_tick_time(tick_utc_time)
+                ):
+                    dropped_utc_time = tick_utc_time
+                    tick_utc_time = self.get_next_tick_time(current_utc_time)
+                    print(
+                        f"[WARN] The tick at {dropped_utc_time} is stale and dropped, its changes are merged into the tick at {tick_utc_time}."
+                    )
+                    self.tick_profiler.drop_tick(tick_profile)
+                    tick_future = compute_executor.submit(
+                        self.compute_tick, tick_utc_time
+                    )
+                    last_tick_dropped = True
+                    continue
+                last_tick_dropped = False
+
+                next_tick_utc_time = self.get_next_tick_time(tick_utc_time)
+                tick_future = compute_executor.submit(
+                    self.compute_tick, next_tick_utc_time
+                )
+                print(f"[INFO] Current time: {tick_utc_time}")
+                self.push_tick(
+                    tick_utc_time, neighbor_dict, topology_snapshot, tick_profile
                 )
-                self.sleep_for_interval(current_utc_time)
+                self.tick_profiler.finish_tick(tick_profile)
+                if self.delay_interpolator is not None:
+                    self.push_delay_updates(
+                        tick_utc_time, next_tick_utc_time, node_store
+                    )
+                tick_utc_time = next_tick_utc_time
         except KeyboardInterrupt:
+            compute_executor.shutdown(cancel_futures=True)
             self.cleanup()
 
-    def sleep_for_interval(self, last_utc_time):
-        current_utc_time = datetime.now(timezone.utc)
-        time_difference = current_utc_time - last_utc_time
-        if time_difference.total_seconds() < self.update_interval:
-            time.sleep(self.update_interval - time_difference.total_seconds())
-        else:
-            print(
-                "[WARN] The update interval is shorter than the actual execution time. It needs to be longer."
+    def compute_tick(self, tick_utc_time):
+        """
+        Compute the topology of the tick, runs in the worker thread.
+        Return the neighbor dict, the TopologySnapshot, the TickProfile timing the tick,
+        and a copy of the NodeStore for the delay interpolator (None without a delay interpolator).
+        """
+        tick_profile = self.tick_profiler.start_tick(tick_utc_time)
+        self.topology.update_topology_by_time(tick_utc_time, tick_profile)
+        with tick_profile.phase("neighbor_dict_build"):
+            neighbor_dict = self.topology.get_neighbor_dict()
+        # The routing and the snapshot build are timed as separate phases by the topology
+        topology_snapshot = self.topology.get_topology_snapshot(
+            tick_profile=tick_profile
+        )
+        node_store = (
+            self.topology.node_store.copy()
+            if self.delay_interpolator is not None
+            else None
+        )
+        return neighbor_dict, topology_snapshot, tick_profile, node_store
+
+    def push_tick(self, tick_utc_time, neighbor_dict, topology_snapshot, tick_profile):
+        """
+        Push the rules of the tick so that they take effect on all hosts at tick_utc_time:
+        the scripts are sent ahead by the measured push latency plus a margin, and wait on the hosts for the commit instant.
+        """
+        commit_at = tick_utc_time.timestamp()
+        with tick_profile.phase("push_wait"):
+            self.sleep_until(
+                tick_utc_time - timedelta(seconds=self.push_latency + PUSH_LEAD_MARGIN)
             )
+        push_start_time = time.time()
+        host_batch_result_dict = (
+            self.cluster_instance.update_network_status_by_topology(
+                neighbor_dict,
+                topology_snapshot,
+                commit_at,
+                tick_profile,
+            )
+        )
+        tick_profile.add_host_batch_results(host_batch_result_dict)
+        self.update_push_latency(push_start_time, commit_at, host_batch_result_dict)
+        if self.topology_publisher is not None:
+            with tick_profile.phase("publish"):
+                self.topology_publisher.publish(
+                    topology_snapshot, neighbor_dict, tick_utc_time.timestamp()
+                )
+
+    def push_delay_updates(self, tick_utc_time, next_tick_utc_time, node_store):
+        """
+        Push the interpolated tc queue delays every delay_update_interval seconds after tick_utc_time,
+        the links stay those of node_store (the tick), only their delays change. Updates that could not reach the hosts
+        before the push of the next tick starts are skipped, and so are updates whose instant has already passed.
+        Every update is profiled on its own without the idle wait before its push, and its push latency feeds the push lead.
+        """
+        update_utc_time = tick_utc_time + self.delay_update_interval_delta
+        while (
+            update_utc_time + timedelta(seconds=self.push_latency + PUSH_LEAD_MARGIN)
+            <= next_tick_utc_time
+        ):
+            if update_utc_time > datetime.now(timezone.utc):
+                delay_update_profile = self.tick_profiler.start_tick(update_utc_time)
+                with delay_update_profile.phase("delay_interpolation"):
+                    neighbor_dict = self.delay_interpolator.interpolate_node_store(
+                        node_store, update_utc_time
+                    ).get_neighbor_dict()
+                self.sleep_until(
+                    update_utc_time
+                    - timedelta(seconds=self.push_latency + PUSH_LEAD_MARGIN)
+                )
+                commit_at = update_utc_time.timestamp()
+                push_start_time = time.time()
+                with delay_update_profile.phase("delay_update_push"):
+                    host_batch_result_dict = (
+                        self.cluster_instance.update_tc_queue_delay_by_neighbor_dict(
+                            neighbor_dict, commit_at
+                        )
+                    )
+                delay_update_profile.add_host_batch_results(host_batch_result_dict)
+                self.update_push_latency(
+                    push_start_time, commit_at, host_batch_result_dict
+                )
+                self.tick_profiler.finish_delay_update(delay_update_profile)
+            update_utc_time += self.delay_update_interval_delta
+
+    def update_push_latency(self, push_start_time, commit_at, host_batch_result_dict):
+        """
+        Update the moving average of the time between starting a push and the scripts arriving at the slowest host.
+        A host reports its slack before the commit instant, so it received the script at commit_at - slack.
+        """
+        latency_list = [
+            commit_at - host_batch_result.commit_slack - push_start_time
+            for host_batch_result in host_batch_result_dict.values()
+            if host_batch_result.commit_slack is not None
+        ]
+        if not latency_list:
+            return
+        self.push_latency += PUSH_LATENCY_SMOOTHING * (
+            max(latency_list) - self.push_latency
+        )
+
+    def get_next_tick_time(self, utc_time):
+        """
+        Return the first scheduled tick after utc_time: the next delay update or the next predicted handover, whichever comes first.
+        """
+        elapsed_tick_count = (utc_time - self.schedule_start_utc_time) // (
+            self.update_interval_delta
+        )
+        next_tick_utc_time = (
+            self.schedule_start_utc_time
+            + (elapsed_tick_count + 1) * self.update_interval_delta
+        )
+        if self.handover_predictor is not None:
+            handover_utc_time = self.handover_predictor.get_next_event_time(utc_time)
+            if handover_utc_time is not None and handover_utc_time < next_tick_utc_time:
+                return handover_utc_time
+        return next_tick_utc_time
+
+    def sleep_until(self, utc_time):
+        sleep_seconds = (utc_time - datetime.now(timezone.utc)).total_seconds()
+        if sleep_seconds > 0:
+            time.sleep(sleep_seconds)
 
     def cleanup(self):
         print("[INFO] Program interrupted. Executing cleanup logic.")
         self.cluster_instance.cleanup()
+        if self.topology_publisher is not None:
+            self.topology_publisher.close()
+        self.tick_profiler.close()
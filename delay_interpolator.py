@@ -0,0 +1,136 @@
+from datetime import timedelta
+
+import numpy as np
+from scipy.interpolate import CubicSpline
+from skyfield.api import load
+
+DELAY_INTERPOLATION_SAMPLE_STEP = 60  # Time Between Two Fitted Propagations, Unit: s
+DELAY_INTERPOLATION_WINDOW = 600  # Length of Every Fitted Window, Unit: s
+
+
+class DelayInterpolator:
+    """
+    Interpolate the link delays of a Topology between coarse propagations.
+    All satellites are propagated every sample_step seconds over a window with one batch call, and a cubic spline is fitted
+    to the delay of every ISL and of every (facility, satellite) pair selected for access at any sample.
+    Evaluating the splines at any instant of the window then costs no propagation, no access selection and no routing.
+    The links themselves (which ISLs and access satellites exist) are not interpolated, they are taken from the NodeStore of the last full tick.
+    """
+
+    def __init__(
+        self,
+        topology,
+        sample_step=DELAY_INTERPOLATION_SAMPLE_STEP,
+        window=DELAY_INTERPOLATION_WINDOW,
+    ):
+        self.topology = topology
+        self.sample_step = sample_step
+        self.window = window
+        self.ts = load.timescale()
+
+        # The instants interpolated by the current splines, None before the first fit
+        self.window_start_utc_time = None
+        self.window_end_utc_time = None
+        # Spline of the (E,) delays of topology.isl_edge_array, x is the offset from window_start_utc_time in seconds
+        self.isl_delay_spline = None
+        # Spline of the (K,) delays of the fitted (facility, satellite) pairs, None if no facility sees a satellite in the window
+        self.access_delay_spline = None
+        # (F, N) column of every (facility, satellite) pair in access_delay_spline, -1 if the pair is not fitted
+        self.access_pair_column_array = None
+
+    def fit(self, start_utc_time):
+        """
+        Propagate from start_utc_time to start_utc_time + window and fit the splines.
+        One extra sample is taken on both sides, so the interpolated window is not at the ends of the splines.
+        """
+        topology = self.topology
+        sample_count = int(-(-self.window // self.sample_step)) + 3
+        sample_offsets = np.arange(-1, sample_count - 1) * float(self.sample_step)
+        sat_positions_series = topology.propagator.get_positions_km_series(
+            self.ts.from_datetimes(
+                [
+                    start_utc_time + timedelta(seconds=float(offset))
+                    for offset in sample_offsets
+                ]
+            )
+        )
+        self.isl_delay_spline = CubicSpline(
+            sample_offsets,
+            topology.get_isl_delays_by_sat_positions(sat_positions_series),
+            axis=0,
+        )
+
+        access_selector = topology.access_selector
+        access_sat_indices, _ = access_selector.select_access_satellites_series(
+            sat_positions_series
+        )
+        facility_indices, sat_indices = np.nonzero(
+            self._get_access_pair_mask(access_sat_indices, len(sat_positions_series[0]))
+        )
+        self.access_pair_column_array = np.full(
+            (len(access_selector.facility_name_list), len(sat_positions_series[0])),
+            -1,
+            dtype=np.int64,
+        )
+        self.access_pair_column_array[facility_indices, sat_indices] = np.arange(
+            len(facility_indices)
+        )
+        if len(facility_indices):
+            access_distances = np.linalg.norm(
+                sat_positions_series[:, sat_indices, :]
+                - access_selector.facility_positions[facility_indices],
+                axis=-1,
+            )
+            self.access_delay_spline = CubicSpline(
+                sample_offsets,
+                topology.distance_km_to_light_travel_time_ms(access_distances),
+                axis=0,
+            )
+        else:
+            self.access_delay_spline = None
+
+        self.window_start_utc_time = start_utc_time
+        self.window_end_utc_time = start_utc_time + timedelta(seconds=self.window)
+
+    def interpolate_node_store(self, node_store, utc_time):
+        """
+        Return a copy of node_store with the ISL and access delays at utc_time, a new window is fitted if utc_time is outside the current one.
+        node_store is left unchanged. An access link whose pair was never selected at a sample (a satellite visible for less than one sample step)
+        keeps its delay from node_store.
+        """
+        if self.window_start_utc_time is None or not (
+            self.window_start_utc_time <= utc_time <= self.window_end_utc_time
+        ):
+            self.fit(utc_time)
+        offset = (utc_time - self.window_start_utc_time).total_seconds()
+        interpolated_node_store = node_store.copy()
+
+        isl_slot_edge_array = self.topology.isl_slot_edge_array
+        isl_slot_mask = isl_slot_edge_array >= 0
+        interpolated_node_store.isl_neighbor_delay_array[isl_slot_mask] = (
+            self.isl_delay_spline(offset)[isl_slot_edge_array[isl_slot_mask]]
+        )
+
+        if self.access_delay_spline is not None:
+            facility_indices = np.flatnonzero(node_store.access_sat_index_array >= 0)
+            columns = self.access_pair_column_array[
+                facility_indices, node_store.access_sat_index_array[facility_indices]
+            ]
+            fitted = columns >= 0
+            interpolated_node_store.access_delay_array[facility_indices[fitted]] = (
+                self.access_delay_spline(offset)[columns[fitted]]
+            )
+        return interpolated_node_store
+
+    def _get_access_pair_mask(self, access_sat_indices, sat_count):
+        """
+        Return the (F, N) mask of the (facility, satellite) pairs selected at any sample of the (T, F) access satellites.
+        """
+        access_pair_mask = np.zeros(
+            (access_sat_indices.shape[1], sat_count), dtype=bool
+        )
+        epoch_indices, facility_indices = np.nonzero(access_sat_indices >= 0)
+        access_pair_mask[
+            facility_indices, access_sat_indices[epoch_indices, facility_indices]
+        ] = True
+        return access_pair_mask
@@ -0,0 +1,230 @@
+import heapq
+from datetime import timedelta
+
+import numpy as np
+from skyfield.api import load
+
+HANDOVER_PREDICTION_HORIZON = 600  # Length of Every Prediction Window, Unit: s
+HANDOVER_SAMPLE_STEP = 10  # Step of the Coarse Access Samples, Unit: s
+HANDOVER_TIME_TOLERANCE = 0.01  # Precision of the Predicted Handover Instants, Unit: s
+HANDOVER_MIN_TICK_SPACING = (
+    10  # Minimum Spacing of Extra Ticks, Also the Bound of Handover Lateness, Unit: s
+)
+
+
+class HandoverPredictor:
+    """
+    Predict the instants when the access satellite of a ground facility changes (a satellite rises or sets, or a nearer one appears).
+    The access selection is sampled on a coarse grid for a whole window, and all changes between two samples are located together by bisection,
+    every bisection round propagates only the candidate satellites of every pending change at its middle instant in one call.
+    Predicted events are turned into extra ticks kept in a priority queue ordered by time.
+    """
+
+    def __init__(
+        self,
+        topology,
+        horizon=HANDOVER_PREDICTION_HORIZON,
+        sample_step=HANDOVER_SAMPLE_STEP,
+        time_tolerance=HANDOVER_TIME_TOLERANCE,
+        min_tick_spacing=HANDOVER_MIN_TICK_SPACING,
+    ):
+        self.topology = topology
+        self.horizon = horizon
+        self.sample_step = sample_step
+        self.time_tolerance = time_tolerance
+        self.min_tick_spacing = min_tick_spacing
+        self.ts = load.timescale()
+
+        # Heap of the extra tick times of the predicted events
+        self.tick_heap = []
+        # Last extra tick scheduled, the next one is at least min_tick_spacing later
+        self.last_tick_utc_time = None
+        # End of the predicted windows, events before this instant are all covered by tick_heap
+        self.predicted_until = None
+
+    def get_next_event_time(self, utc_time):
+        """
+        Return the instant of the next extra tick after utc_time, predicting further windows when needed.
+        A handover gets a tick at its own instant unless it is within min_tick_spacing of the previous tick,
+        then it shares the tick min_tick_spacing after the previous one with the handovers following it until then.
+        So the first handover of a burst is applied exactly, none is applied more than min_tick_spacing late,
+        and at most one extra tick is scheduled per min_tick_spacing however many facilities hand over.
+        Returns None if no handover happens within one horizon after utc_time.
+        """
+        if self.predicted_until is None or self.predicted_until < utc_time:
+            self.tick_heap = []
+            self.last_tick_utc_time = None
+            self.predicted_until = utc_time
+        while self.predicted_until < utc_time + timedelta(seconds=self.horizon):
+            window_end = self.predicted_until + timedelta(seconds=self.horizon)
+            for event in self.predict_handover_events(self.predicted_until, window_end):
+                self._schedule_tick(event[0])
+            self.predicted_until = window_end
+        while self.tick_heap and self.tick_heap[0] <= utc_time:
+            heapq.heappop(self.tick_heap)
+        if not self.tick_heap:
+            return None
+        return self.tick_heap[0]
+
+    def _schedule_tick(self, event_utc_time):
+        """
+        Cover the handover at event_utc_time by an extra tick, events must be scheduled in time order.
+        """
+        if self.last_tick_utc_time is not None:
+            if event_utc_time <= self.last_tick_utc_time:
+                return
+            event_utc_time = max(
+                event_utc_time,
+                self.last_tick_utc_time + timedelta(seconds=self.min_tick_spacing),
+            )
+        heapq.heappush(self.tick_heap, event_utc_time)
+        self.last_tick_utc_time = event_utc_time
+
+    def predict_handover_events(self, start_utc_time, end_utc_time):
+        """
+        Return the handovers in (start_utc_time, end_utc_time] as a list of (event time, facility name, old satellite name, new satellite name) sorted by time.
+        Every event time is the first instant (within time_tolerance) at which the new access satellite is selected.
+        """
+        window_seconds = (end_utc_time - start_utc_time).total_seconds()
+        sample_count = max(int(-(-window_seconds // self.sample_step)), 1) + 1
+        sample_offsets = np.minimum(
+            np.arange(sample_count) * float(self.sample_step), window_seconds
+        )
+        sample_positions = self.topology.propagator.get_positions_km_series(
+            self._get_skyfield_time(start_utc_time, sample_offsets)
+        )
+        access_selector = self.topology.access_selector
+        sample_access_array = access_selector.select_access_satellites_series(
+            sample_positions
+        )[0]
+
+        sample_indices, facility_indices = np.nonzero(
+            sample_access_array[:-1] != sample_access_array[1:]
+        )
+        if not len(sample_indices):
+            return []
+        low_sat_indices = sample_access_array[sample_indices, facility_indices]
+        high_sat_indices = sample_access_array[sample_indices + 1, facility_indices]
+
+        # The candidates of a change are the satellites near the facility at both samples around it
+        candidate_index_lists_dict = {
+            sample_index: access_selector.get_candidate_index_lists(
+                sample_positions[sample_index]
+            )
+            for sample_index in np.unique(
+                np.concatenate([sample_indices, sample_indices + 1])
+            ).tolist()
+        }
+        candidate_set_list = [
+            set(candidate_index_lists_dict[sample_index][facility_index])
+            | set(candidate_index_lists_dict[sample_index + 1][facility_index])
+            | ({low_sat_index, high_sat_index} - {-1})
+            for sample_index, facility_index, low_sat_index, high_sat_index in zip(
+                sample_indices.tolist(),
+                facility_indices.tolist(),
+                low_sat_indices.tolist(),
+                high_sat_indices.tolist(),
+            )
+        ]
+        candidate_matrix = np.full(
+            (len(candidate_set_list), max(map(len, candidate_set_list))),
+            -1,
+            dtype=np.int64,
+        )
+        for event_index, candidate_set in enumerate(candidate_set_list):
+            candidate_matrix[event_index, : len(candidate_set)] = sorted(candidate_set)
+
+        event_offsets, low_sat_indices, high_sat_indices = self._bisect_handovers(
+            start_utc_time,
+            facility_indices,
+            candidate_matrix,
+            sample_offsets[sample_indices],
+            sample_offsets[sample_indices + 1],
+            low_sat_indices,
+            high_sat_indices,
+        )
+        event_list = [
+            (
+                start_utc_time + timedelta(seconds=event_offset),
+                access_selector.facility_name_list[facility_index],
+                self._get_sat_name(old_sat_index),
+                self._get_sat_name(new_sat_index),
+            )
+            for event_offset, facility_index, old_sat_index, new_sat_index in zip(
+                event_offsets.tolist(),
+                facility_indices.tolist(),
+                low_sat_indices.tolist(),
+                high_sat_indices.tolist(),
+            )
+        ]
+        event_list.sort()
+        return event_list
+
+    def _bisect_handovers(
+        self,
+        start_utc_time,
+        facility_indices,
+        candidate_matrix,
+        low_offsets,
+        high_offsets,
+        low_sat_indices,
+        high_sat_indices,
+    ):
+        """
+        Narrow every (low_offset, high_offset] down to time_tolerance around the instant the access satellite of its facility changes.
+        All pending changes are halved together: every round propagates the candidate satellites of every change (rows of candidate_matrix, -1 is padding)
+        at its own middle instant with one call, and selects the access satellite of every facility among its own candidates only.
+        Returns the (K,) high offsets, access satellites before and access satellites after.
+        """
+        low_offsets = np.array(low_offsets, dtype=np.float64)
+        high_offsets = np.array(high_offsets, dtype=np.float64)
+        low_sat_indices = np.array(low_sat_indices, dtype=np.int64)
+        high_sat_indices = np.array(high_sat_indices, dtype=np.int64)
+        pending_indices = np.flatnonzero(
+            high_offsets - low_offsets > self.time_tolerance
+        )
+        while len(pending_indices):
+            middle_offsets = (
+                low_offsets[pending_indices] + high_offsets[pending_indices]
+            ) / 2
+            pending_candidate_matrix = candidate_matrix[pending_indices]
+            candidate_positions = self.topology.propagator.get_positions_km_of_pairs(
+                self._get_skyfield_time(start_utc_time, middle_offsets),
+                pending_candidate_matrix,
+            )
+            columns, _ = self.topology.access_selector.select_access_satellites_among(
+                candidate_positions, facility_indices[pending_indices]
+            )
+            middle_sat_indices = np.where(
+                columns >= 0,
+                pending_candidate_matrix[np.arange(len(columns)), columns],
+                -1,
+            )
+
+            unchanged = middle_sat_indices == low_sat_indices[pending_indices]
+            low_offsets[pending_indices[unchanged]] = middle_offsets[unchanged]
+            high_offsets[pending_indices[~unchanged]] = middle_offsets[~unchanged]
+            high_sat_indices[pending_indices[~unchanged]] = middle_sat_indices[
+                ~unchanged
+            ]
+            pending_indices = pending_indices[
+                high_offsets[pending_indices] - low_offsets[pending_indices]
+                > self.time_tolerance
+            ]
+        return high_offsets, low_sat_indices, high_sat_indices
+
+    def _get_skyfield_time(self, start_utc_time, offsets):
+        """
+        Return the array time of start_utc_time plus every offset (s), built in one call instead of one datetime per offset.
+        """
+        return self.ts.utc(
+            start_utc_time.year,
+            start_utc_time.month,
+            start_utc_time.day,
+            start_utc_time.hour,
+            start_utc_time.minute,
+            start_utc_time.second + start_utc_time.microsecond / 1e6 + offsets,
+        )
+
+    def _get_sat_name(self, sat_index):
+        return self.topology.node_list[sat_index] if sat_index >= 0 else None
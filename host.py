@@ -42,3 +42,14 @@ class Host:
     def execute(self, command):
         stdin, stdout, stderr = self.client.exec_command(command)
         return stdout.read().decode("utf-8")
+
+    def execute_script(self, script):
+        """
+        Send the script through the stdin of a single remote shell and return (exit_code, stdout, stderr)
+        """
+        stdin, stdout, stderr = self.client.exec_command("sh -s")
+        stdin.write(script)
+        stdin.channel.shutdown_write()
+        output = stdout.read().decode("utf-8")
+        error = stderr.read().decode("utf-8")
+        return stdout.channel.recv_exit_status(), output, error
@@ -8,6 +8,13 @@ ISLS_FILEPATH = "./data/three.isls"
 HOSTS_FILEPATH = "./data/hosts.json"
 UPDATE_INTERVAL = 100
 DEBUG_MODE = True
+ROUTER_TYPE = "dijkstra"
+TIMELINE_DIRPATH = None
+PUBLISH_FILEPATH = None
+TRACE_FILEPATH = None
+METRICS_FILEPATH = None
+METRICS_PORT = None
+DELAY_UPDATE_INTERVAL = None
 
 
 if __name__ == "__main__":
@@ -18,5 +25,12 @@ if __name__ == "__main__":
         HOSTS_FILEPATH,
         UPDATE_INTERVAL,
         DEBUG_MODE,
+        ROUTER_TYPE,
+        TIMELINE_DIRPATH,
+        PUBLISH_FILEPATH,
+        TRACE_FILEPATH,
+        METRICS_FILEPATH,
+        METRICS_PORT,
+        DELAY_UPDATE_INTERVAL,
     )
     cs.run()
@@ -0,0 +1,81 @@
+_MISSING = object()
+
+
+class NetworkStateReconciler:
+    """
+    Keep the last applied rules of every host, and compute the rule changes needed to reach a new desired state.
+    Rules are grouped by rule kind (e.g. "ovs_flow"), every kind maps host name -> rule key -> rule value.
+    """
+
+    def __init__(self):
+        self.applied_rule_dict = {}
+        # Number of rule changes suppressed by the change threshold in the last reconcile of every rule kind
+        self.suppressed_count_dict = {}
+
+    def reconcile(self, rule_kind, desired_host_rule_dict, change_threshold=None):
+        """
+        Diff the desired rules of one kind against the applied ones, and record the desired rules as applied.
+        Returns {host_name: (changed_rule_dict, removed_rule_key_list)} for the hosts with changes only.
+        Hosts missing from desired_host_rule_dict are considered to have no rule of this kind.
+        If change_threshold is given, rule values are numbers and a value that moved by at most change_threshold is not changed:
+        the applied value is kept, so small changes accumulate until they exceed the threshold.
+        """
+        applied_host_rule_dict = self.applied_rule_dict.get(rule_kind, {})
+        host_name_list = list(desired_host_rule_dict) + [
+            host_name
+            for host_name in applied_host_rule_dict
+            if host_name not in desired_host_rule_dict
+        ]
+        rule_change_dict = {}
+        new_applied_host_rule_dict = {}
+        suppressed_count = 0
+        for host_name in host_name_list:
+            desired_rules = desired_host_rule_dict.get(host_name, {})
+            applied_rules = applied_host_rule_dict.get(host_name, {})
+            changed_rule_dict = {}
+            new_applied_rules = {}
+            for rule_key, rule_value in desired_rules.items():
+                applied_value = applied_rules.get(rule_key, _MISSING)
+                if applied_value == rule_value:
+                    new_applied_rules[rule_key] = rule_value
+                elif (
+                    change_threshold is not None
+                    and applied_value is not _MISSING
+                    and abs(rule_value - applied_value) <= change_threshold
+                ):
+                    new_applied_rules[rule_key] = applied_value
+                    suppressed_count += 1
+                else:
+                    new_applied_rules[rule_key] = rule_value
+                    changed_rule_dict[rule_key] = rule_value
+            removed_rule_key_list = [
+                rule_key for rule_key in applied_rules if rule_key not in desired_rules
+            ]
+            if changed_rule_dict or removed_rule_key_list:
+                rule_change_dict[host_name] = (changed_rule_dict, removed_rule_key_list)
+            if host_name in desired_host_rule_dict:
+                new_applied_host_rule_dict[host_name] = new_applied_rules
+        self.applied_rule_dict[rule_kind] = new_applied_host_rule_dict
+        self.suppressed_count_dict[rule_kind] = suppressed_count
+        return rule_change_dict
+
+    def has_applied_rules(self, rule_kind, host_name):
+        """
+        Return whether rules of this kind have ever been applied to the host since the last reset.
+        """
+        return host_name in self.applied_rule_dict.get(rule_kind, {})
+
+    def reset_host(self, host_name):
+        """
+        Forget the applied rules of every kind of one host, e.g. after a push to it failed:
+        its state is unknown, so the next reconcile sends all its desired rules again.
+        """
+        for applied_host_rule_dict in self.applied_rule_dict.values():
+            applied_host_rule_dict.pop(host_name, None)
+
+    def reset(self):
+        """
+        Forget all applied rules, e.g. after the host environment has been cleaned.
+        """
+        self.applied_rule_dict = {}
+        self.suppressed_count_dict = {}
@@ -1,50 +1,271 @@
 import json
+from abc import ABC, abstractmethod
+from math import inf
 
-class BaseNode:
-    def __init__(self, neighbor_info=None):
-        self._neighbor_info = neighbor_info or {}
+import numpy as np
 
-    def __getattr__(self, name):
-        if name in self._neighbor_info:
-            return self._neighbor_info[name]
-        raise AttributeError(
-            f"'{self.__class__.__name__}' object has no attribute '{name}'"
-        )
+# Directions of the ISL neighbor slots of a satellite, in the column order of NodeStore.isl_neighbor_index_array
+SAT_NEIGHBOR_DIRECTION_LIST = ["up", "down", "left", "right"]
 
-    def __setattr__(self, name, value):
-        if name == "_neighbor_info":
-            super().__setattr__(name, value)
-        elif name in self._neighbor_info:
-            self._neighbor_info[name] = value
-        else:
-            raise AttributeError(
-                f"'{self.__class__.__name__}' object has no attribute '{name}'"
-            )
+
+class BaseNode(ABC):
+    """
+    A view of one node in a NodeStore, it holds no neighbor information itself:
+    reads translate the arrays of the store into names, writes go to the arrays in place.
+    """
+
+    __slots__ = ("node_store", "node_index")
+
+    def __init__(self, node_store, node_index):
+        self.node_store = node_store
+        self.node_index = node_index
 
     def __str__(self):
-        return json.dumps(self._neighbor_info, indent=4)
-    
+        return json.dumps(self.get_all_attributes(), indent=4)
+
+    @abstractmethod
     def get_all_attributes(self):
-        return self._neighbor_info
+        pass
+
+
+def _isl_neighbor_info_property(direction_index):
+    """
+    Return the property of one ISL neighbor slot: [neighbor name, delay] or None, assigning [neighbor name, delay] or None updates the store.
+    """
+
+    def get_neighbor_info(self):
+        neighbor_index = int(
+            self.node_store.isl_neighbor_index_array[self.node_index, direction_index]
+        )
+        if neighbor_index < 0:
+            return None
+        return [
+            self.node_store.node_list[neighbor_index],
+            float(
+                self.node_store.isl_neighbor_delay_array[
+                    self.node_index, direction_index
+                ]
+            ),
+        ]
+
+    def set_neighbor_info(self, neighbor_info):
+        if neighbor_info is None:
+            neighbor_index, delay = -1, inf
+        else:
+            neighbor_index = self.node_store.get_node_index(neighbor_info[0])
+            delay = neighbor_info[1]
+        self.node_store.isl_neighbor_index_array[self.node_index, direction_index] = (
+            neighbor_index
+        )
+        self.node_store.isl_neighbor_delay_array[self.node_index, direction_index] = (
+            delay
+        )
+
+    return property(get_neighbor_info, set_neighbor_info)
 
 
 class SatNode(BaseNode):
-    def __init__(
-        self,
-        up_neighbor_info=None,
-        down_neighbor_info=None,
-        left_neighbor_info=None,
-        right_neighbor_info=None,
-        ground_neighbor_info=None,
-    ):
-        super().__init__({
-            "up_neighbor_info": up_neighbor_info,
-            "down_neighbor_info": down_neighbor_info,
-            "left_neighbor_info": left_neighbor_info,
-            "right_neighbor_info": right_neighbor_info,
-            "ground_neighbor_info": ground_neighbor_info,
-        })
+    """
+    up_neighbor_info, down_neighbor_info, left_neighbor_info, right_neighbor_info:
+        [neighbor satellite name (str), delay (float, ms)], or None without an ISL in that direction.
+
+    ground_neighbor_info:
+        [(facility name (str), delay (float, ms)), ...] of the facilities accessing this satellite, or None. Read-only,
+        it is derived from the access satellites of the facilities.
+    """
+
+    __slots__ = ()
+
+    up_neighbor_info = _isl_neighbor_info_property(0)
+    down_neighbor_info = _isl_neighbor_info_property(1)
+    left_neighbor_info = _isl_neighbor_info_property(2)
+    right_neighbor_info = _isl_neighbor_info_property(3)
+
+    @property
+    def ground_neighbor_info(self):
+        node_store = self.node_store
+        facility_index_array = node_store.get_ground_facility_indices(self.node_index)
+        if not len(facility_index_array):
+            return None
+        return [
+            (node_store.node_list[node_store.sat_count + facility_index], delay)
+            for facility_index, delay in zip(
+                facility_index_array.tolist(),
+                node_store.access_delay_array[facility_index_array].tolist(),
+            )
+        ]
+
+    def set_isl_delay(self, direction_index, delay):
+        """
+        Update the delay of one ISL neighbor slot in place, direction_index follows SAT_NEIGHBOR_DIRECTION_LIST.
+        """
+        self.node_store.isl_neighbor_delay_array[self.node_index, direction_index] = (
+            delay
+        )
+
+    def get_all_attributes(self):
+        return {
+            "up_neighbor_info": self.up_neighbor_info,
+            "down_neighbor_info": self.down_neighbor_info,
+            "left_neighbor_info": self.left_neighbor_info,
+            "right_neighbor_info": self.right_neighbor_info,
+            "ground_neighbor_info": self.ground_neighbor_info,
+        }
+
 
 class FacilityNode(BaseNode):
-    def __init__(self, sat_neighbor_info=None):
-        super().__init__({"sat_neighbor_info": sat_neighbor_info})
+    """
+    sat_neighbor_info:
+        (access satellite name (str), delay (float, ms)), or None if no satellite is visible.
+    """
+
+    __slots__ = ()
+
+    @property
+    def facility_index(self):
+        return self.node_index - self.node_store.sat_count
+
+    @property
+    def sat_neighbor_info(self):
+        sat_index = int(self.node_store.access_sat_index_array[self.facility_index])
+        if sat_index < 0:
+            return None
+        return (
+            self.node_store.node_list[sat_index],
+            float(self.node_store.access_delay_array[self.facility_index]),
+        )
+
+    @sat_neighbor_info.setter
+    def sat_neighbor_info(self, sat_neighbor_info):
+        if sat_neighbor_info is None:
+            sat_index, delay = -1, inf
+        else:
+            sat_index = self.node_store.get_node_index(sat_neighbor_info[0])
+            delay = sat_neighbor_info[1]
+        self.node_store.access_sat_index_array[self.facility_index] = sat_index
+        self.node_store.access_delay_array[self.facility_index] = delay
+        self.node_store.reset_ground_neighbor_index()
+
+    def get_all_attributes(self):
+        return {"sat_neighbor_info": self.sat_neighbor_info}
+
+
+class NodeStore:
+    """
+    Neighbor information of all nodes keyed by node index, satellites first and ground facilities following as in Topology.node_list.
+    ISL neighbors are (S, 4) int32 index and float64 delay columns in the order of SAT_NEIGHBOR_DIRECTION_LIST,
+    the access satellite of every facility is an (F,) int32 index column and an (F,) float64 delay column,
+    -1 and inf mean that there is no neighbor. The ground neighbors of a satellite are derived from the access columns
+    through an inverse index built on first use, every writer of access_sat_index_array calls reset_ground_neighbor_index.
+    Node names are only used at the boundary: get_node_index, the node views (SatNode, FacilityNode) and get_neighbor_dict.
+    """
+
+    def __init__(self, node_list, sat_count):
+        self.node_list = node_list
+        self.node_index_dict = {
+            node_name: node_index for node_index, node_name in enumerate(node_list)
+        }
+        self.sat_count = sat_count
+        self.facility_count = len(node_list) - sat_count
+        self.isl_neighbor_index_array = np.full(
+            (sat_count, len(SAT_NEIGHBOR_DIRECTION_LIST)), -1, dtype=np.int32
+        )
+        self.isl_neighbor_delay_array = np.full(
+            (sat_count, len(SAT_NEIGHBOR_DIRECTION_LIST)), inf, dtype=np.float64
+        )
+        self.access_sat_index_array = np.full(self.facility_count, -1, dtype=np.int32)
+        self.access_delay_array = np.full(self.facility_count, inf, dtype=np.float64)
+        self.reset_ground_neighbor_index()
+
+    def get_node_index(self, node_name):
+        return self.node_index_dict[node_name]
+
+    def reset_ground_neighbor_index(self):
+        """
+        Drop the inverse index of the access satellites, it is rebuilt on the next read of the ground neighbors.
+        """
+        # Facility indices sorted by access satellite, and the (S + 1,) offsets of the facilities of every satellite in it
+        self.ground_facility_index_array = None
+        self.ground_facility_offset_array = None
+
+    def get_ground_facility_indices(self, sat_index):
+        """
+        Return the indices of the facilities accessing the satellite in ascending order,
+        the inverse index is built with one sort per update of the access satellites instead of one scan per satellite.
+        """
+        if self.ground_facility_index_array is None:
+            self.ground_facility_index_array = np.argsort(
+                self.access_sat_index_array, kind="stable"
+            )
+            self.ground_facility_offset_array = np.searchsorted(
+                self.access_sat_index_array[self.ground_facility_index_array],
+                np.arange(self.sat_count + 1),
+            )
+        start, end = self.ground_facility_offset_array[sat_index : sat_index + 2]
+        return self.ground_facility_index_array[start:end]
+
+    def get_node_dict(self):
+        """
+        Return {node name: SatNode or FacilityNode} views of all nodes, they stay valid across updates of the store.
+        """
+        return {
+            node_name: (
+                SatNode(self, node_index)
+                if node_index < self.sat_count
+                else FacilityNode(self, node_index)
+            )
+            for node_index, node_name in enumerate(self.node_list)
+        }
+
+    def copy(self):
+        """
+        Return a snapshot of the store, copying only the four arrays, the node names are shared.
+        """
+        node_store = NodeStore.__new__(NodeStore)
+        node_store.node_list = self.node_list
+        node_store.node_index_dict = self.node_index_dict
+        node_store.sat_count = self.sat_count
+        node_store.facility_count = self.facility_count
+        node_store.isl_neighbor_index_array = self.isl_neighbor_index_array.copy()
+        node_store.isl_neighbor_delay_array = self.isl_neighbor_delay_array.copy()
+        node_store.access_sat_index_array = self.access_sat_index_array.copy()
+        node_store.access_delay_array = self.access_delay_array.copy()
+        node_store.ground_facility_index_array = self.ground_facility_index_array
+        node_store.ground_facility_offset_array = self.ground_facility_offset_array
+        return node_store
+
+    def get_neighbor_dict(self):
+        """
+        Return information about adjacent nodes in the format specified in /doc/example.json.
+        """
+        node_list = self.node_list
+        neighbor_dict = {}
+        for sat_name, neighbor_index_row, neighbor_delay_row in zip(
+            node_list,
+            self.isl_neighbor_index_array.tolist(),
+            self.isl_neighbor_delay_array.tolist(),
+        ):
+            sat_neighbor_info = {}
+            for direction, neighbor_index, delay in zip(
+                SAT_NEIGHBOR_DIRECTION_LIST, neighbor_index_row, neighbor_delay_row
+            ):
+                sat_neighbor_info[direction + "_neighbor_info"] = (
+                    [node_list[neighbor_index], delay] if neighbor_index >= 0 else None
+                )
+            sat_neighbor_info["ground_neighbor_info"] = None
+            neighbor_dict[sat_name] = sat_neighbor_info
+        for facility_name, sat_index, delay in zip(
+            node_list[self.sat_count :],
+            self.access_sat_index_array.tolist(),
+            self.access_delay_array.tolist(),
+        ):
+            if sat_index < 0:
+                neighbor_dict[facility_name] = {"sat_neighbor_info": None}
+                continue
+            sat_name = node_list[sat_index]
+            neighbor_dict[facility_name] = {"sat_neighbor_info": (sat_name, delay)}
+            sat_neighbor_info = neighbor_dict[sat_name]
+            if sat_neighbor_info["ground_neighbor_info"] is None:
+                sat_neighbor_info["ground_neighbor_info"] = []
+            sat_neighbor_info["ground_neighbor_info"].append((facility_name, delay))
+        return neighbor_dict
@@ -0,0 +1,108 @@
+import numpy as np
+from sgp4.api import SatrecArray
+from skyfield.constants import DAY_S
+from skyfield.framelib import itrs
+from skyfield.functions import mxm
+from skyfield.sgp4lib import TEME
+
+
+class ConstellationPropagator:
+    """
+    Propagate all satellites of the constellation together through the array interface of SGP4.
+    """
+
+    def __init__(self, satellite_dict):
+        """
+        satellite_dict:
+            A dictionary where the key is the satellite name and the value is an EarthSatellite object.
+            The row order of every returned position array follows the key order of this dictionary.
+        """
+        self.satellite_name_list = list(satellite_dict)
+        self.satrec_list = [satellite.model for satellite in satellite_dict.values()]
+        self.satrec_array = SatrecArray(self.satrec_list)
+
+    def get_positions_km(self, skyfield_time):
+        """
+        Return the ITRS (Earth-fixed) Positions of All Satellites at the Reference Time as an (N, 3) Array, Unit: km
+        Distances between satellites do not depend on the frame, the ITRS frame is used so that the same array can be compared with ground facilities.
+        """
+        return self._rotate_teme_to_itrs(
+            self._propagate_teme_km(skyfield_time), skyfield_time
+        )[:, 0, :]
+
+    def get_positions_km_series(self, skyfield_time):
+        """
+        Return the ITRS Positions of All Satellites at Every Epoch of an Array Time as a (T, N, 3) Array, Unit: km
+        """
+        return np.swapaxes(
+            self._rotate_teme_to_itrs(
+                self._propagate_teme_km(skyfield_time), skyfield_time
+            ),
+            0,
+            1,
+        )
+
+    def get_positions_km_of_pairs(self, skyfield_time, sat_index_matrix):
+        """
+        Return the ITRS Positions of the Satellites sat_index_matrix[k] at the Epoch k of an Array Time as a (K, C, 3) Array, Unit: km
+        Every satellite is only propagated at the epochs of its own rows instead of at all epochs, -1 entries of sat_index_matrix are padding and give NaN.
+        """
+        jd, fraction = self._get_jd_and_fraction(skyfield_time)
+        positions = np.full(sat_index_matrix.shape + (3,), np.nan)
+        epoch_indices, column_indices = np.nonzero(sat_index_matrix >= 0)
+        sat_indices = sat_index_matrix[epoch_indices, column_indices]
+        order = np.argsort(sat_indices, kind="stable")
+        group_sat_indices, group_starts = np.unique(
+            sat_indices[order], return_index=True
+        )
+        for sat_index, group_start, group_end in zip(
+            group_sat_indices.tolist(),
+            group_starts.tolist(),
+            group_starts[1:].tolist() + [len(order)],
+        ):
+            group = order[group_start:group_end]
+            _, positions[epoch_indices[group], column_indices[group]], _ = (
+                self.satrec_list[sat_index].sgp4_array(
+                    jd[epoch_indices[group]], fraction[epoch_indices[group]]
+                )
+            )
+        return np.einsum(
+            "ijk,kcj->kci", self._get_teme_to_itrs_matrices(skyfield_time), positions
+        )
+
+    def _propagate_teme_km(self, skyfield_time):
+        """
+        Run SGP4 for all satellites and all epochs of skyfield_time in a single call.
+        Return an (N, T, 3) array; T is 1 when skyfield_time is a scalar time.
+        The TLE epoch is treated as UTC, in the same way as EarthSatellite.at().
+        """
+        _, positions, _ = self.satrec_array.sgp4(
+            *self._get_jd_and_fraction(skyfield_time)
+        )
+        return positions
+
+    def _get_jd_and_fraction(self, skyfield_time):
+        """
+        Return the (T,) whole and fractional Julian dates of skyfield_time as taken by SGP4.
+        """
+        jd = np.atleast_1d(skyfield_time.whole).astype(np.float64)
+        fraction = np.atleast_1d(
+            skyfield_time.tai_fraction - skyfield_time._leap_seconds() / DAY_S
+        ).astype(np.float64)
+        return jd, fraction
+
+    def _rotate_teme_to_itrs(self, positions, skyfield_time):
+        """
+        Rotate an (N, T, 3) TEME array into the ITRS frame, using the same frame rotations as Skyfield.
+        """
+        return np.einsum(
+            "ijt,ntj->nti", self._get_teme_to_itrs_matrices(skyfield_time), positions
+        )
+
+    def _get_teme_to_itrs_matrices(self, skyfield_time):
+        """
+        Return the (3, 3, T) rotations from TEME to ITRS at every epoch of skyfield_time.
+        """
+        teme_to_gcrs = np.swapaxes(TEME.rotation_at(skyfield_time), 0, 1)
+        teme_to_itrs = mxm(itrs.rotation_at(skyfield_time), teme_to_gcrs)
+        return teme_to_itrs.reshape(3, 3, -1)
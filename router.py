@@ -1,5 +1,17 @@
-import copy
+import multiprocessing
+import os
+import weakref
 from abc import abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from math import inf
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra, floyd_warshall
+
+# Trees repaired together, bounds the (chunk, edge) temporary arrays
+INCREMENTAL_REPAIR_CHUNK_SIZE = 256
 
 
 class Router:
@@ -24,8 +36,8 @@ class Router:
         try:
             self._validate_adj_list_and_matrix(adj_list, adj_matrix)
             self.node_count = len(adj_list)
-            self.adj_list = copy.deepcopy(adj_list)
-            self.adj_matrix = copy.deepcopy(adj_matrix)
+            self.adj_list = [list(row) for row in adj_list]
+            self.adj_matrix = [list(row) for row in adj_matrix]
             self.predecessor_matrix = [
                 [-1] * self.node_count for _ in range(self.node_count)
             ]
@@ -41,7 +53,7 @@ class Router:
             isinstance(row, list) for row in adj_list
         ):
             raise ValueError("adj_list must be a 2D array (list of lists).")
-        self.adj_list = copy.deepcopy(adj_list)
+        self.adj_list = [list(row) for row in adj_list]
 
     def modify_adj_matrix(self, adj_matrix: list):
         if len(adj_matrix) != self.node_count:
@@ -58,7 +70,8 @@ class Router:
                 "Each row in adj_matrix must have the same length as the number of columns."
             )
 
-        self.adj_matrix = copy.deepcopy(adj_matrix)
+        # FloydRouter writes the distances into adj_matrix, the rows are copied so the caller's matrix is left untouched
+        self.adj_matrix = [list(row) for row in adj_matrix]
 
     def modify_adj_list_and_matrix(self, adj_list: list, adj_matrix: list):
         self.modify_adj_list(adj_list)
@@ -95,9 +108,26 @@ class Router:
     def get_next_from_src_to_all(self, src):
         nexts = {}
         for i in range(self.node_count):
-            nexts[i] = self.predecessor_matrix[src][i]
+            nexts[i] = self.get_next_from_src_to_dst(src, i)
         return nexts
 
+    def get_next_hops_from_src(self, src):
+        """
+        Return the next hops from src to all nodes as an int32 array of length node_count, -1 for unreachable nodes.
+        """
+        return np.array(self.predecessor_matrix[src], dtype=np.int32)
+
+    def iter_next_hops(self, src_list=None):
+        """
+        Yield (src, dst, next_hop) for every reachable dst != src, for all sources or only those in src_list.
+        """
+        if src_list is None:
+            src_list = range(self.node_count)
+        for src in src_list:
+            for dst, next_hop in enumerate(self.get_next_hops_from_src(src).tolist()):
+                if dst != src and next_hop != -1:
+                    yield src, dst, next_hop
+
     def get_distance_from_src_to_dst(self, src, dst):
         return self.adj_matrix[src][dst]
 
@@ -108,19 +138,30 @@ class Router:
         return distances
 
     def get_path_from_src_to_dst(self, src, dst):
+        """
+        Return the node indexes on the path from src to dst, or an empty list if dst is unreachable.
+        """
         path = []
         node = src
         while node != dst:
             path.append(node)
             node = self.get_next_from_src_to_dst(node, dst)
+            if node == -1:
+                return []
         path.append(dst)
         return path
 
     def get_path_from_src_to_all(self, src):
-        paths = {}
-        for i in range(self.node_count):
-            paths[i] = self.get_path_from_src_to_dst(src, i)
-        return paths
+        return dict(self.iter_paths_from_src(src))
+
+    def iter_paths_from_src(self, src, dst_list=None):
+        """
+        Yield (dst, path) from src to every node, or only to those in dst_list, each path is only walked when it is reached.
+        """
+        if dst_list is None:
+            dst_list = range(self.node_count)
+        for dst in dst_list:
+            yield dst, self.get_path_from_src_to_dst(src, dst)
 
     def _validate_adj_list_and_matrix(self, adj_list, adj_matrix):
         if not (
@@ -152,9 +193,10 @@ class FloydRouter(Router):
             self.predecessor_matrix[i][i] = i
             for neighbor in self.adj_list[i]:
                 self.predecessor_matrix[i][neighbor] = neighbor
-        for i in range(self.node_count):
-            for j in range(self.node_count):
-                for k in range(self.node_count):
+        # k must be the outermost loop, otherwise paths through several intermediate nodes may be missed
+        for k in range(self.node_count):
+            for i in range(self.node_count):
+                for j in range(self.node_count):
                     if (
                         self.adj_matrix[i][k] + self.adj_matrix[k][j]
                         < self.adj_matrix[i][j]
@@ -163,3 +205,640 @@ class FloydRouter(Router):
                             self.adj_matrix[i][k] + self.adj_matrix[k][j]
                         )
                         self.predecessor_matrix[i][j] = self.predecessor_matrix[i][k]
+
+
+class ArrayRouter(Router):
+    """
+    Base class of routers whose tables are contiguous arrays: a float64 distance matrix (adj_matrix after calculation) and an int32 next-hop matrix.
+    adj_matrix may be passed as a list of lists or as a float64 ndarray.
+    Between calculations the weights can be handed over without any copy through set_weight_buffer.
+    """
+
+    def __init__(self, adj_list, adj_matrix):
+        if isinstance(adj_matrix, np.ndarray):
+            if len(adj_list) != len(adj_matrix):
+                raise ValueError(
+                    "The lengths of adj_list and adj_matrix must be the same."
+                )
+            self._validate_weight_buffer(adj_matrix, len(adj_list))
+        else:
+            self._validate_adj_list_and_matrix(adj_list, adj_matrix)
+        self.node_count = len(adj_list)
+        # Shape of the last buffer passed to set_weight_buffer, a buffer is only validated when its shape differs
+        self.weight_buffer_shape = None
+        self.modify_adj_list(adj_list)
+        self.modify_adj_matrix(adj_matrix)
+        self.reset_predecessor_matrix()
+
+    def set_weight_buffer(self, weight_buffer):
+        """
+        Use weight_buffer, a float64 (node_count, node_count) ndarray with inf where there is no link, as the weights of the next calculation.
+        The buffer is not copied and the adjacency is derived from its finite non-zero entries, no adj_list is needed.
+        The caller owns the buffer and must not modify it until the next calculation is done: Topology alternates between two buffers,
+        so the weights of the previous tick stay readable while the next tick is written.
+        The result matrices are reused, every calculation overwrites all their rows.
+        """
+        if weight_buffer.shape != self.weight_buffer_shape:
+            self._validate_weight_buffer(weight_buffer, self.node_count)
+            self.weight_buffer_shape = weight_buffer.shape
+        self._apply_weight_buffer(weight_buffer)
+
+    @abstractmethod
+    def _apply_weight_buffer(self, weight_buffer):
+        pass
+
+    def _validate_weight_buffer(self, weight_buffer, node_count):
+        if weight_buffer.shape != (node_count, node_count):
+            raise ValueError(
+                f"The weight buffer must have the shape ({node_count}, {node_count})."
+            )
+        if weight_buffer.dtype != np.float64:
+            raise ValueError("The weight buffer must be a float64 array.")
+
+    def reset_predecessor_matrix(self):
+        self.predecessor_matrix = np.full(
+            (self.node_count, self.node_count), -1, dtype=np.int32
+        )
+
+    def get_next_from_src_to_dst(self, src, dst):
+        return int(self.predecessor_matrix[src, dst])
+
+    def get_next_hops_from_src(self, src):
+        return self.predecessor_matrix[src].copy()
+
+    def get_distance_from_src_to_dst(self, src, dst):
+        return float(self.adj_matrix[src, dst])
+
+
+class ArrayFloydRouter(ArrayRouter):
+    """
+    Floyd-Warshall router backed by contiguous arrays.
+    The all-pairs computation runs in compiled code (scipy.sparse.csgraph) instead of a pure-Python triple loop.
+    """
+
+    def modify_adj_matrix(self, adj_matrix):
+        adj_matrix = np.array(adj_matrix, dtype=np.float64)
+        if adj_matrix.shape != (self.node_count, self.node_count):
+            raise ValueError(
+                "The shape of the new adj_matrix must be the same as the old one."
+            )
+        self.adj_matrix = adj_matrix
+
+    def _apply_weight_buffer(self, weight_buffer):
+        """
+        floyd_warshall does not write into its input, the buffer is referenced until the calculation replaces it with the distances.
+        """
+        self.adj_matrix = weight_buffer
+
+    def calculate_adj_matrix_and_predecessor_matrix(self):
+        distance_matrix, predecessor_matrix = floyd_warshall(
+            self.adj_matrix, directed=False, return_predecessors=True
+        )
+        self.adj_matrix = distance_matrix
+        self.predecessor_matrix = _get_next_matrix_from_predecessor_matrix(
+            predecessor_matrix
+        )
+
+
+class DijkstraRouter(ArrayRouter):
+    """
+    Router running the binary-heap Dijkstra of scipy.sparse.csgraph from every source over a CSR adjacency, O(n * m * log(n)) instead of O(n^3).
+    The dense adj_matrix passed in is only read to fill the CSR weights, adj_matrix holds the distance matrix after calculation.
+    """
+
+    def modify_adj_matrix(self, adj_matrix):
+        """
+        Build the CSR adjacency (csr_indptr, csr_indices, csr_weights) from adj_list and the weights in adj_matrix.
+        """
+        if len(adj_matrix) != self.node_count:
+            raise ValueError(
+                "The length of the new adj_matrix must be the same as the old one."
+            )
+        self._set_csr(
+            self.adj_list,
+            [[adj_matrix[i][j] for j in row] for i, row in enumerate(self.adj_list)],
+        )
+
+    def _apply_weight_buffer(self, weight_buffer):
+        """
+        Build the CSR adjacency from the finite non-zero weights of the buffer with vectorized numpy operations.
+        """
+        row_indices, col_indices = np.nonzero(
+            (weight_buffer != 0) & (weight_buffer != inf)
+        )
+        self.csr_indptr = np.zeros(self.node_count + 1, dtype=np.int32)
+        np.cumsum(
+            np.bincount(row_indices, minlength=self.node_count),
+            out=self.csr_indptr[1:],
+        )
+        self.csr_indices = col_indices.astype(np.int32)
+        self.csr_weights = weight_buffer[row_indices, col_indices]
+
+    def _set_csr(self, adj_list, weight_list):
+        """
+        Fill the CSR arrays, weight_list has the same shape as adj_list and holds the weight of every adjacency.
+        """
+        edge_count = sum(len(row) for row in adj_list)
+        self.csr_indptr = np.zeros(self.node_count + 1, dtype=np.int32)
+        self.csr_indptr[1:] = np.cumsum([len(row) for row in adj_list])
+        self.csr_indices = np.fromiter(
+            (j for row in adj_list for j in row), dtype=np.int32, count=edge_count
+        )
+        self.csr_weights = np.fromiter(
+            (weight for row in weight_list for weight in row),
+            dtype=np.float64,
+            count=edge_count,
+        )
+
+    def reset_predecessor_matrix(self):
+        super().reset_predecessor_matrix()
+        self.adj_matrix = np.full((self.node_count, self.node_count), inf)
+        np.fill_diagonal(self.adj_matrix, 0)
+
+    def calculate_adj_matrix_and_predecessor_matrix(self):
+        """
+        Run the Dijkstra of scipy.sparse.csgraph from all sources over the CSR adjacency.
+        """
+        distance_matrix, predecessor_matrix = dijkstra(
+            csr_matrix(
+                (self.csr_weights, self.csr_indices, self.csr_indptr),
+                shape=(self.node_count, self.node_count),
+            ),
+            directed=False,
+            return_predecessors=True,
+        )
+        self.adj_matrix = distance_matrix
+        self.predecessor_matrix = _get_next_matrix_from_predecessor_matrix(
+            predecessor_matrix
+        )
+
+    def print_adj_list(self):
+        print("Router.adj_list (CSR):")
+        for i in range(self.node_count):
+            start, end = self.csr_indptr[i], self.csr_indptr[i + 1]
+            print(
+                i,
+                ": ",
+                list(
+                    zip(
+                        self.csr_indices[start:end].tolist(),
+                        self.csr_weights[start:end].tolist(),
+                    )
+                ),
+            )
+
+
+class IncrementalDijkstraRouter(DijkstraRouter):
+    """
+    Dijkstra router keeping one shortest-path tree per destination across updates, the next hop from src to dst is the parent of src
+    in the tree of dst, so every node forwards along the same tree and the routes stay loop-free even when the trees are not exactly shortest.
+    After weight changes the kept trees are repaired in place instead of being rerun.
+    Only the trees of the nodes left with at most one edge (e.g. a ground facility changing its access satellite) are rerun.
+
+    weight_tolerance:
+        A path of a kept tree is only replaced by a path shorter by more than this value, unit: same as the weights.
+        With the default 0 every route is a shortest one. The ISL delays drift every tick and the paths of a satellite grid are nearly tied,
+        so a positive value keeps next hops from flipping between nearly equal paths, at the cost of routes up to this value per hop longer than the shortest.
+        Every weight change is applied, the distances stay exact for the kept paths.
+    """
+
+    def __init__(self, adj_list, adj_matrix, weight_tolerance=0.0):
+        self.weight_tolerance = weight_tolerance
+        super().__init__(adj_list, adj_matrix)
+
+    def modify_adj_matrix(self, adj_matrix):
+        """
+        Replace all weights, every shortest-path tree is recomputed by the next calculation.
+        """
+        if len(adj_matrix) != self.node_count:
+            raise ValueError(
+                "The length of the new adj_matrix must be the same as the old one."
+            )
+        self.edge_weight_dict = self._get_edge_weight_dict(self.adj_list, adj_matrix)
+        self._rebuild_csr_from_edge_weight_dict()
+        self.affected_root_mask = np.ones(self.node_count, dtype=bool)
+
+    def modify_adj_list_and_matrix(self, adj_list, adj_matrix):
+        """
+        Diff the new adjacency against the applied weights and only apply the changed edges.
+        """
+        if len(adj_list) != self.node_count or len(adj_matrix) != self.node_count:
+            raise ValueError(
+                "The length of the new adj_list and adj_matrix must be the same as the old one."
+            )
+        self._apply_edge_weight_dict(self._get_edge_weight_dict(adj_list, adj_matrix))
+
+    def _apply_weight_buffer(self, weight_buffer):
+        """
+        Diff the finite non-zero weights of the buffer against the applied weights and only apply the changed edges.
+        """
+        u_indices, v_indices = np.nonzero(
+            np.triu((weight_buffer != 0) & (weight_buffer != inf), 1)
+        )
+        self._apply_edge_weight_dict(
+            dict(
+                zip(
+                    zip(u_indices.tolist(), v_indices.tolist()),
+                    weight_buffer[u_indices, v_indices].tolist(),
+                )
+            )
+        )
+
+    def _apply_edge_weight_dict(self, new_edge_weight_dict):
+        """
+        Apply the undirected edges {(u, v): weight} with u < v that replace all current edges.
+        """
+        edge_changes = [
+            (u, v, weight)
+            for (u, v), weight in new_edge_weight_dict.items()
+            if self.edge_weight_dict.get((u, v)) != weight
+        ]
+        edge_changes += [
+            (u, v, inf)
+            for (u, v) in self.edge_weight_dict
+            if (u, v) not in new_edge_weight_dict
+        ]
+        self.modify_edge_weights(edge_changes)
+
+    def modify_edge_weights(self, edge_changes):
+        """
+        Apply a list of undirected edge changes (u, v, weight) since the previous update, weight inf removes the edge.
+        The kept shortest-path trees are repaired from the new weights by the next calculation,
+        only the trees of the nodes left with at most one edge (e.g. a ground facility changing its access satellite) are rerun.
+        """
+        structure_changed_node_set = set()
+        for u, v, weight in edge_changes:
+            u, v = min(u, v), max(u, v)
+            old_weight = self.edge_weight_dict.get((u, v), inf)
+            if old_weight == weight:
+                continue
+            self.weight_changed = True
+            if weight == inf:
+                del self.edge_weight_dict[(u, v)]
+                structure_changed_node_set.update((u, v))
+            elif old_weight == inf:
+                self.edge_weight_dict[(u, v)] = weight
+                structure_changed_node_set.update((u, v))
+            else:
+                self.edge_weight_dict[(u, v)] = weight
+                self.csr_weights[self.csr_position_dict[(u, v)]] = weight
+                self.csr_weights[self.csr_position_dict[(v, u)]] = weight
+        if not structure_changed_node_set:
+            return
+
+        self._rebuild_csr_from_edge_weight_dict()
+        structure_changed_node_array = np.array(
+            sorted(structure_changed_node_set), dtype=np.int64
+        )
+        degree_array = np.diff(self.csr_indptr)
+        self.affected_root_mask[
+            structure_changed_node_array[
+                degree_array[structure_changed_node_array] <= 1
+            ]
+        ] = True
+
+    def reset_predecessor_matrix(self):
+        super().reset_predecessor_matrix()
+        # Row r is the tree rooted at r: parent of every node (r is its own parent, -1 if unreachable)
+        self.parent_matrix = np.full(
+            (self.node_count, self.node_count), -1, dtype=np.int32
+        )
+        self.affected_root_mask = np.ones(self.node_count, dtype=bool)
+        # Whether any weight changed since the last calculation, the kept trees are then repaired
+        self.weight_changed = False
+        # Number of shortest-path trees rerun from scratch by the last calculation
+        self.recalculated_tree_count = 0
+
+    def calculate_adj_matrix_and_predecessor_matrix(self):
+        """
+        Repair the kept shortest-path trees and rerun the trees of the affected roots.
+        """
+        root_array = np.flatnonzero(~self.affected_root_mask)
+        if self.weight_changed and len(root_array):
+            weight_matrix = np.full((self.node_count, self.node_count), inf)
+            np.fill_diagonal(weight_matrix, 0)
+            weight_matrix[self.csr_tail_array, self.csr_indices] = self.csr_weights
+            for chunk_start in range(0, len(root_array), INCREMENTAL_REPAIR_CHUNK_SIZE):
+                chunk_root_array = root_array[
+                    chunk_start : chunk_start + INCREMENTAL_REPAIR_CHUNK_SIZE
+                ]
+                distance_matrix, parent_matrix = self._repair_trees(
+                    self.parent_matrix[chunk_root_array], weight_matrix
+                )
+                self._set_trees(chunk_root_array, distance_matrix, parent_matrix)
+
+        root_array = np.flatnonzero(self.affected_root_mask)
+        self.recalculated_tree_count = len(root_array)
+        if len(root_array):
+            distance_matrix, parent_matrix = dijkstra(
+                csr_matrix(
+                    (self.csr_weights, self.csr_indices, self.csr_indptr),
+                    shape=(self.node_count, self.node_count),
+                ),
+                directed=False,
+                indices=root_array,
+                return_predecessors=True,
+            )
+            parent_matrix[parent_matrix < 0] = -1
+            parent_matrix[np.arange(len(root_array)), root_array] = root_array
+            self._set_trees(root_array, distance_matrix, parent_matrix)
+        self.affected_root_mask[:] = False
+        self.weight_changed = False
+
+    def _repair_trees(self, parent_matrix, weight_matrix):
+        """
+        Return the shortest distances and parents of the (K, N) trees for the current weights.
+        The distances along the old parents are upper bounds of the shortest ones, they are lowered by relaxing
+        every edge once and then only the edges leaving the nodes improved by the previous round (Bellman-Ford starting from the old trees),
+        so the work after the first round is proportional to the paths that really change.
+        A distance is only lowered by more than weight_tolerance, a lost tree edge (infinite distance) is always replaced.
+        """
+        distance_matrix = _get_tree_distance_matrix(parent_matrix, weight_matrix)
+        parent_matrix = parent_matrix.copy()
+        degree_array = np.diff(self.csr_indptr)
+        row_array, edge_array = np.nonzero(
+            distance_matrix[:, self.csr_tail_array] + self.csr_weights
+            < distance_matrix[:, self.csr_indices] - self.weight_tolerance
+        )
+        while len(row_array):
+            tail_array = self.csr_tail_array[edge_array]
+            head_array = self.csr_indices[edge_array]
+            candidates = (
+                distance_matrix[row_array, tail_array] + self.csr_weights[edge_array]
+            )
+            improved = (
+                candidates
+                < distance_matrix[row_array, head_array] - self.weight_tolerance
+            )
+            if not improved.any():
+                break
+            # Written from the largest to the smallest candidate, the smallest one of every node is kept
+            order = np.flatnonzero(improved)[
+                np.argsort(-candidates[improved], kind="stable")
+            ]
+            distance_matrix[row_array[order], head_array[order]] = candidates[order]
+            parent_matrix[row_array[order], head_array[order]] = tail_array[order]
+
+            improved_row_array, improved_node_array = np.unique(
+                np.stack([row_array[order], head_array[order]]), axis=1
+            )
+            improved_degree_array = degree_array[improved_node_array]
+            row_array = np.repeat(improved_row_array, improved_degree_array)
+            edge_array = (
+                np.arange(len(row_array))
+                - np.repeat(
+                    np.cumsum(improved_degree_array) - improved_degree_array,
+                    improved_degree_array,
+                )
+                + np.repeat(self.csr_indptr[improved_node_array], improved_degree_array)
+            )
+        parent_matrix[distance_matrix == inf] = -1
+        return distance_matrix, parent_matrix
+
+    def _set_trees(self, root_array, distance_matrix, parent_matrix):
+        """
+        Store the trees of the roots as the columns of their destinations.
+        """
+        self.adj_matrix[:, root_array] = distance_matrix.T
+        self.predecessor_matrix[:, root_array] = parent_matrix.T
+        self.parent_matrix[root_array] = parent_matrix
+
+    def _get_edge_weight_dict(self, adj_list, adj_matrix):
+        """
+        Return the undirected edges as a dictionary {(u, v): weight} with u < v.
+        """
+        return {
+            (i, j): adj_matrix[i][j]
+            for i, row in enumerate(adj_list)
+            for j in row
+            if i < j
+        }
+
+    def _rebuild_csr_from_edge_weight_dict(self):
+        adj_list = [[] for _ in range(self.node_count)]
+        weight_list = [[] for _ in range(self.node_count)]
+        for (u, v), weight in self.edge_weight_dict.items():
+            adj_list[u].append(v)
+            weight_list[u].append(weight)
+            adj_list[v].append(u)
+            weight_list[v].append(weight)
+        self.adj_list = adj_list
+        self._set_csr(adj_list, weight_list)
+        self.csr_position_dict = {}
+        position = 0
+        for u, row in enumerate(adj_list):
+            for v in row:
+                self.csr_position_dict[(u, v)] = position
+                position += 1
+        self.csr_tail_array = np.repeat(
+            np.arange(self.node_count), np.diff(self.csr_indptr)
+        )
+
+
+class ParallelDijkstraRouter(DijkstraRouter):
+    """
+    Dijkstra router splitting the destination trees across worker processes, every worker runs the Dijkstra of scipy.sparse.csgraph
+    from its own range of nodes. The CSR adjacency and the result matrices live in shared memory blocks created once:
+    workers attach to them by name and write their columns of the next-hop matrix and rows of the distance matrix in place, no result is pickled.
+
+    worker_count:
+        Number of worker processes, defaults to the number of CPUs.
+    """
+
+    def __init__(self, adj_list, adj_matrix, worker_count=None):
+        self.worker_count = worker_count or os.cpu_count()
+        node_count = len(adj_list)
+        self.next_hop_shm = SharedMemory(
+            create=True, size=max(node_count * node_count * 4, 1)
+        )
+        self.distance_shm = SharedMemory(
+            create=True, size=max(node_count * node_count * 8, 1)
+        )
+        self.csr_indptr_shm = SharedMemory(create=True, size=(node_count + 1) * 4)
+        # The CSR edge blocks are created on the first calculation and only replaced when the edges outgrow them
+        self.csr_edge_capacity = 0
+        self.csr_indices_shm = None
+        self.csr_weights_shm = None
+        # Workers are spawned rather than forked, the controller process also runs SSH threads
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.worker_count,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        self.shm_list = [self.next_hop_shm, self.distance_shm, self.csr_indptr_shm]
+        self._finalizer = weakref.finalize(
+            self,
+            _release_parallel_router_resources,
+            self.executor,
+            self.shm_list,
+        )
+        super().__init__(adj_list, adj_matrix)
+
+    def reset_predecessor_matrix(self):
+        """
+        The matrices are views of the shared memory, they are reset in place.
+        """
+        shape = (self.node_count, self.node_count)
+        self.predecessor_matrix = np.ndarray(
+            shape, dtype=np.int32, buffer=self.next_hop_shm.buf
+        )
+        self.adj_matrix = np.ndarray(
+            shape, dtype=np.float64, buffer=self.distance_shm.buf
+        )
+        self.predecessor_matrix[...] = -1
+        self.adj_matrix[...] = inf
+        np.fill_diagonal(self.adj_matrix, 0)
+
+    def calculate_adj_matrix_and_predecessor_matrix(self):
+        edge_count = len(self.csr_indices)
+        self._share_csr(edge_count)
+        csr_spec = (
+            self.csr_indptr_shm.name,
+            self.csr_indices_shm.name,
+            self.csr_weights_shm.name,
+            edge_count,
+        )
+        result_spec = (
+            self.node_count,
+            self.next_hop_shm.name,
+            self.distance_shm.name,
+        )
+        futures = [
+            self.executor.submit(
+                _calculate_dijkstra_trees,
+                csr_spec,
+                result_spec,
+                root_chunk[0],
+                root_chunk[-1] + 1,
+            )
+            for root_chunk in np.array_split(
+                np.arange(self.node_count), self.worker_count
+            )
+            if len(root_chunk)
+        ]
+        for future in futures:
+            future.result()
+
+    def _share_csr(self, edge_count):
+        """
+        Copy the CSR arrays into the shared blocks, the edge blocks are replaced with twice the room only when the edges no longer fit.
+        """
+        if edge_count > self.csr_edge_capacity:
+            for shm in (self.csr_indices_shm, self.csr_weights_shm):
+                if shm is not None:
+                    self.shm_list.remove(shm)
+                    shm.close()
+                    shm.unlink()
+            self.csr_edge_capacity = max(edge_count * 2, 1)
+            self.csr_indices_shm = SharedMemory(
+                create=True, size=self.csr_edge_capacity * 4
+            )
+            self.csr_weights_shm = SharedMemory(
+                create=True, size=self.csr_edge_capacity * 8
+            )
+            self.shm_list += [self.csr_indices_shm, self.csr_weights_shm]
+        for shm, array, dtype in (
+            (self.csr_indptr_shm, self.csr_indptr, np.int32),
+            (self.csr_indices_shm, self.csr_indices, np.int32),
+            (self.csr_weights_shm, self.csr_weights, np.float64),
+        ):
+            np.ndarray(len(array), dtype=dtype, buffer=shm.buf)[...] = array
+
+    def close(self):
+        """
+        Stop the worker processes and release the shared memory.
+        """
+        self.predecessor_matrix = np.array(self.predecessor_matrix)
+        self.adj_matrix = np.array(self.adj_matrix)
+        self._finalizer()
+
+
+def _get_next_matrix_from_predecessor_matrix(predecessor_matrix):
+    """
+    scipy returns the previous node on the path from i to j, the graph is undirected,
+    so the next node on the path from i to j is the previous node on the path from j to i.
+    """
+    next_matrix = np.ascontiguousarray(predecessor_matrix.T, dtype=np.int32)
+    next_matrix[next_matrix < 0] = -1
+    np.fill_diagonal(next_matrix, np.arange(len(next_matrix), dtype=np.int32))
+    return next_matrix
+
+
+def _get_tree_distance_matrix(parent_matrix, weight_matrix):
+    """
+    Return the distances from the roots of the trees given by the (K, N) parent matrix (root: its own parent, -1: unreachable),
+    summed along the parents by pointer doubling, weight_matrix is the dense (N, N) edge weight matrix.
+    """
+    col_array = np.arange(parent_matrix.shape[1])
+    reachable_mask = parent_matrix >= 0
+    ancestor_matrix = np.where(reachable_mask, parent_matrix, col_array)
+    distance_matrix = weight_matrix[ancestor_matrix, col_array]
+    while True:
+        next_ancestor_matrix = np.take_along_axis(ancestor_matrix, ancestor_matrix, 1)
+        if np.array_equal(next_ancestor_matrix, ancestor_matrix):
+            break
+        distance_matrix = distance_matrix + np.take_along_axis(
+            distance_matrix, ancestor_matrix, 1
+        )
+        ancestor_matrix = next_ancestor_matrix
+    distance_matrix[~reachable_mask] = inf
+    return distance_matrix
+
+
+def _calculate_dijkstra_trees(csr_spec, result_spec, root_start, root_end):
+    """
+    Worker of ParallelDijkstraRouter: run the Dijkstra of scipy.sparse.csgraph from the roots [root_start, root_end) over the shared CSR adjacency.
+    The graph is undirected, so the predecessor of a node in the tree of a root is its next hop towards the root:
+    the trees fill the columns [root_start, root_end) of the shared next-hop matrix and the rows of the shared distance matrix.
+    """
+    indptr_shm_name, indices_shm_name, weights_shm_name, edge_count = csr_spec
+    node_count, next_hop_shm_name, distance_shm_name = result_spec
+    shm_list = []
+    try:
+        for shm_name in (
+            indptr_shm_name,
+            indices_shm_name,
+            weights_shm_name,
+            next_hop_shm_name,
+            distance_shm_name,
+        ):
+            shm_list.append(SharedMemory(name=shm_name))
+        indptr_shm, indices_shm, weights_shm, next_hop_shm, distance_shm = shm_list
+        csr = csr_matrix(
+            (
+                np.ndarray(edge_count, dtype=np.float64, buffer=weights_shm.buf),
+                np.ndarray(edge_count, dtype=np.int32, buffer=indices_shm.buf),
+                np.ndarray(node_count + 1, dtype=np.int32, buffer=indptr_shm.buf),
+            ),
+            shape=(node_count, node_count),
+        )
+        distance_matrix, predecessor_matrix = dijkstra(
+            csr,
+            directed=False,
+            indices=np.arange(root_start, root_end),
+            return_predecessors=True,
+        )
+        del csr
+        predecessor_matrix[predecessor_matrix < 0] = -1
+        predecessor_matrix[
+            np.arange(root_end - root_start), np.arange(root_start, root_end)
+        ] = np.arange(root_start, root_end)
+        np.ndarray((node_count, node_count), dtype=np.int32, buffer=next_hop_shm.buf)[
+            :, root_start:root_end
+        ] = predecessor_matrix.T
+        np.ndarray((node_count, node_count), dtype=np.float64, buffer=distance_shm.buf)[
+            root_start:root_end
+        ] = distance_matrix
+    finally:
+        for shm in shm_list:
+            shm.close()
+
+
+def _release_parallel_router_resources(executor, shm_list):
+    executor.shutdown()
+    for shm in shm_list:
+        try:
+            shm.close()
+        except BufferError:
+            # The router still exposes views of the block at interpreter exit, unlinking is enough
+            pass
+        shm.unlink()
@@ -0,0 +1,113 @@
+import sys
+import os
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+from skyfield.api import load
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from access_selector import AccessSelector
+
+# Elevation Offset Around the Boundary of the Visibility Cone, Unit: degrees
+ELEVATION_EDGE_OFFSET = 1e-3
+
+
+def get_elevations_and_distances(topology, skyfield_time):
+    """
+    Return the (F, N) elevations (degrees) and distances (km) of every facility and satellite pair through Skyfield altaz,
+    the per-pair computation the access selection used to scan.
+    """
+    elevations = np.array(
+        [
+            [
+                topology.get_elevation_between_facility_and_satellite(
+                    facility_name, sat_name, skyfield_time
+                )
+                for sat_name in topology.satellite_dict
+            ]
+            for facility_name in topology.facility_dict
+        ]
+    )
+    distances = np.array(
+        [
+            [
+                topology.get_distance_between_facility_and_satellite(
+                    facility_name, sat_name, skyfield_time
+                )
+                for sat_name in topology.satellite_dict
+            ]
+            for facility_name in topology.facility_dict
+        ]
+    )
+    return elevations, distances
+
+
+def scan_access_satellites(elevations, distances, min_elevation):
+    """
+    Return the nearest satellite above min_elevation of every facility (-1 if none) by scanning all satellites.
+    """
+    visible_distances = np.where(elevations >= min_elevation, distances, np.inf)
+    nearest = np.argmin(visible_distances, axis=1)
+    return np.where(
+        np.isfinite(visible_distances[np.arange(len(nearest)), nearest]), nearest, -1
+    ).tolist()
+
+
+def test_access_selection_matches_elevation_scan(build_walker_delta_topology):
+    topology = build_walker_delta_topology(4, 5, 4)
+    ts = load.timescale()
+    start_utc_time = datetime(2025, 1, 1, 0, 10, 0, tzinfo=timezone.utc)
+    for minutes in (0, 17, 41):
+        skyfield_time = ts.from_datetime(start_utc_time + timedelta(minutes=minutes))
+        sat_positions = topology.propagator.get_positions_km(skyfield_time)
+        elevations, distances = get_elevations_and_distances(topology, skyfield_time)
+
+        for min_elevation in (0, 25):
+            access_selector = AccessSelector(topology.facility_dict, min_elevation)
+            sat_index_list, distance_list = access_selector.select_access_satellites(
+                sat_positions
+            )
+            expected_sat_index_list = scan_access_satellites(
+                elevations, distances, min_elevation
+            )
+            assert sat_index_list == expected_sat_index_list
+            for facility_index, sat_index in enumerate(sat_index_list):
+                if sat_index >= 0:
+                    assert distance_list[facility_index] == pytest.approx(
+                        distances[facility_index, sat_index], abs=1e-6
+                    )
+
+        # A satellite just above the minimum elevation is a candidate of the cone query, and is selected if it is the only one
+        for facility_index in range(len(topology.facility_dict)):
+            for sat_index in np.argsort(elevations[facility_index]).tolist():
+                access_selector = AccessSelector(
+                    topology.facility_dict,
+                    elevations[facility_index, sat_index] - ELEVATION_EDGE_OFFSET,
+                )
+                assert (
+                    sat_index
+                    in access_selector.get_candidate_index_lists(sat_positions)[
+                        facility_index
+                    ]
+                )
+            highest_sat_index = int(np.argmax(elevations[facility_index]))
+            for offset, expected_sat_index in (
+                (-ELEVATION_EDGE_OFFSET, highest_sat_index),
+                (ELEVATION_EDGE_OFFSET, -1),
+            ):
+                access_selector = AccessSelector(
+                    topology.facility_dict,
+                    elevations[facility_index, highest_sat_index] + offset,
+                )
+                assert (
+                    access_selector.select_access_satellites(sat_positions)[0][
+                        facility_index
+                    ]
+                    == expected_sat_index
+                )
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
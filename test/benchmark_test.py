@@ -0,0 +1,56 @@
+import sys
+import os
+import math
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmark import WalkerDeltaConstellation, write_facilities, run_benchmark
+from topology import Topology, SPEED_OF_LIGHT
+
+
+def test_synthesized_constellation_loads_into_topology(tmp_path):
+    constellation = WalkerDeltaConstellation(4, 5)
+    tles_filepath = str(tmp_path / "constellation.tle")
+    isls_filepath = str(tmp_path / "constellation.isls")
+    facilities_filepath = str(tmp_path / "facilities.json")
+    constellation.write_tles(tles_filepath)
+    constellation.write_isls(isls_filepath)
+    write_facilities(facilities_filepath, 3)
+    topology = Topology(tles_filepath, facilities_filepath, isls_filepath, "dijkstra")
+    assert len(topology.satellite_dict) == 20
+    assert len(topology.facility_dict) == 3
+    # Four ISLs per satellite, every undirected ISL appears twice in the ISLs file
+    assert len(topology.isl_list) == 80
+    assert len(topology.isl_edge_array) == 40
+    # Satellites of one circular plane are equally spaced: chord of 360 / 5 degrees at about 550 km
+    orbit_radius_km = 6378 + 550
+    expected_delay = (
+        2 * orbit_radius_km * math.sin(math.pi / 5) * 1000 / SPEED_OF_LIGHT * 1000
+    )
+    up_neighbor_name, up_delay = topology.node_dict["gemini-1"].up_neighbor_info
+    assert up_neighbor_name == "gemini-2"
+    assert abs(up_delay - expected_delay) / expected_delay < 0.02
+
+
+def test_benchmark_reports_every_stage():
+    result = run_benchmark(3, 3, facility_count=2, repeat=2)
+    assert result["sat_count"] == 9
+    assert [stage["stage"] for stage in result["stages"]] == [
+        "init",
+        "update_topology_by_time",
+        "get_neighbor_dict",
+        "get_all_pair_path_dict",
+        "all_pair_path_iteration",
+    ]
+    update_stage = result["stages"][1]
+    assert len(update_stage["wall_seconds"]) == 2
+    assert update_stage["peak_rss_bytes"] > 0
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    with tempfile.TemporaryDirectory() as dirpath:
+        test_synthesized_constellation_loads_into_topology(Path(dirpath))
+    test_benchmark_reports_every_stage()
@@ -0,0 +1,229 @@
+import sys
+import os
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import cluster_instance as cluster_instance_module
+from cluster_instance import ClusterInstance
+from cmd_batch import SEGMENT_MARKER
+from topology_snapshot import TopologySnapshot
+
+DATA_DIRPATH = os.path.join(os.path.dirname(__file__), "..", "data")
+
+
+def get_queued_ovs_flow_mod_list(cluster_instance, host_name):
+    cmd_batch = cluster_instance.pending_cmd_dict.pop(host_name, None)
+    if cmd_batch is None:
+        return []
+    return [
+        operation.split(": ", 1)[1]
+        for operation in cmd_batch.get_operation_list()
+        if operation.startswith("ovs-ofctl")
+    ]
+
+
+def get_queued_tc_cmd_list(cluster_instance, host_name):
+    cmd_batch = cluster_instance.pending_cmd_dict.pop(host_name, None)
+    if cmd_batch is None:
+        return []
+    return [
+        operation[len("tc ") :]
+        for operation in cmd_batch.get_operation_list()
+        if operation.startswith("tc ")
+    ]
+
+
+def build_sat_neighbor_info(up=None, down=None, left=None, right=None):
+    return {
+        "up_neighbor_info": up and (up, 1.0),
+        "down_neighbor_info": down and (down, 1.0),
+        "left_neighbor_info": left and (left, 1.0),
+        "right_neighbor_info": right and (right, 1.0),
+        "ground_neighbor_info": [],
+    }
+
+
+def test_tc_filters_follow_next_hop_rows_of_snapshot():
+    cluster_instance = ClusterInstance(
+        os.path.join(DATA_DIRPATH, "hosts.json"), debug_mode=True
+    )
+    # A chain gemini-1 - gemini-2 - gemini-3, "relay" has no host and gemini-4 is unreachable
+    topology_snapshot = TopologySnapshot(
+        ["gemini-1", "gemini-2", "relay", "gemini-3", "gemini-4"],
+        [
+            [0, 1, 1, 1, -1],
+            [0, 1, 2, 2, -1],
+            [1, 1, 2, 3, -1],
+            [2, 2, 2, 3, -1],
+            [-1, -1, -1, -1, 4],
+        ],
+    )
+    neighbor_dict = {
+        "gemini-1": build_sat_neighbor_info(right="gemini-2"),
+        "gemini-2": build_sat_neighbor_info(left="gemini-1", right="relay"),
+        "gemini-3": build_sat_neighbor_info(up="relay"),
+        "gemini-4": build_sat_neighbor_info(),
+    }
+    cluster_instance.set_all_tc_filter_by_topology_snapshot(
+        topology_snapshot, neighbor_dict
+    )
+    # Every NIC numbers its own filters from 1
+    assert get_queued_tc_cmd_list(cluster_instance, "gemini-1") == [
+        "filter replace dev enp1s0 parent 1: protocol ip prio 1 handle 800::{:x} u32 match ip dst {} flowid 1:40".format(
+            handle, dst_ip
+        )
+        for handle, dst_ip in [(1, "10.192.56.12"), (2, "10.192.56.13")]
+    ]
+    assert get_queued_tc_cmd_list(cluster_instance, "gemini-2") == [
+        "filter replace dev enp1s0 parent 1: protocol ip prio 1 handle 800::{:x} u32 match ip dst {} flowid 1:{}0".format(
+            handle, dst_ip, queue_index
+        )
+        for handle, dst_ip, queue_index in [
+            (1, "10.192.56.11", 3),
+            (2, "10.192.56.13", 4),
+        ]
+    ]
+    assert len(get_queued_tc_cmd_list(cluster_instance, "gemini-3")) == 2
+    assert get_queued_tc_cmd_list(cluster_instance, "gemini-4") == []
+    assert "gemini-4" not in cluster_instance.tc_filter_handle_dict
+    cluster_instance.executor.shutdown()
+
+
+def test_tc_filter_handles_are_recycled_and_bounded(monkeypatch):
+    cluster_instance = ClusterInstance(
+        os.path.join(DATA_DIRPATH, "hosts.json"), debug_mode=True
+    )
+    cluster_instance.tc_filter_handle_dict["gemini-1"] = {}
+    cluster_instance._allocate_tc_filter_handles("gemini-1", ["10.0.0.1", "10.0.0.2"])
+    # A removed filter frees its handle for the next destination
+    del cluster_instance.tc_filter_handle_dict["gemini-1"]["10.0.0.1"]
+    cluster_instance._allocate_tc_filter_handles("gemini-1", ["10.0.0.2", "10.0.0.3"])
+    assert cluster_instance.tc_filter_handle_dict["gemini-1"] == {
+        "10.0.0.2": 2,
+        "10.0.0.3": 1,
+    }
+
+    monkeypatch.setattr(cluster_instance_module, "TC_FILTER_MAX_HANDLE", 3)
+    cluster_instance._allocate_tc_filter_handles("gemini-1", ["10.0.0.4"])
+    with pytest.raises(ValueError, match="gemini-1"):
+        cluster_instance._allocate_tc_filter_handles("gemini-1", ["10.0.0.5"])
+    cluster_instance.executor.shutdown()
+
+
+def test_ovs_bundle_carries_only_the_flow_delta():
+    cluster_instance = ClusterInstance(
+        os.path.join(DATA_DIRPATH, "hosts.json"), debug_mode=True
+    )
+    all_pair_path_dict = {
+        "gemini-1": {"gemini-3": ["gemini-1", "gemini-2", "gemini-3"]},
+        "gemini-3": {"gemini-1": ["gemini-3", "gemini-2", "gemini-1"]},
+    }
+    cluster_instance.set_all_ovs_rule_by_all_pair_path(all_pair_path_dict)
+    flow_mod_list = get_queued_ovs_flow_mod_list(cluster_instance, "host-2")
+    # The first sync removes the flows left by any earlier generation before installing the full set
+    assert flow_mod_list[0] == "delete cookie=0x47454d4900000000/0xffffffff00000000"
+    assert len(flow_mod_list) == 1 + 4
+    assert all(
+        flow_mod.startswith("add cookie=0x47454d4900000001,")
+        for flow_mod in flow_mod_list[1:]
+    )
+
+    # A changed route only adds its changed flows and deletes its removed flows, the other flows are left alone
+    all_pair_path_dict["gemini-1"]["gemini-3"] = ["gemini-1", "gemini-3"]
+    cluster_instance.set_all_ovs_rule_by_all_pair_path(all_pair_path_dict)
+    flow_mod_list = get_queued_ovs_flow_mod_list(cluster_instance, "host-2")
+    assert len(flow_mod_list) == 1 + 1
+    assert flow_mod_list[0].startswith("add cookie=0x47454d4900000002,")
+    assert flow_mod_list[1].startswith("delete ip,")
+    assert not any("/0x" in flow_mod for flow_mod in flow_mod_list)
+
+    # Unchanged routes send nothing
+    cluster_instance.set_all_ovs_rule_by_all_pair_path(all_pair_path_dict)
+    assert get_queued_ovs_flow_mod_list(cluster_instance, "host-2") == []
+    cluster_instance.executor.shutdown()
+
+
+def test_failing_host_is_collected_without_losing_other_hosts():
+    cluster_instance = ClusterInstance(
+        os.path.join(DATA_DIRPATH, "hosts.json"), debug_mode=False
+    )
+    host_instance_dict = cluster_instance.host_instance_dict
+
+    def execute_script(script):
+        return 0, f"{SEGMENT_MARKER} 0 0\n{SEGMENT_MARKER} 1 0\n", ""
+
+    def execute_script_over_dropped_connection(script):
+        raise TimeoutError("SSH channel timed out")
+
+    host_instance_dict["gemini-1"].execute_script = execute_script
+    host_instance_dict["gemini-2"].execute_script = (
+        execute_script_over_dropped_connection
+    )
+    for host_name in ("gemini-1", "gemini-2"):
+        cluster_instance.queue_cmd(host_name, "true")
+        cluster_instance.queue_tc_cmd(
+            host_name, "qdisc change dev enp1s0 parent 1:10 netem delay 5ms"
+        )
+    host_batch_result_dict = cluster_instance.flush_cmd()
+
+    assert set(host_batch_result_dict) == {"gemini-1", "gemini-2"}
+    assert not host_batch_result_dict["gemini-1"].has_failed()
+    assert [
+        cmd_result[1]
+        for cmd_result in host_batch_result_dict["gemini-1"].cmd_result_list
+    ] == [0, 0]
+    failed_result = host_batch_result_dict["gemini-2"]
+    assert failed_result.has_failed()
+    assert failed_result.error == "TimeoutError: SSH channel timed out"
+    assert [cmd_result[1] for cmd_result in failed_result.cmd_result_list] == [-1, -1]
+    cluster_instance.executor.shutdown()
+
+
+def test_rules_of_a_failed_host_are_resent(monkeypatch):
+    cluster_instance = ClusterInstance(
+        os.path.join(DATA_DIRPATH, "hosts.json"), debug_mode=True
+    )
+    execute_host_cmd_batch = cluster_instance._execute_host_cmd_batch
+
+    def execute_host_cmd_batch_failing_on_host_2(host_name, cmd_batch, commit_at=None):
+        host_batch_result = execute_host_cmd_batch(host_name, cmd_batch, commit_at)
+        if host_name == "host-2":
+            host_batch_result.error = "TimeoutError: SSH channel timed out"
+        return host_batch_result
+
+    all_pair_path_dict = {
+        "gemini-1": {"gemini-3": ["gemini-1", "gemini-2", "gemini-3"]},
+    }
+    monkeypatch.setattr(
+        cluster_instance,
+        "_execute_host_cmd_batch",
+        execute_host_cmd_batch_failing_on_host_2,
+    )
+    cluster_instance.set_all_ovs_rule_by_all_pair_path(all_pair_path_dict)
+    assert cluster_instance.flush_cmd()["host-2"].has_failed()
+    monkeypatch.undo()
+
+    # The same routes are sent again to the failed host only, as a full resync
+    cluster_instance.set_all_ovs_rule_by_all_pair_path(all_pair_path_dict)
+    assert set(cluster_instance.pending_cmd_dict) == {"host-2"}
+    flow_mod_list = get_queued_ovs_flow_mod_list(cluster_instance, "host-2")
+    assert flow_mod_list[0] == "delete cookie=0x47454d4900000000/0xffffffff00000000"
+    assert len(flow_mod_list) == 1 + 2
+
+    # A tc filter host whose state was reset deletes the filters it no longer needs by their handles
+    cluster_instance.tc_filter_handle_dict["gemini-4"] = {"10.192.56.11": 1}
+    cluster_instance.set_all_tc_filter_by_topology_snapshot(
+        TopologySnapshot(["gemini-4"], [[0]]),
+        {"gemini-4": build_sat_neighbor_info()},
+    )
+    assert get_queued_tc_cmd_list(cluster_instance, "gemini-4") == [
+        "filter del dev enp1s0 parent 1: protocol ip prio 1 handle 800::1 u32"
+    ]
+    assert cluster_instance.tc_filter_handle_dict["gemini-4"] == {}
+    cluster_instance.executor.shutdown()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
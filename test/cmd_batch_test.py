@@ -0,0 +1,79 @@
+import sys
+import os
+import subprocess
+import time
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cmd_batch import HostCmdBatch, SEGMENT_MARKER
+
+
+def test_consecutive_ovs_and_tc_operations_share_one_segment():
+    cmd_batch = HostCmdBatch()
+    cmd_batch.add_cmd("tc qdisc del dev enp1s0 root")
+    cmd_batch.add_tc_cmd("qdisc change dev enp1s0 parent 1:10 netem delay 5ms")
+    cmd_batch.add_tc_cmd("qdisc change dev enp1s0 parent 1:20 netem delay 6ms")
+    cmd_batch.add_ovs_flow_mod("add ip,nw_dst=10.0.0.1,actions=output:2")
+    assert len(cmd_batch) == 4
+    assert [kind for kind, _ in cmd_batch.segment_list] == ["shell", "tc", "ovs"]
+    script = cmd_batch.build_script()
+    assert script.count("tc -force -batch -") == 1
+    assert script.count("ovs-ofctl add-flows br0 -") == 1
+
+
+def test_parse_output_maps_failures_back_to_operations():
+    cmd_batch = HostCmdBatch()
+    cmd_batch.add_tc_cmd("qdisc change dev enp1s0 parent 1:10 netem delay 5ms")
+    cmd_batch.add_tc_cmd("qdisc change dev enp1s0 parent 1:90 netem delay 5ms")
+    cmd_batch.add_ovs_flow_mod("add ip,nw_dst=10.0.0.1,actions=output:2")
+    cmd_batch.add_cmd("echo done")
+    output = "\n".join(
+        [
+            "RTNETLINK answers: No such file or directory",
+            "Command failed -:2",
+            f"{SEGMENT_MARKER} 0 1",
+            f"{SEGMENT_MARKER} 1 0",
+        ]
+    )
+    result_list = cmd_batch.parse_output(output)
+    assert [exit_code for _, exit_code, _, _ in result_list] == [0, 1, 0, -1]
+    assert result_list[1][3] == "RTNETLINK answers: No such file or directory"
+
+
+def test_bundle_mode_commits_ovs_segment_atomically():
+    cmd_batch = HostCmdBatch(ovs_bundle=True)
+    cmd_batch.add_ovs_flow_mod("delete cookie=0x47454d4900000000/0xffffffff00000000")
+    cmd_batch.add_ovs_flow_mod("add cookie=0x47454d4900000001,ip,actions=output:2")
+    script = cmd_batch.build_script()
+    assert script.count("ovs-ofctl -O OpenFlow14 --bundle add-flows br0 -") == 1
+    assert len(cmd_batch.segment_list) == 1
+
+
+def test_staged_script_waits_for_commit_instant():
+    cmd_batch = HostCmdBatch()
+    cmd_batch.add_cmd("date +%s.%N")
+    commit_at = time.time() + 0.3
+    output = subprocess.run(
+        ["sh", "-s"],
+        input=cmd_batch.build_script(commit_at),
+        capture_output=True,
+        text=True,
+    ).stdout
+    assert 0 < cmd_batch.parse_commit_slack(output) <= 0.3
+    ((_, exit_code, executed_at, _),) = cmd_batch.parse_output(output)
+    assert exit_code == 0 and float(executed_at) >= commit_at
+
+    late_output = subprocess.run(
+        ["sh", "-s"],
+        input=cmd_batch.build_script(time.time() - 1),
+        capture_output=True,
+        text=True,
+    ).stdout
+    assert cmd_batch.parse_commit_slack(late_output) < 0
+    assert cmd_batch.parse_commit_slack(cmd_batch.build_script()) is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,31 @@
+import sys
+import os
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmark import WalkerDeltaConstellation, write_facilities
+from topology import Topology
+
+
+@pytest.fixture
+def build_walker_delta_topology(tmp_path):
+    """
+    Return a function building a Topology of a generated Walker-delta constellation and random facilities in tmp_path,
+    by default 6 planes of 11 satellites and 8 facilities routed by DijkstraRouter.
+    """
+
+    def build(
+        plane_count=6, sat_per_plane=11, facility_count=8, router_type="dijkstra"
+    ):
+        constellation = WalkerDeltaConstellation(plane_count, sat_per_plane)
+        tles_filepath = os.path.join(tmp_path, "constellation.tle")
+        isls_filepath = os.path.join(tmp_path, "constellation.isls")
+        facilities_filepath = os.path.join(tmp_path, "facilities.json")
+        constellation.write_tles(tles_filepath)
+        constellation.write_isls(isls_filepath)
+        write_facilities(facilities_filepath, facility_count, constellation.inclination)
+        return Topology(tles_filepath, facilities_filepath, isls_filepath, router_type)
+
+    return build
@@ -0,0 +1,209 @@
+import sys
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import constellation_system
+from constellation_system import ConstellationSystem, PUSH_LATENCY_SMOOTHING
+from cluster_instance import HostBatchResult
+
+UPDATE_INTERVAL = 0.2
+
+
+class FakeTopologySnapshot:
+    def get_all_pair_path_mapping(self):
+        return {}
+
+
+class FakeTopology:
+    def __init__(self):
+        self.computed_time_list = []
+
+    def update_topology_by_time(self, utc_time, tick_profile=None):
+        self.computed_time_list.append(utc_time)
+
+    def get_neighbor_dict(self):
+        return {"time": self.computed_time_list[-1]}
+
+    def get_topology_snapshot(self, tick_profile=None):
+        return FakeTopologySnapshot()
+
+
+class FakeClusterInstance:
+    """
+    Record the pushed ticks, the second push overruns the interval, the fifth push stops the loop.
+    """
+
+    def __init__(self):
+        self.pushed_list = []
+
+    def connect(self):
+        pass
+
+    def prepare_cluster_environment(self):
+        pass
+
+    def update_network_status_by_topology(
+        self, neighbor_dict, topology_snapshot, commit_at=None, tick_profile=None
+    ):
+        self.pushed_list.append(neighbor_dict["time"])
+        if len(self.pushed_list) == 2:
+            time.sleep(UPDATE_INTERVAL * 2.5)
+        if len(self.pushed_list) == 5:
+            raise KeyboardInterrupt
+        return {}
+
+    def cleanup(self):
+        pass
+
+
+def build_constellation_system(
+    monkeypatch,
+    cluster_instance=None,
+    handover_predictor=None,
+    delay_interpolator=None,
+    delay_update_interval=None,
+):
+    """
+    Build a ConstellationSystem whose topology, cluster, handover predictor and delay interpolator are the given fakes.
+    """
+    monkeypatch.setattr(
+        constellation_system, "Topology", lambda *args, **kwargs: FakeTopology()
+    )
+    monkeypatch.setattr(
+        constellation_system,
+        "ClusterInstance",
+        lambda *args, **kwargs: cluster_instance or FakeClusterInstance(),
+    )
+    monkeypatch.setattr(
+        constellation_system,
+        "HandoverPredictor",
+        lambda *args, **kwargs: handover_predictor,
+    )
+    monkeypatch.setattr(
+        constellation_system,
+        "DelayInterpolator",
+        lambda *args, **kwargs: delay_interpolator,
+    )
+    return ConstellationSystem(
+        "constellation.tle",
+        "facilities.json",
+        "constellation.isls",
+        "hosts.json",
+        UPDATE_INTERVAL,
+        debug_mode=True,
+        router_type="dijkstra",
+        delay_update_interval=delay_update_interval,
+    )
+
+
+def test_pipelined_loop_drops_stale_ticks(monkeypatch):
+    cs = build_constellation_system(monkeypatch)
+    cs.run()
+    pushed_list = cs.cluster_instance.pushed_list
+    tick_index_list = [
+        round((pushed - pushed_list[0]) / cs.update_interval_delta)
+        for pushed in pushed_list
+    ]
+    # The slow push of tick 1 makes tick 2 stale, tick 2 is dropped and the schedule continues at tick 4
+    assert tick_index_list == [0, 1, 4, 5, 6]
+    # Every tick is computed ahead of its push, including the dropped one
+    assert len(cs.topology.computed_time_list) >= 6
+    # The fifth push is interrupted before its tick is finished
+    assert cs.tick_profiler.tick_count == 4
+    assert cs.tick_profiler.dropped_tick_count == 1
+
+
+def test_push_latency_follows_slowest_host(monkeypatch):
+    cs = build_constellation_system(monkeypatch)
+    host_batch_result_dict = {}
+    for host_name, commit_slack in (("host-1", 0.5), ("host-2", 0.2)):
+        host_batch_result_dict[host_name] = HostBatchResult(host_name)
+        host_batch_result_dict[host_name].commit_slack = commit_slack
+    # Pushed at 100, committed at 101: host-2 received its script at 100.8
+    cs.update_push_latency(100.0, 101.0, host_batch_result_dict)
+    assert abs(cs.push_latency - PUSH_LATENCY_SMOOTHING * 0.8) < 1e-9
+    cs.update_push_latency(100.0, 101.0, {"host-3": HostBatchResult("host-3")})
+    assert abs(cs.push_latency - PUSH_LATENCY_SMOOTHING * 0.8) < 1e-9
+
+
+class FakeHandoverPredictor:
+    def __init__(self, handover_utc_time):
+        self.handover_utc_time = handover_utc_time
+
+    def get_next_event_time(self, utc_time):
+        return self.handover_utc_time if utc_time < self.handover_utc_time else None
+
+
+def test_handover_is_scheduled_between_delay_updates(monkeypatch):
+    schedule_start_utc_time = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    handover_utc_time = schedule_start_utc_time + timedelta(seconds=0.3)
+    cs = build_constellation_system(
+        monkeypatch, handover_predictor=FakeHandoverPredictor(handover_utc_time)
+    )
+    cs.schedule_start_utc_time = schedule_start_utc_time
+    tick_list = [cs.schedule_start_utc_time]
+    for _ in range(3):
+        tick_list.append(cs.get_next_tick_time(tick_list[-1]))
+    assert [
+        (tick - cs.schedule_start_utc_time).total_seconds() for tick in tick_list
+    ] == [0, 0.2, 0.3, 0.4]
+
+
+class FakeNodeStore:
+    def __init__(self, utc_time):
+        self.utc_time = utc_time
+
+    def get_neighbor_dict(self):
+        return {"time": self.utc_time}
+
+
+class FakeDelayInterpolator:
+    def interpolate_node_store(self, node_store, utc_time):
+        return FakeNodeStore(utc_time)
+
+
+class FakeDelayClusterInstance:
+    def __init__(self):
+        self.commit_at_list = []
+
+    def update_tc_queue_delay_by_neighbor_dict(self, neighbor_dict, commit_at=None):
+        assert neighbor_dict["time"].timestamp() == commit_at
+        self.commit_at_list.append(commit_at)
+        host_batch_result = HostBatchResult("host-1")
+        host_batch_result.commit_slack = 0.0
+        return {"host-1": host_batch_result}
+
+
+def test_delay_updates_are_pushed_between_ticks(monkeypatch):
+    cs = build_constellation_system(
+        monkeypatch,
+        cluster_instance=FakeDelayClusterInstance(),
+        delay_interpolator=FakeDelayInterpolator(),
+        delay_update_interval=0.2,
+    )
+    tick_utc_time = datetime.now(timezone.utc) - timedelta(seconds=0.3)
+    cs.push_delay_updates(tick_utc_time, tick_utc_time + timedelta(seconds=1), None)
+    # 0.2 has already passed, 1.0 is the next tick and 0.8 is the last update leaving the push lead before it
+    assert [
+        round(commit_at - tick_utc_time.timestamp(), 6)
+        for commit_at in cs.cluster_instance.commit_at_list
+    ] == [0.4, 0.6, 0.8]
+    # Every update is profiled on its own, without the wait before its push, and feeds the push latency
+    tick_profiler = cs.tick_profiler
+    assert tick_profiler.tick_count == 0
+    assert tick_profiler.delay_update_count == 3
+    assert set(tick_profiler.phase_total_duration_dict) == {
+        "delay_interpolation",
+        "delay_update_push",
+    }
+    assert tick_profiler.host_total_push_dict["host-1"]["cmd_count"] == 0
+    assert cs.push_latency > 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,71 @@
+import sys
+import os
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from delay_interpolator import DelayInterpolator
+
+
+def test_interpolated_delays_match_full_propagation(build_walker_delta_topology):
+    topology = build_walker_delta_topology()
+    tick_utc_time = datetime(2025, 1, 1, 0, 10, 0, tzinfo=timezone.utc)
+    topology.update_topology_by_time(tick_utc_time)
+    node_store = topology.node_store.copy()
+    delay_interpolator = DelayInterpolator(topology, sample_step=60, window=300)
+
+    for offset in (1, 29, 60, 187, 300):
+        utc_time = tick_utc_time + timedelta(seconds=offset)
+        interpolated_node_store = delay_interpolator.interpolate_node_store(
+            node_store, utc_time
+        )
+        assert delay_interpolator.window_start_utc_time == tick_utc_time + timedelta(
+            seconds=1
+        )
+        topology.update_topology_by_time(utc_time)
+        # The links are those of the tick, only the delays are interpolated
+        assert (
+            interpolated_node_store.isl_neighbor_index_array.tolist()
+            == node_store.isl_neighbor_index_array.tolist()
+        )
+        assert (
+            interpolated_node_store.access_sat_index_array.tolist()
+            == node_store.access_sat_index_array.tolist()
+        )
+        isl_slot_mask = node_store.isl_neighbor_index_array >= 0
+        np.testing.assert_allclose(
+            interpolated_node_store.isl_neighbor_delay_array[isl_slot_mask],
+            topology.node_store.isl_neighbor_delay_array[isl_slot_mask],
+            rtol=0,
+            atol=1e-3,
+        )
+        same_access_mask = (node_store.access_sat_index_array >= 0) & (
+            node_store.access_sat_index_array
+            == topology.node_store.access_sat_index_array
+        )
+        np.testing.assert_allclose(
+            interpolated_node_store.access_delay_array[same_access_mask],
+            topology.node_store.access_delay_array[same_access_mask],
+            rtol=0,
+            atol=0.05,
+        )
+    # The NodeStore of the tick is left unchanged
+    assert not np.array_equal(
+        node_store.isl_neighbor_delay_array,
+        interpolated_node_store.isl_neighbor_delay_array,
+    )
+
+    # An instant outside the window fits a new one
+    delay_interpolator.interpolate_node_store(
+        node_store, tick_utc_time + timedelta(seconds=302)
+    )
+    assert delay_interpolator.window_start_utc_time == tick_utc_time + timedelta(
+        seconds=302
+    )
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
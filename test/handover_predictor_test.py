@@ -0,0 +1,117 @@
+import sys
+import os
+from bisect import bisect_left
+from datetime import datetime, timedelta, timezone
+from math import ceil, log2
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from topology import Topology
+from handover_predictor import HandoverPredictor
+
+DATA_DIRPATH = os.path.join(os.path.dirname(__file__), "..", "data")
+
+
+def test_predicted_handovers_match_access_selection():
+    topology = Topology(
+        os.path.join(DATA_DIRPATH, "three.tle"),
+        os.path.join(DATA_DIRPATH, "facilities.json"),
+        os.path.join(DATA_DIRPATH, "three.isls"),
+        "dijkstra",
+    )
+    handover_predictor = HandoverPredictor(topology)
+    start_utc_time = datetime(2025, 1, 1, 0, 0, 0, tzinfo=timezone.utc)
+    event_list = handover_predictor.predict_handover_events(
+        start_utc_time, start_utc_time + timedelta(hours=3)
+    )
+    assert event_list and event_list == sorted(event_list)
+    for event_utc_time, facility_name, old_sat_name, new_sat_name in event_list:
+        for offset, expected_sat_name in ((-0.02, old_sat_name), (0.02, new_sat_name)):
+            skyfield_time = handover_predictor.ts.from_datetime(
+                event_utc_time + timedelta(seconds=offset)
+            )
+            assert (
+                topology.get_neighbor_sat_of_facility(facility_name, skyfield_time)[0]
+                == expected_sat_name
+            )
+
+    # The queue returns the first event after the given instant, bisection on another sample grid may differ within the tolerance
+    first_event_utc_time = event_list[0][0]
+    next_event_utc_time = handover_predictor.get_next_event_time(
+        first_event_utc_time - timedelta(seconds=65)
+    )
+    assert abs((next_event_utc_time - first_event_utc_time).total_seconds()) <= (
+        handover_predictor.time_tolerance
+    )
+
+
+def test_handover_prediction_cost_and_tick_rate_stay_bounded(
+    build_walker_delta_topology, monkeypatch
+):
+    topology = build_walker_delta_topology(24, 12, 60)
+    handover_predictor = HandoverPredictor(topology)
+
+    propagation_call_list = []
+    get_positions_km_of_pairs = topology.propagator.get_positions_km_of_pairs
+
+    def count_get_positions_km_of_pairs(skyfield_time, sat_index_matrix):
+        propagation_call_list.append(sat_index_matrix.shape)
+        return get_positions_km_of_pairs(skyfield_time, sat_index_matrix)
+
+    monkeypatch.setattr(
+        topology.propagator,
+        "get_positions_km_of_pairs",
+        count_get_positions_km_of_pairs,
+    )
+    start_utc_time = datetime(2025, 1, 1, 0, 10, 0, tzinfo=timezone.utc)
+    window_end_utc_time = start_utc_time + timedelta(seconds=handover_predictor.horizon)
+    event_list = handover_predictor.predict_handover_events(
+        start_utc_time, window_end_utc_time
+    )
+    # Many facilities hand over in the window, all of them are bisected together
+    assert len(event_list) > 100
+    assert len(propagation_call_list) <= ceil(
+        log2(handover_predictor.sample_step / handover_predictor.time_tolerance)
+    )
+    assert propagation_call_list[0][0] == len(event_list)
+    for event_utc_time, facility_name, old_sat_name, new_sat_name in event_list[::25]:
+        for offset, expected_sat_name in ((-0.02, old_sat_name), (0.02, new_sat_name)):
+            skyfield_time = handover_predictor.ts.from_datetime(
+                event_utc_time + timedelta(seconds=offset)
+            )
+            assert (
+                topology.get_neighbor_sat_of_facility(facility_name, skyfield_time)[0]
+                == expected_sat_name
+            )
+
+    # Ticks are at least the minimum spacing apart, and every handover is applied at most the minimum spacing late
+    min_tick_spacing_delta = timedelta(seconds=handover_predictor.min_tick_spacing)
+    tick_utc_time_list = []
+    utc_time = start_utc_time
+    while True:
+        utc_time = handover_predictor.get_next_event_time(utc_time)
+        if utc_time is None or utc_time > window_end_utc_time + min_tick_spacing_delta:
+            break
+        tick_utc_time_list.append(utc_time)
+    assert tick_utc_time_list[0] == event_list[0][0]
+    assert all(
+        later_tick_utc_time - tick_utc_time >= min_tick_spacing_delta
+        for tick_utc_time, later_tick_utc_time in zip(
+            tick_utc_time_list, tick_utc_time_list[1:]
+        )
+    )
+    assert len(tick_utc_time_list) <= (
+        handover_predictor.horizon / handover_predictor.min_tick_spacing + 2
+    )
+    assert len(tick_utc_time_list) < len(event_list)
+    for event_utc_time, _, _, _ in event_list:
+        tick_utc_time = tick_utc_time_list[
+            bisect_left(tick_utc_time_list, event_utc_time)
+        ]
+        assert tick_utc_time - event_utc_time <= min_tick_spacing_delta
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
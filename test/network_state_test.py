@@ -0,0 +1,68 @@
+import sys
+import os
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from network_state import NetworkStateReconciler
+
+
+def test_reconcile_returns_only_changed_and_removed_rules():
+    reconciler = NetworkStateReconciler()
+    first_changes = reconciler.reconcile(
+        "tc_filter", {"gemini-1": {"10.0.0.2": 1, "10.0.0.3": 2}}
+    )
+    assert first_changes == {"gemini-1": ({"10.0.0.2": 1, "10.0.0.3": 2}, [])}
+
+    second_changes = reconciler.reconcile(
+        "tc_filter",
+        {"gemini-1": {"10.0.0.2": 1, "10.0.0.4": 3}, "gemini-2": {}},
+    )
+    assert second_changes == {"gemini-1": ({"10.0.0.4": 3}, ["10.0.0.3"])}
+
+    assert reconciler.reconcile("tc_filter", {}) == {
+        "gemini-1": ({}, ["10.0.0.2", "10.0.0.4"])
+    }
+
+
+def test_reset_forgets_applied_rules():
+    reconciler = NetworkStateReconciler()
+    reconciler.reconcile("tc_queue_delay", {"gemini-1": {1: 10.0}})
+    reconciler.reset()
+    assert reconciler.reconcile("tc_queue_delay", {"gemini-1": {1: 10.0}}) == {
+        "gemini-1": ({1: 10.0}, [])
+    }
+
+
+def test_reset_host_forgets_only_that_host():
+    reconciler = NetworkStateReconciler()
+    reconciler.reconcile("tc_filter", {"gemini-1": {"10.0.0.2": 1}, "gemini-2": {}})
+    reconciler.reconcile("ovs_flow", {"host-1": {(1, "a", "b"): (2, "")}})
+    reconciler.reset_host("gemini-1")
+    assert not reconciler.has_applied_rules("tc_filter", "gemini-1")
+    assert reconciler.has_applied_rules("tc_filter", "gemini-2")
+    assert reconciler.has_applied_rules("ovs_flow", "host-1")
+    assert reconciler.reconcile(
+        "tc_filter", {"gemini-1": {"10.0.0.2": 1}, "gemini-2": {}}
+    ) == {"gemini-1": ({"10.0.0.2": 1}, [])}
+
+
+def test_changes_below_threshold_are_suppressed_until_they_accumulate():
+    reconciler = NetworkStateReconciler()
+    reconciler.reconcile("tc_queue_delay", {"gemini-1": {1: 10.0, 2: 5.0}}, 0.1)
+    changes = reconciler.reconcile(
+        "tc_queue_delay", {"gemini-1": {1: 10.05, 2: 6.0, 3: 1.0}}, 0.1
+    )
+    assert changes == {"gemini-1": ({2: 6.0, 3: 1.0}, [])}
+    assert reconciler.suppressed_count_dict["tc_queue_delay"] == 1
+    # The applied delay is still 10.0, so the next small step crosses the threshold
+    changes = reconciler.reconcile(
+        "tc_queue_delay", {"gemini-1": {1: 10.11, 2: 6.0, 3: 1.0}}, 0.1
+    )
+    assert changes == {"gemini-1": ({1: 10.11}, [])}
+    assert reconciler.suppressed_count_dict["tc_queue_delay"] == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
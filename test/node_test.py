@@ -0,0 +1,86 @@
+import sys
+import os
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from node import BaseNode, NodeStore, SatNode, FacilityNode
+
+
+def test_node_store_exports_example_json_shape():
+    node_store = NodeStore(["gemini-1", "gemini-2", "core-1", "ue-1"], 2)
+    node_store.isl_neighbor_index_array[0, 0] = 1
+    node_store.isl_neighbor_delay_array[0, 0] = 3.5
+    node_store.isl_neighbor_index_array[1, 1] = 0
+    node_store.isl_neighbor_delay_array[1, 1] = 3.5
+    node_store.access_sat_index_array[0] = 1
+    node_store.access_delay_array[0] = 2.0
+    neighbor_dict = node_store.get_neighbor_dict()
+    assert neighbor_dict["gemini-1"] == {
+        "up_neighbor_info": ["gemini-2", 3.5],
+        "down_neighbor_info": None,
+        "left_neighbor_info": None,
+        "right_neighbor_info": None,
+        "ground_neighbor_info": None,
+    }
+    assert neighbor_dict["gemini-2"]["down_neighbor_info"] == ["gemini-1", 3.5]
+    assert neighbor_dict["gemini-2"]["ground_neighbor_info"] == [("core-1", 2.0)]
+    assert neighbor_dict["core-1"] == {"sat_neighbor_info": ("gemini-2", 2.0)}
+    assert neighbor_dict["ue-1"] == {"sat_neighbor_info": None}
+    # The export is a copy, later updates of the store do not change it
+    node_store.isl_neighbor_delay_array[0, 0] = 4.0
+    assert neighbor_dict["gemini-1"]["up_neighbor_info"][1] == 3.5
+
+
+def test_node_views_read_and_write_the_store_in_place():
+    node_store = NodeStore(["gemini-1", "gemini-2", "core-1"], 2)
+    node_dict = node_store.get_node_dict()
+    sat_node, facility_node = node_dict["gemini-1"], node_dict["core-1"]
+    assert isinstance(sat_node, SatNode) and isinstance(facility_node, FacilityNode)
+    sat_node.right_neighbor_info = ["gemini-2", 5.0]
+    facility_node.sat_neighbor_info = ("gemini-1", 1.5)
+    assert node_store.isl_neighbor_index_array[0].tolist() == [-1, -1, -1, 1]
+    assert sat_node.ground_neighbor_info == [("core-1", 1.5)]
+    snapshot = node_store.copy()
+    sat_node.set_isl_delay(3, 6.0)
+    assert sat_node.right_neighbor_info == ["gemini-2", 6.0]
+    assert snapshot.get_neighbor_dict()["gemini-1"]["right_neighbor_info"][1] == 5.0
+    facility_node.sat_neighbor_info = None
+    assert sat_node.ground_neighbor_info is None
+    try:
+        sat_node.unknown_neighbor_info = None
+    except AttributeError:
+        pass
+    else:
+        assert False, "node views have no attributes besides their fields"
+
+
+def test_ground_neighbors_follow_bulk_access_updates():
+    node_store = NodeStore(["gemini-1", "gemini-2", "core-1", "ue-1", "ue-2"], 2)
+    sat_node = node_store.get_node_dict()["gemini-2"]
+    assert sat_node.ground_neighbor_info is None
+    # A bulk write of the access columns resets the inverse index, as Topology does every tick
+    node_store.access_sat_index_array[:] = [1, 0, 1]
+    node_store.access_delay_array[:] = [2.0, 3.0, 4.0]
+    node_store.reset_ground_neighbor_index()
+    assert sat_node.ground_neighbor_info == [("core-1", 2.0), ("ue-2", 4.0)]
+    assert node_store.get_ground_facility_indices(0).tolist() == [1]
+    # Delays are read from the store, only the access satellites are indexed
+    node_store.access_delay_array[2] = 5.0
+    assert sat_node.ground_neighbor_info[1] == ("ue-2", 5.0)
+    snapshot = node_store.copy()
+    node_store.access_sat_index_array[:] = np.array([0, 0, 0])
+    node_store.reset_ground_neighbor_index()
+    assert sat_node.ground_neighbor_info is None
+    assert snapshot.get_ground_facility_indices(1).tolist() == [0, 2]
+
+
+def test_base_node_is_abstract():
+    with pytest.raises(TypeError):
+        BaseNode(NodeStore(["gemini-1"], 1), 0)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,52 @@
+import sys
+import os
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+from skyfield.api import load
+from skyfield.framelib import itrs
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+def test_positions_and_isl_delays_match_skyfield(build_walker_delta_topology):
+    topology = build_walker_delta_topology(4, 5, 2)
+    ts = load.timescale()
+    start_utc_time = datetime(2025, 1, 1, 0, 10, 0, tzinfo=timezone.utc)
+    utc_time_list = [start_utc_time + timedelta(minutes=13 * i) for i in range(4)]
+    positions_series = topology.propagator.get_positions_km_series(
+        ts.from_datetimes(utc_time_list)
+    )
+    for epoch_index, utc_time in enumerate(utc_time_list):
+        skyfield_time = ts.from_datetime(utc_time)
+        sat_positions = topology.propagator.get_positions_km(skyfield_time)
+        expected_positions = np.array(
+            [
+                satellite.at(skyfield_time).frame_xyz(itrs).km
+                for satellite in topology.satellite_dict.values()
+            ]
+        )
+        np.testing.assert_allclose(sat_positions, expected_positions, rtol=0, atol=1e-6)
+        np.testing.assert_allclose(
+            positions_series[epoch_index], expected_positions, rtol=0, atol=1e-6
+        )
+
+        expected_isl_delays = [
+            topology.get_delay_between_two_satellites(
+                topology.node_list[sat1_index],
+                topology.node_list[sat2_index],
+                skyfield_time,
+            )
+            for sat1_index, sat2_index in topology.isl_edge_array.tolist()
+        ]
+        np.testing.assert_allclose(
+            topology.get_isl_delays_by_sat_positions(sat_positions),
+            expected_isl_delays,
+            rtol=0,
+            atol=1e-9,
+        )
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
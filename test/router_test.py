@@ -1,10 +1,172 @@
 import sys
 import os
+import random
 from math import inf
 
+import numpy as np
+import pytest
+
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from router import FloydRouter
+from router import (
+    FloydRouter,
+    ArrayFloydRouter,
+    DijkstraRouter,
+    IncrementalDijkstraRouter,
+    ParallelDijkstraRouter,
+)
+
+
+def build_random_graph(node_count, edge_count, seed=0):
+    """
+    Build the adjacency list and matrix of a random connected undirected graph: a ring plus random chords.
+    """
+    rng = random.Random(seed)
+    adj_matrix = [[inf] * node_count for _ in range(node_count)]
+    for i in range(node_count):
+        adj_matrix[i][i] = 0
+    edges = [(i, (i + 1) % node_count) for i in range(node_count)]
+    edges += [
+        tuple(rng.sample(range(node_count), 2)) for _ in range(edge_count - node_count)
+    ]
+    for i, j in edges:
+        adj_matrix[i][j] = adj_matrix[j][i] = rng.uniform(1, 100)
+    adj_list = [
+        [j for j in range(node_count) if adj_matrix[i][j] not in (0, inf)]
+        for i in range(node_count)
+    ]
+    return adj_list, adj_matrix
+
+
+def assert_router_paths_are_shortest(router, adj_matrix, expected_distance):
+    node_count = len(adj_matrix)
+    for src in range(node_count):
+        for dst in range(node_count):
+            path = router.get_path_from_src_to_dst(src, dst)
+            assert path[0] == src and path[-1] == dst
+            length = sum(adj_matrix[a][b] for a, b in zip(path, path[1:]))
+            assert abs(length - expected_distance[src][dst]) < 1e-9
+            assert abs(router.get_distance_from_src_to_dst(src, dst) - length) < 1e-9
+
+
+def test_array_floyd_router_matches_floyd_router():
+    adj_list, adj_matrix = build_random_graph(30, 60)
+    fr = FloydRouter(adj_list, adj_matrix)
+    fr.calculate_adj_matrix_and_predecessor_matrix()
+    afr = ArrayFloydRouter(adj_list, adj_matrix)
+    afr.calculate_adj_matrix_and_predecessor_matrix()
+    assert_router_paths_are_shortest(fr, adj_matrix, fr.adj_matrix)
+    assert_router_paths_are_shortest(afr, adj_matrix, fr.adj_matrix)
+
+
+def test_dijkstra_router_matches_floyd_router():
+    adj_list, adj_matrix = build_random_graph(40, 70, seed=1)
+    fr = FloydRouter(adj_list, adj_matrix)
+    fr.calculate_adj_matrix_and_predecessor_matrix()
+    dr = DijkstraRouter(adj_list, adj_matrix)
+    dr.calculate_adj_matrix_and_predecessor_matrix()
+    assert_router_paths_are_shortest(dr, adj_matrix, fr.adj_matrix)
+
+
+def test_incremental_dijkstra_router_matches_full_recalculation():
+    rng = random.Random(2)
+    adj_list, adj_matrix = build_random_graph(40, 80, seed=2)
+    ir = IncrementalDijkstraRouter(adj_list, adj_matrix)
+    ir.calculate_adj_matrix_and_predecessor_matrix()
+    for _ in range(20):
+        # Change a few weights, move one chord and add one
+        for _ in range(3):
+            i = rng.randrange(40)
+            j = rng.choice(adj_list[i])
+            adj_matrix[i][j] = adj_matrix[j][i] = rng.uniform(1, 100)
+        i = rng.randrange(40)
+        j = rng.choice(adj_list[i])
+        if abs(i - j) not in (1, 39):
+            adj_matrix[i][j] = adj_matrix[j][i] = inf
+        i, j = rng.sample(range(40), 2)
+        adj_matrix[i][j] = adj_matrix[j][i] = rng.uniform(1, 100)
+        adj_list = [
+            [j for j in range(40) if adj_matrix[i][j] not in (0, inf)]
+            for i in range(40)
+        ]
+
+        ir.modify_adj_list_and_matrix(adj_list, adj_matrix)
+        ir.calculate_adj_matrix_and_predecessor_matrix()
+        dr = DijkstraRouter(adj_list, adj_matrix)
+        dr.calculate_adj_matrix_and_predecessor_matrix()
+        assert_router_paths_are_shortest(ir, adj_matrix, dr.adj_matrix)
+
+
+def test_parallel_dijkstra_router_matches_floyd_router():
+    adj_list, adj_matrix = build_random_graph(40, 70, seed=4)
+    pr = ParallelDijkstraRouter(adj_list, adj_matrix, worker_count=3)
+    try:
+        # The second graph has more edges than the shared CSR blocks first made room for
+        for adj_list, adj_matrix in (
+            (adj_list, adj_matrix),
+            build_random_graph(40, 300, seed=5),
+        ):
+            pr.modify_adj_list_and_matrix(adj_list, adj_matrix)
+            fr = FloydRouter(adj_list, adj_matrix)
+            fr.calculate_adj_matrix_and_predecessor_matrix()
+            pr.calculate_adj_matrix_and_predecessor_matrix()
+            assert_router_paths_are_shortest(pr, adj_matrix, fr.adj_matrix)
+    finally:
+        pr.close()
+
+
+def test_lazy_path_api_matches_path_dicts():
+    adj_list, adj_matrix = build_random_graph(20, 30, seed=3)
+    for router in (
+        FloydRouter(adj_list, adj_matrix),
+        DijkstraRouter(adj_list, adj_matrix),
+    ):
+        router.calculate_adj_matrix_and_predecessor_matrix()
+        for src in range(20):
+            next_hops = router.get_next_hops_from_src(src)
+            assert next_hops.dtype.name == "int32"
+            assert next_hops.tolist() == list(
+                router.get_next_from_src_to_all(src).values()
+            )
+            assert dict(
+                router.iter_paths_from_src(src)
+            ) == router.get_path_from_src_to_all(src)
+        next_hop_list = list(router.iter_next_hops([0, 5]))
+        assert len(next_hop_list) == 2 * 19
+        for src, dst, next_hop in next_hop_list:
+            assert router.get_path_from_src_to_dst(src, dst)[1] == next_hop
+
+
+def test_set_weight_buffer_matches_list_update():
+    adj_list, adj_matrix = build_random_graph(30, 50, seed=5)
+    weight_buffer = np.array(adj_matrix, dtype=np.float64)
+    for router_class in (ArrayFloydRouter, DijkstraRouter, IncrementalDijkstraRouter):
+        list_router = router_class(adj_list, adj_matrix)
+        list_router.calculate_adj_matrix_and_predecessor_matrix()
+        buffer_router = router_class(adj_list, np.full((30, 30), inf))
+        buffer_router.set_weight_buffer(weight_buffer)
+        if router_class is ArrayFloydRouter:
+            # The buffer is referenced, not copied
+            assert buffer_router.adj_matrix is weight_buffer
+        else:
+            assert buffer_router.csr_indptr.tolist() == list_router.csr_indptr.tolist()
+            assert (
+                buffer_router.csr_indices.tolist() == list_router.csr_indices.tolist()
+            )
+            assert (
+                buffer_router.csr_weights.tolist() == list_router.csr_weights.tolist()
+            )
+        buffer_router.calculate_adj_matrix_and_predecessor_matrix()
+        assert_router_paths_are_shortest(
+            buffer_router, adj_matrix, list_router.adj_matrix
+        )
+        # The floyd_warshall input must be left untouched
+        assert weight_buffer.tolist() == adj_matrix
+
+    # A buffer of the wrong shape is rejected
+    with pytest.raises(ValueError):
+        DijkstraRouter(adj_list, adj_matrix).set_weight_buffer(np.zeros((29, 29)))
+
 
 if __name__ == "__main__":
     adj_list = [[1], [0, 2], [1, 3], [2]]
@@ -0,0 +1,71 @@
+import sys
+import os
+import json
+import urllib.request
+from datetime import datetime, timezone
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cluster_instance import HostBatchResult
+from tick_profiler import TickProfiler
+
+
+def build_tick_profile(tick_profiler):
+    tick_profile = tick_profiler.start_tick(datetime(2025, 1, 1, tzinfo=timezone.utc))
+    with tick_profile.phase("routing"):
+        pass
+    host_batch_result = HostBatchResult("host-1")
+    host_batch_result.cmd_result_list = [("tc qdisc", 0, "", "")] * 3
+    host_batch_result.sent_byte_count = 120
+    host_batch_result.latency_ns = 2_000_000
+    tick_profile.add_host_batch_results({"host-1": host_batch_result})
+    return tick_profile
+
+
+def test_ticks_are_traced_and_exported(tmp_path):
+    trace_filepath = str(tmp_path / "trace.jsonl")
+    metrics_filepath = str(tmp_path / "gemini.prom")
+    tick_profiler = TickProfiler(trace_filepath, metrics_filepath)
+    tick_profiler.finish_tick(build_tick_profile(tick_profiler))
+    tick_profiler.finish_tick(build_tick_profile(tick_profiler))
+    tick_profiler.drop_tick(build_tick_profile(tick_profiler))
+    tick_profiler.finish_delay_update(build_tick_profile(tick_profiler))
+    tick_profiler.close()
+
+    with open(trace_filepath) as f:
+        trace_list = [json.loads(line) for line in f]
+    assert len(trace_list) == 4
+    assert trace_list[0]["phase_duration_ns"]["routing"] >= 0
+    assert trace_list[0]["host_push"]["host-1"]["cmd_count"] == 3
+    assert trace_list[2]["dropped"]
+    assert trace_list[3]["delay_update"]
+
+    with open(metrics_filepath) as f:
+        metrics_text = f.read()
+    assert "gemini_ticks_total 2" in metrics_text
+    assert "gemini_dropped_ticks_total 1" in metrics_text
+    assert "gemini_delay_updates_total 1" in metrics_text
+    assert 'gemini_host_sent_bytes_total{host="host-1"} 360\n' in metrics_text
+    assert 'gemini_host_last_push_duration_seconds{host="host-1"} 0.002' in metrics_text
+    assert "# TYPE gemini_phase_duration_seconds_total counter" in metrics_text
+
+
+def test_metrics_are_served_over_http():
+    tick_profiler = TickProfiler(metrics_port=0)
+    tick_profiler.finish_tick(build_tick_profile(tick_profiler))
+    port = tick_profiler.http_server.server_address[1]
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+            metrics_text = response.read().decode()
+    finally:
+        tick_profiler.close()
+    assert "gemini_ticks_total 1" in metrics_text
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    with tempfile.TemporaryDirectory() as tmp_dirpath:
+        test_ticks_are_traced_and_exported(Path(tmp_dirpath))
+    test_metrics_are_served_over_http()
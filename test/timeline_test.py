@@ -0,0 +1,115 @@
+import sys
+import os
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import timeline as timeline_module
+from topology import Topology
+from timeline import TimelineCompiler, TopologyTimeline
+
+DATA_DIRPATH = os.path.join(os.path.dirname(__file__), "..", "data")
+
+
+def build_topology():
+    return Topology(
+        os.path.join(DATA_DIRPATH, "three.tle"),
+        os.path.join(DATA_DIRPATH, "facilities.json"),
+        os.path.join(DATA_DIRPATH, "three.isls"),
+        "dijkstra",
+    )
+
+
+def assert_neighbor_dicts_match(neighbor_dict, expected_neighbor_dict):
+    """
+    The timeline is compiled from a batch propagation, whose delays may differ from a single-epoch propagation in the last bits.
+    """
+    assert neighbor_dict.keys() == expected_neighbor_dict.keys()
+    for node_name, neighbor_info_dict in neighbor_dict.items():
+        for key, neighbor_info in neighbor_info_dict.items():
+            expected_neighbor_info = expected_neighbor_dict[node_name][key]
+            if key == "ground_neighbor_info" and neighbor_info is not None:
+                neighbor_info_list = neighbor_info
+                expected_neighbor_info_list = expected_neighbor_info
+            else:
+                neighbor_info_list = [neighbor_info]
+                expected_neighbor_info_list = [expected_neighbor_info]
+            assert len(neighbor_info_list) == len(expected_neighbor_info_list)
+            for info, expected_info in zip(
+                neighbor_info_list, expected_neighbor_info_list
+            ):
+                if expected_info is None:
+                    assert info is None
+                    continue
+                assert type(info) is type(expected_info)
+                assert info[0] == expected_info[0]
+                assert info[1] == pytest.approx(expected_info[1], abs=1e-9)
+
+
+def test_timeline_slots_match_live_topology(tmp_path, monkeypatch):
+    # The three slots span two propagation chunks
+    monkeypatch.setattr(timeline_module, "TIMELINE_PROPAGATION_CHUNK_SLOT_COUNT", 2)
+    start_utc_time = datetime(2025, 1, 1, 0, 0, 0, tzinfo=timezone.utc)
+    TimelineCompiler(build_topology()).compile(
+        start_utc_time, start_utc_time + timedelta(seconds=600), 300, tmp_path
+    )
+    timeline = TopologyTimeline(tmp_path)
+    assert timeline.slot_count == 3
+
+    topology = build_topology()
+    for slot_index in range(timeline.slot_count):
+        utc_time = start_utc_time + timedelta(seconds=slot_index * 300)
+        topology.update_topology_by_time(utc_time)
+        # Lookups snap to the nearest slot
+        timeline.update_topology_by_time(utc_time + timedelta(seconds=100))
+        assert timeline.slot_index == slot_index
+        assert_neighbor_dicts_match(
+            timeline.get_neighbor_dict(), topology.get_neighbor_dict()
+        )
+        assert timeline.get_all_pair_path_dict() == topology.get_all_pair_path_dict()
+
+
+def test_timeline_rejects_time_outside_window(tmp_path):
+    start_utc_time = datetime(2025, 1, 1, 0, 0, 0, tzinfo=timezone.utc)
+    TimelineCompiler(build_topology()).compile(
+        start_utc_time, start_utc_time, 60, tmp_path
+    )
+    timeline = TopologyTimeline(tmp_path)
+    try:
+        timeline.update_topology_by_time(start_utc_time + timedelta(seconds=60))
+    except ValueError:
+        pass
+    else:
+        assert False, "a time outside the compiled window must be rejected"
+
+
+def test_compile_memory_is_bounded_by_the_chunk(
+    build_walker_delta_topology, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(timeline_module, "TIMELINE_PROPAGATION_CHUNK_SLOT_COUNT", 16)
+    topology = build_walker_delta_topology()
+    start_utc_time = datetime(2025, 1, 1, 0, 0, 0, tzinfo=timezone.utc)
+    slot_count = 300
+    tracemalloc.start()
+    try:
+        TimelineCompiler(topology).compile(
+            start_utc_time,
+            start_utc_time + timedelta(seconds=10 * (slot_count - 1)),
+            10,
+            tmp_path / "timeline",
+        )
+        peak_byte_count = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    # The next hops of the whole window are written to disk, never held in memory
+    assert peak_byte_count < slot_count * topology.node_count**2 * 4 / 2
+    timeline = TopologyTimeline(tmp_path / "timeline")
+    assert timeline.slot_count == slot_count
+    assert (timeline.next_hops[-1] >= 0).any()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,95 @@
+import sys
+import os
+import subprocess
+from math import inf
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from topology_snapshot import TopologySnapshot
+from topology_publisher import TopologyPublisher, TopologyReader
+
+NODE_LIST = ["gemini-1", "gemini-2", "core-1"]
+NEIGHBOR_DICT = {
+    "gemini-1": {
+        "up_neighbor_info": ["gemini-2", 5.0],
+        "down_neighbor_info": None,
+        "left_neighbor_info": None,
+        "right_neighbor_info": None,
+        "ground_neighbor_info": None,
+    },
+    "gemini-2": {
+        "up_neighbor_info": None,
+        "down_neighbor_info": ["gemini-1", 5.0],
+        "left_neighbor_info": None,
+        "right_neighbor_info": None,
+        "ground_neighbor_info": [("core-1", 2.0)],
+    },
+    "core-1": {"sat_neighbor_info": ("gemini-2", 2.0)},
+}
+
+
+def build_snapshot(scale):
+    next_hop_matrix = [[0, 1, 1], [0, 1, 2], [1, 1, 2]]
+    distance_matrix = [[0, 5, 7], [5, 0, 2], [7, 2, 0]]
+    return TopologySnapshot(
+        NODE_LIST,
+        next_hop_matrix,
+        [[distance * scale for distance in row] for row in distance_matrix],
+    )
+
+
+def test_reader_gets_last_published_tick(tmp_path):
+    publish_filepath = str(tmp_path / "topology")
+    publisher = TopologyPublisher(publish_filepath, NODE_LIST)
+    reader = TopologyReader(publish_filepath)
+    assert reader.read() is None
+
+    publisher.publish(build_snapshot(1), NEIGHBOR_DICT, 100.0)
+    publisher.publish(build_snapshot(2), NEIGHBOR_DICT, 200.0)
+    version, timestamp, snapshot, link_delays = reader.read()
+    assert (version, timestamp) == (2, 200.0)
+    assert snapshot.get_all_pair_path_mapping()["gemini-1"]["core-1"] == [
+        "gemini-1",
+        "gemini-2",
+        "core-1",
+    ]
+    assert snapshot.get_distance(0, 2) == 14
+    assert link_delays[2, 1] == 2.0 and link_delays[0, 2] == inf
+
+    # Views of version 2 stay valid while version 3 is written into the other buffer
+    version, buffer = reader.get_views()
+    publisher.publish(build_snapshot(3), NEIGHBOR_DICT, 300.0)
+    assert reader.is_valid(version) and buffer["timestamp"][0] == 200.0
+    publisher.publish(build_snapshot(4), NEIGHBOR_DICT, 400.0)
+    assert not reader.is_valid(version)
+
+
+def test_reader_in_another_process(tmp_path):
+    publish_filepath = str(tmp_path / "topology")
+    publisher = TopologyPublisher(publish_filepath, NODE_LIST)
+    publisher.publish(build_snapshot(1), NEIGHBOR_DICT, 100.0)
+    publisher.close()
+    output = subprocess.check_output(
+        [
+            sys.executable,
+            "-c",
+            "import sys; sys.path.insert(0, sys.argv[1]);"
+            "from topology_publisher import TopologyReader;"
+            "version, timestamp, snapshot, _ = TopologyReader(sys.argv[2]).read();"
+            "print(version, timestamp, snapshot.get_path(0, 2))",
+            os.path.abspath(os.path.join(os.path.dirname(__file__), "..")),
+            publish_filepath,
+        ],
+        text=True,
+    )
+    assert output.split(maxsplit=2) == ["1", "100.0", "[0, 1, 2]\n"]
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as dirpath:
+        test_reader_gets_last_published_tick(pathlib.Path(dirpath))
+    with tempfile.TemporaryDirectory() as dirpath:
+        test_reader_in_another_process(pathlib.Path(dirpath))
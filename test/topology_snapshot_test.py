@@ -0,0 +1,61 @@
+import sys
+import os
+from math import inf
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from router import DijkstraRouter
+from topology_snapshot import TopologySnapshot
+
+
+def build_snapshot(mmap_dirpath=None):
+    """
+    A path a - b - c plus an isolated node d.
+    """
+    adj_list = [[1], [0, 2], [1], []]
+    adj_matrix = [
+        [0, 1, inf, inf],
+        [1, 0, 2, inf],
+        [inf, 2, 0, inf],
+        [inf, inf, inf, 0],
+    ]
+    router = DijkstraRouter(adj_list, adj_matrix)
+    router.calculate_adj_matrix_and_predecessor_matrix()
+    return TopologySnapshot(
+        ["a", "b", "c", "d"],
+        router.predecessor_matrix,
+        router.adj_matrix,
+        mmap_dirpath,
+    )
+
+
+def test_snapshot_paths_are_built_on_access():
+    snapshot = build_snapshot()
+    assert snapshot.next_hop_matrix.dtype.name == "int32"
+    assert snapshot.distance_matrix.dtype.name == "float32"
+    all_pair_path_mapping = snapshot.get_all_pair_path_mapping()
+    assert list(all_pair_path_mapping) == ["a", "b", "c", "d"]
+    assert all_pair_path_mapping["a"]["c"] == ["a", "b", "c"]
+    assert all_pair_path_mapping["c"]["c"] == ["c"]
+    assert all_pair_path_mapping["a"]["d"] == []
+    assert snapshot.get_distance(0, 2) == 3
+    assert all_pair_path_mapping.to_dict()["c"] == dict(all_pair_path_mapping["c"])
+
+
+def test_mmap_snapshot_can_be_loaded(tmp_path):
+    snapshot = build_snapshot(tmp_path)
+    loaded_snapshot = TopologySnapshot.load(tmp_path)
+    assert loaded_snapshot.node_list == snapshot.node_list
+    assert (
+        loaded_snapshot.get_all_pair_path_mapping()
+        == snapshot.get_all_pair_path_mapping()
+    )
+    assert not loaded_snapshot.next_hop_matrix.flags.writeable
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    test_snapshot_paths_are_built_on_access()
+    with tempfile.TemporaryDirectory() as dirpath:
+        test_mmap_snapshot_can_be_loaded(dirpath)
@@ -0,0 +1,135 @@
+import sys
+import os
+from datetime import datetime, timedelta, timezone
+from math import inf
+
+import numpy as np
+import pytest
+from scipy.sparse.csgraph import dijkstra
+from skyfield.api import load
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import access_selector
+
+
+def test_link_delays_series_matches_single_epoch_updates(
+    build_walker_delta_topology, monkeypatch
+):
+    # Split the access selection into several chunks of epochs
+    monkeypatch.setattr(access_selector, "ACCESS_SERIES_CHUNK_PAIR_COUNT", 2000)
+    topology = build_walker_delta_topology()
+    start_utc_time = datetime(2025, 1, 1, 0, 10, 0, tzinfo=timezone.utc)
+    utc_time_list = [start_utc_time + timedelta(minutes=7 * i) for i in range(12)]
+    isl_delays, access_sat_indices, access_delays = topology.get_link_delays_series(
+        load.timescale().from_datetimes(utc_time_list)
+    )
+    assert isl_delays.shape == (12, len(topology.isl_edge_array))
+    assert access_sat_indices.shape == access_delays.shape == (12, 8)
+    assert access_sat_indices.dtype == np.int32
+    assert (access_sat_indices >= 0).any()
+
+    for epoch_index, utc_time in enumerate(utc_time_list):
+        topology.update_topology_by_time(utc_time)
+        np.testing.assert_allclose(
+            isl_delays[epoch_index],
+            topology.adj_matrix[
+                topology.isl_edge_array[:, 0], topology.isl_edge_array[:, 1]
+            ],
+            rtol=0,
+            atol=1e-9,
+        )
+        assert (
+            access_sat_indices[epoch_index].tolist()
+            == topology.node_store.access_sat_index_array.tolist()
+        )
+        np.testing.assert_allclose(
+            access_delays[epoch_index],
+            topology.node_store.access_delay_array,
+            rtol=0,
+            atol=1e-9,
+        )
+
+        # Applying one epoch of the series gives the same routes as the live update
+        neighbor_dict = topology.get_neighbor_dict()
+        all_pair_path_dict = topology.get_all_pair_path_dict()
+        topology.update_topology_by_link_delays(
+            isl_delays[epoch_index],
+            access_sat_indices[epoch_index],
+            access_delays[epoch_index],
+        )
+        assert topology.get_all_pair_path_dict() == all_pair_path_dict
+        assert topology.get_neighbor_dict().keys() == neighbor_dict.keys()
+
+
+# The default keeps every route shortest, a positive tolerance bounds how much longer the kept routes may be
+@pytest.mark.parametrize("weight_tolerance", [0, 0.05])
+def test_incremental_router_reruns_few_trees_on_walker_delta_topology(
+    build_walker_delta_topology, weight_tolerance
+):
+    topology = build_walker_delta_topology(router_type="incremental")
+    router = topology.router
+    router.weight_tolerance = weight_tolerance
+    start_utc_time = datetime(2025, 1, 1, 0, 10, 0, tzinfo=timezone.utc)
+    topology.update_topology_by_time(start_utc_time)
+    router.calculate_adj_matrix_and_predecessor_matrix()
+    node_count = router.node_count
+    recalculated_tree_count_list = []
+    for tick in range(1, 31):
+        topology.update_topology_by_time(start_utc_time + timedelta(seconds=10 * tick))
+        router.calculate_adj_matrix_and_predecessor_matrix()
+        recalculated_tree_count_list.append(router.recalculated_tree_count)
+
+        # Every kept path is at most the tolerance per hop longer than the shortest one
+        weight_matrix = np.array(topology.adj_matrix, dtype=float)
+        shortest_distance_matrix = dijkstra(
+            np.where(weight_matrix == inf, 0, weight_matrix), directed=False
+        )
+        for src in range(node_count):
+            for dst in range(node_count):
+                if shortest_distance_matrix[src, dst] == inf:
+                    assert router.predecessor_matrix[src, dst] == -1
+                    continue
+                path = router.get_path_from_src_to_dst(src, dst)
+                assert path[0] == src and path[-1] == dst
+                path_distance = sum(weight_matrix[u, v] for u, v in zip(path, path[1:]))
+                assert path_distance == pytest.approx(router.adj_matrix[src, dst])
+                assert (
+                    path_distance
+                    <= shortest_distance_matrix[src, dst]
+                    + weight_tolerance * (len(path) - 1)
+                    + 1e-9
+                )
+
+    # The delays drift and the facilities hand over every few ticks, only the trees of the handed over facilities are rerun
+    assert max(recalculated_tree_count_list) <= len(
+        topology.access_selector.facility_name_list
+    )
+    assert sum(recalculated_tree_count_list) < 0.05 * node_count * 30
+
+
+def test_neighbor_sat_of_one_facility_matches_all_facility_access(
+    build_walker_delta_topology,
+):
+    topology = build_walker_delta_topology()
+    skyfield_time = load.timescale().from_datetime(
+        datetime(2025, 1, 1, 0, 10, 0, tzinfo=timezone.utc)
+    )
+    sat_index_array, delay_array = topology.select_all_facility_access(
+        topology.propagator.get_positions_km(skyfield_time)
+    )
+    for facility_name, sat_index, delay in zip(
+        topology.access_selector.facility_name_list, sat_index_array, delay_array
+    ):
+        neighbor_sat_name, neighbor_delay = topology.get_neighbor_sat_of_facility(
+            facility_name, skyfield_time
+        )
+        if sat_index < 0:
+            assert neighbor_sat_name is None and neighbor_delay == inf
+        else:
+            assert neighbor_sat_name == topology.node_list[sat_index]
+            assert neighbor_delay == pytest.approx(delay, abs=1e-9)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
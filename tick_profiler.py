@@ -0,0 +1,301 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Prefix of every exported Prometheus metric
+METRIC_NAME_PREFIX = "gemini"
+# Address of the metrics HTTP endpoint, only reachable from the local machine by default
+METRICS_HTTP_HOST = "127.0.0.1"
+
+
+class TickProfile:
+    """
+    Timings and push counters of one tick.
+    A tick is computed in the worker thread and pushed in the main thread, but never by both at the same time,
+    so a TickProfile needs no lock.
+    """
+
+    def __init__(self, tick_utc_time):
+        self.tick_utc_time = tick_utc_time
+        # {phase name: duration}, in the order the phases ran, unit: ns
+        self.phase_duration_dict = {}
+        # {host name: {"cmd_count": ..., "sent_byte_count": ..., "push_duration_ns": ...}}
+        self.host_push_dict = {}
+
+    @contextmanager
+    def phase(self, phase_name):
+        """
+        Time the enclosed block with time.perf_counter_ns, a phase entered twice in one tick accumulates.
+        """
+        start_time_ns = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.phase_duration_dict[phase_name] = (
+                self.phase_duration_dict.get(phase_name, 0)
+                + time.perf_counter_ns()
+                - start_time_ns
+            )
+
+    def add_host_batch_results(self, host_batch_result_dict):
+        """
+        Record the commands, the script bytes and the push duration of every host from the results of ClusterInstance.
+        """
+        for host_name, host_batch_result in host_batch_result_dict.items():
+            self.host_push_dict[host_name] = {
+                "cmd_count": len(host_batch_result.cmd_result_list),
+                "sent_byte_count": host_batch_result.sent_byte_count,
+                "push_duration_ns": host_batch_result.latency_ns,
+            }
+
+    def to_dict(self):
+        return {
+            "tick": self.tick_utc_time.isoformat(),
+            "phase_duration_ns": self.phase_duration_dict,
+            "host_push": self.host_push_dict,
+        }
+
+
+def profile_phase(tick_profile, phase_name):
+    """
+    Return tick_profile.phase(phase_name), or a context that does nothing if tick_profile is None.
+    """
+    if tick_profile is None:
+        return nullcontext()
+    return tick_profile.phase(phase_name)
+
+
+class TickProfiler:
+    """
+    Aggregate the TickProfile of every pushed tick and export them:
+    a JSONL trace with one line per tick, and Prometheus metrics written to a text file (for the node_exporter textfile collector)
+    and/or served at http://127.0.0.1:<port>/metrics.
+    """
+
+    def __init__(self, trace_filepath=None, metrics_filepath=None, metrics_port=None):
+        self.trace_file = open(trace_filepath, "a") if trace_filepath else None
+        self.metrics_filepath = metrics_filepath
+        # The HTTP thread renders the metrics while the main thread finishes ticks
+        self.lock = threading.Lock()
+        self.tick_count = 0
+        self.dropped_tick_count = 0
+        # Delay updates pushed between ticks, see ConstellationSystem.push_delay_updates
+        self.delay_update_count = 0
+        # {phase name: total duration}, unit: ns
+        self.phase_total_duration_dict = {}
+        # {phase name: duration in the last tick}, unit: ns
+        self.phase_last_duration_dict = {}
+        # {host name: {"cmd_count": ..., "sent_byte_count": ..., "push_duration_ns": ...}}, summed over all ticks
+        self.host_total_push_dict = {}
+        # {host name: push duration in the last tick}, unit: ns
+        self.host_last_push_duration_dict = {}
+        self.http_server = None
+        if metrics_port is not None:
+            self.http_server = self._start_http_server(metrics_port)
+
+    def start_tick(self, tick_utc_time):
+        return TickProfile(tick_utc_time)
+
+    def finish_tick(self, tick_profile):
+        """
+        Add a pushed tick to the metrics, append it to the trace and rewrite the metrics file.
+        """
+        with self.lock:
+            self.tick_count += 1
+            self._add_profile(tick_profile)
+        self._write_trace(tick_profile.to_dict())
+        self._write_metrics_file()
+
+    def finish_delay_update(self, tick_profile):
+        """
+        Add a delay update pushed between two ticks, its phases and host pushes are added to the metrics in the same way as a tick's,
+        but it is counted separately and marked in the trace.
+        """
+        with self.lock:
+            self.delay_update_count += 1
+            self._add_profile(tick_profile)
+        self._write_trace(dict(tick_profile.to_dict(), delay_update=True))
+        self._write_metrics_file()
+
+    def _add_profile(self, tick_profile):
+        """
+        Add the phases and host pushes of a profile to the metrics, called with the lock held.
+        """
+        for phase_name, duration_ns in tick_profile.phase_duration_dict.items():
+            self.phase_total_duration_dict[phase_name] = (
+                self.phase_total_duration_dict.get(phase_name, 0) + duration_ns
+            )
+            self.phase_last_duration_dict[phase_name] = duration_ns
+        for host_name, host_push in tick_profile.host_push_dict.items():
+            host_total_push = self.host_total_push_dict.setdefault(
+                host_name, dict.fromkeys(host_push, 0)
+            )
+            for counter_name, value in host_push.items():
+                host_total_push[counter_name] += value
+            self.host_last_push_duration_dict[host_name] = host_push["push_duration_ns"]
+
+    def _write_trace(self, trace_dict):
+        if self.trace_file is not None:
+            self.trace_file.write(json.dumps(trace_dict) + "\n")
+            self.trace_file.flush()
+
+    def drop_tick(self, tick_profile):
+        """
+        Count a tick dropped because it was stale, its phases are traced but not added to the metrics.
+        """
+        with self.lock:
+            self.dropped_tick_count += 1
+        self._write_trace(dict(tick_profile.to_dict(), dropped=True))
+        self._write_metrics_file()
+
+    def render_prometheus_text(self):
+        """
+        Return all metrics in the Prometheus text exposition format, durations in seconds.
+        """
+        with self.lock:
+            metric_list = self._get_metric_list()
+        line_list = []
+        for metric_name, metric_type, metric_help, sample_list in metric_list:
+            metric_name = f"{METRIC_NAME_PREFIX}_{metric_name}"
+            line_list.append(f"# HELP {metric_name} {metric_help}")
+            line_list.append(f"# TYPE {metric_name} {metric_type}")
+            for label_dict, value in sample_list:
+                label_text = ",".join(
+                    f'{label_name}="{label_value}"'
+                    for label_name, label_value in label_dict.items()
+                )
+                if label_text:
+                    metric_name_with_labels = f"{metric_name}{{{label_text}}}"
+                else:
+                    metric_name_with_labels = metric_name
+                line_list.append(f"{metric_name_with_labels} {value}")
+        return "\n".join(line_list) + "\n"
+
+    def _get_metric_list(self):
+        """
+        Return [(metric name, type, help, [(labels, value), ...]), ...], called with the lock held.
+        """
+
+        def phase_samples(duration_dict):
+            return [
+                ({"phase": phase_name}, duration_ns / 1e9)
+                for phase_name, duration_ns in duration_dict.items()
+            ]
+
+        def host_samples(counter_name, scale=None):
+            return [
+                (
+                    {"host": host_name},
+                    (
+                        host_total_push[counter_name]
+                        if scale is None
+                        else host_total_push[counter_name] / scale
+                    ),
+                )
+                for host_name, host_total_push in self.host_total_push_dict.items()
+            ]
+
+        return [
+            (
+                "ticks_total",
+                "counter",
+                "Ticks pushed to the hosts.",
+                [({}, self.tick_count)],
+            ),
+            (
+                "dropped_ticks_total",
+                "counter",
+                "Ticks dropped because their topology was ready too late.",
+                [({}, self.dropped_tick_count)],
+            ),
+            (
+                "delay_updates_total",
+                "counter",
+                "Interpolated tc queue delay updates pushed between ticks.",
+                [({}, self.delay_update_count)],
+            ),
+            (
+                "phase_duration_seconds_total",
+                "counter",
+                "Time spent in every phase of the pushed ticks and delay updates.",
+                phase_samples(self.phase_total_duration_dict),
+            ),
+            (
+                "phase_last_duration_seconds",
+                "gauge",
+                "Time spent in every phase of the last pushed tick or delay update.",
+                phase_samples(self.phase_last_duration_dict),
+            ),
+            (
+                "host_commands_total",
+                "counter",
+                "Commands and ovs/tc rules sent to every host.",
+                host_samples("cmd_count"),
+            ),
+            (
+                "host_sent_bytes_total",
+                "counter",
+                "Script bytes sent to every host.",
+                host_samples("sent_byte_count"),
+            ),
+            (
+                "host_push_duration_seconds_total",
+                "counter",
+                "Time spent pushing the scripts of every host over SSH.",
+                host_samples("push_duration_ns", 1e9),
+            ),
+            (
+                "host_last_push_duration_seconds",
+                "gauge",
+                "Time spent pushing the script of every host in the last pushed tick.",
+                [
+                    ({"host": host_name}, duration_ns / 1e9)
+                    for host_name, duration_ns in self.host_last_push_duration_dict.items()
+                ],
+            ),
+        ]
+
+    def _write_metrics_file(self):
+        """
+        Replace the metrics file atomically, so the textfile collector never reads a half-written file.
+        """
+        if self.metrics_filepath is None:
+            return
+        tmp_filepath = self.metrics_filepath + ".tmp"
+        with open(tmp_filepath, "w") as f:
+            f.write(self.render_prometheus_text())
+        os.replace(tmp_filepath, self.metrics_filepath)
+
+    def _start_http_server(self, metrics_port):
+        profiler = self
+
+        class MetricsRequestHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                body = profiler.render_prometheus_text().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        http_server = ThreadingHTTPServer(
+            (METRICS_HTTP_HOST, metrics_port), MetricsRequestHandler
+        )
+        threading.Thread(target=http_server.serve_forever, daemon=True).start()
+        return http_server
+
+    def close(self):
+        if self.http_server is not None:
+            self.http_server.shutdown()
+            self.http_server.server_close()
+        if self.trace_file is not None:
+            self.trace_file.close()
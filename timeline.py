@@ -0,0 +1,281 @@
+import argparse
+import os
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from skyfield.api import load
+
+from tick_profiler import profile_phase
+from topology_snapshot import TopologySnapshot
+
+# Quantities of a compiled timeline, every quantity is stored as "<name>.npy" in the timeline directory
+TIMELINE_ARRAY_NAME_LIST = [
+    "start_timestamp",  # Start of the window, POSIX timestamp in seconds
+    "step_seconds",  # Time between two slots, unit: s
+    "node_names",  # (N,) node names, satellites first and ground facilities following, as in Topology.node_list
+    "sat_count",  # Number of satellites at the head of node_names
+    "isl_first_indices",  # (I,) first satellite of every line of the ISLs file
+    "isl_relative_positions",  # (I,) relative position ("up", "down", "left", "right") of every line of the ISLs file
+    "isl_second_indices",  # (I,) second satellite of every line of the ISLs file
+    "isl_edge_indices",  # (I,) column in isl_delays of every line of the ISLs file
+    "isl_delays",  # (T, E) delay of every undirected ISL, unit: ms
+    "access_sat_indices",  # (T, F) access satellite of every ground facility, -1 if no satellite is visible
+    "access_delays",  # (T, F) delay between every ground facility and its access satellite, unit: ms
+    "next_hops",  # (T, N, N) next node on the shortest path from src to dst, -1 if unreachable
+]
+# Slots propagated together by one call of Topology.get_link_delays_series
+TIMELINE_PROPAGATION_CHUNK_SLOT_COUNT = 256
+
+
+class TimelineCompiler:
+    """
+    Precompute the topology of a time window offline: ISL delays, access satellites and next-hop tables of every slot.
+    The constellation is deterministic given the TLEs, so the runtime only needs to look up the current slot.
+    """
+
+    def __init__(self, topology):
+        self.topology = topology
+
+    def compile(self, start_utc_time, end_utc_time, step_seconds, timeline_dirpath):
+        """
+        Compute every slot from start_utc_time to end_utc_time (both included) every step_seconds,
+        and save the timeline as one .npy file per quantity in timeline_dirpath.
+        The link delays of TIMELINE_PROPAGATION_CHUNK_SLOT_COUNT slots are computed by one batch propagation,
+        the topology is then updated slot by slot from them to compute the next hops.
+        """
+        topology = self.topology
+        slot_count = (
+            int((end_utc_time - start_utc_time).total_seconds() // step_seconds) + 1
+        )
+        facility_count = topology.node_store.facility_count
+        isl_edge_array = topology.isl_edge_array
+
+        # The per-slot quantities are written through memory-mapped .npy files chunk by chunk,
+        # the memory used is bounded by the chunk size instead of growing with the window
+        os.makedirs(timeline_dirpath, exist_ok=True)
+        isl_delays = self._open_array(
+            timeline_dirpath,
+            "isl_delays",
+            (slot_count, len(isl_edge_array)),
+            np.float64,
+        )
+        access_sat_indices = self._open_array(
+            timeline_dirpath,
+            "access_sat_indices",
+            (slot_count, facility_count),
+            np.int32,
+        )
+        access_delays = self._open_array(
+            timeline_dirpath, "access_delays", (slot_count, facility_count), np.float64
+        )
+        next_hops = self._open_array(
+            timeline_dirpath,
+            "next_hops",
+            (slot_count, topology.node_count, topology.node_count),
+            np.int32,
+        )
+        per_slot_array_list = [isl_delays, access_sat_indices, access_delays, next_hops]
+        ts = load.timescale()
+        for chunk_start in range(0, slot_count, TIMELINE_PROPAGATION_CHUNK_SLOT_COUNT):
+            chunk_slice = slice(
+                chunk_start,
+                min(chunk_start + TIMELINE_PROPAGATION_CHUNK_SLOT_COUNT, slot_count),
+            )
+            (
+                chunk_isl_delays,
+                chunk_access_sat_indices,
+                chunk_access_delays,
+            ) = topology.get_link_delays_series(
+                ts.from_datetimes(
+                    [
+                        start_utc_time + timedelta(seconds=slot_index * step_seconds)
+                        for slot_index in range(chunk_slice.start, chunk_slice.stop)
+                    ]
+                )
+            )
+            isl_delays[chunk_slice] = chunk_isl_delays
+            access_sat_indices[chunk_slice] = chunk_access_sat_indices
+            access_delays[chunk_slice] = chunk_access_delays
+            for chunk_slot_index, slot_index in enumerate(
+                range(chunk_slice.start, chunk_slice.stop)
+            ):
+                topology.update_topology_by_link_delays(
+                    chunk_isl_delays[chunk_slot_index],
+                    chunk_access_sat_indices[chunk_slot_index],
+                    chunk_access_delays[chunk_slot_index],
+                )
+                topology.router.calculate_adj_matrix_and_predecessor_matrix()
+                next_hops[slot_index] = topology.router.predecessor_matrix
+            for array in per_slot_array_list:
+                array.flush()
+        del isl_delays, access_sat_indices, access_delays, next_hops
+        del per_slot_array_list
+
+        isl_list = topology.isl_list
+        array_dict = {
+            "start_timestamp": np.float64(start_utc_time.timestamp()),
+            "step_seconds": np.float64(step_seconds),
+            "node_names": np.array(topology.node_list, dtype=str),
+            "sat_count": np.int64(len(topology.satellite_dict)),
+            "isl_first_indices": np.array([isl[0] for isl in isl_list], dtype=np.int32),
+            "isl_relative_positions": np.array([isl[1] for isl in isl_list], dtype=str),
+            "isl_second_indices": np.array(
+                [isl[2] for isl in isl_list], dtype=np.int32
+            ),
+            "isl_edge_indices": np.array([isl[3] for isl in isl_list], dtype=np.int32),
+        }
+        for array_name, array in array_dict.items():
+            np.save(os.path.join(timeline_dirpath, array_name + ".npy"), array)
+
+    def _open_array(self, timeline_dirpath, array_name, shape, dtype):
+        """
+        Create the .npy file of a quantity and return it memory-mapped for writing.
+        """
+        return np.lib.format.open_memmap(
+            os.path.join(timeline_dirpath, array_name + ".npy"),
+            mode="w+",
+            dtype=dtype,
+            shape=shape,
+        )
+
+
+class TopologyTimeline:
+    """
+    Read-only topology backed by a compiled timeline, the per-slot arrays are memory-mapped and only the current slot is read.
+    Provides the same update_topology_by_time / get_neighbor_dict / get_all_pair_path_dict interface as Topology.
+    """
+
+    def __init__(self, timeline_dirpath):
+        array_dict = {
+            array_name: np.load(
+                os.path.join(timeline_dirpath, array_name + ".npy"), mmap_mode="r"
+            )
+            for array_name in TIMELINE_ARRAY_NAME_LIST
+        }
+        self.start_timestamp = float(array_dict["start_timestamp"])
+        self.step_seconds = float(array_dict["step_seconds"])
+        self.node_list = array_dict["node_names"].tolist()
+        self.sat_count = int(array_dict["sat_count"])
+        self.node_count = len(self.node_list)
+        self.isl_list = list(
+            zip(
+                array_dict["isl_first_indices"].tolist(),
+                array_dict["isl_relative_positions"].tolist(),
+                array_dict["isl_second_indices"].tolist(),
+                array_dict["isl_edge_indices"].tolist(),
+            )
+        )
+        self.isl_delays = array_dict["isl_delays"]
+        self.access_sat_indices = array_dict["access_sat_indices"]
+        self.access_delays = array_dict["access_delays"]
+        self.next_hops = array_dict["next_hops"]
+        self.slot_count = len(self.next_hops)
+
+        # The slot selected by the last update_topology_by_time
+        self.slot_index = 0
+
+    def get_slot_index(self, utc_time):
+        """
+        Return the slot nearest to utc_time, raise ValueError if utc_time is outside the compiled window.
+        """
+        slot_index = round(
+            (utc_time.timestamp() - self.start_timestamp) / self.step_seconds
+        )
+        if not 0 <= slot_index < self.slot_count:
+            raise ValueError(f"{utc_time} is outside the compiled timeline.")
+        return slot_index
+
+    def update_topology_by_time(self, utc_time, tick_profile=None):
+        """
+        Select the slot of utc_time, tick_profile is accepted for the interface of Topology, a lookup has no phases to time.
+        """
+        self.slot_index = self.get_slot_index(utc_time)
+
+    def get_neighbor_dict(self):
+        """
+        Return information about adjacent nodes of the current slot in the format specified in /doc/example.json.
+        """
+        neighbor_dict = {}
+        for node_name in self.node_list[: self.sat_count]:
+            neighbor_dict[node_name] = {
+                "up_neighbor_info": None,
+                "down_neighbor_info": None,
+                "left_neighbor_info": None,
+                "right_neighbor_info": None,
+                "ground_neighbor_info": None,
+            }
+        isl_delays = self.isl_delays[self.slot_index].tolist()
+        for (
+            first_sat_index,
+            relative_position,
+            second_sat_index,
+            isl_edge_index,
+        ) in self.isl_list:
+            neighbor_dict[self.node_list[first_sat_index]][
+                relative_position + "_neighbor_info"
+            ] = [self.node_list[second_sat_index], isl_delays[isl_edge_index]]
+
+        for facility_name, sat_index, delay in zip(
+            self.node_list[self.sat_count :],
+            self.access_sat_indices[self.slot_index].tolist(),
+            self.access_delays[self.slot_index].tolist(),
+        ):
+            if sat_index < 0:
+                neighbor_dict[facility_name] = {"sat_neighbor_info": None}
+                continue
+            sat_name = self.node_list[sat_index]
+            neighbor_dict[facility_name] = {"sat_neighbor_info": (sat_name, delay)}
+            if neighbor_dict[sat_name]["ground_neighbor_info"] is None:
+                neighbor_dict[sat_name]["ground_neighbor_info"] = []
+            neighbor_dict[sat_name]["ground_neighbor_info"].append(
+                (facility_name, delay)
+            )
+        return neighbor_dict
+
+    def get_all_pair_path_dict(self):
+        """
+        Return the shortest path information between all pairs of nodes of the current slot
+        Return information in the format specified in /doc/example.json, as a read-only mapping whose paths are built on access.
+        """
+        return self.get_topology_snapshot().get_all_pair_path_mapping()
+
+    def get_topology_snapshot(self, tick_profile=None):
+        """
+        Return the next hops of the current slot as a TopologySnapshot, the timeline stores no distances.
+        If a TickProfile is given, the snapshot build is timed into it, a lookup has no routing to time.
+        """
+        with profile_phase(tick_profile, "snapshot_build"):
+            return TopologySnapshot(self.node_list, self.next_hops[self.slot_index])
+
+
+if __name__ == "__main__":
+    from topology import Topology
+
+    parser = argparse.ArgumentParser(
+        description="Compile the topology of a time window into a timeline directory."
+    )
+    parser.add_argument("tles_filepath")
+    parser.add_argument("facilities_filepath")
+    parser.add_argument("isls_filepath")
+    parser.add_argument("timeline_dirpath")
+    parser.add_argument(
+        "--start", required=True, help="UTC start time, e.g. 2025-01-01T00:00:00"
+    )
+    parser.add_argument("--duration", type=float, required=True, help="Unit: s")
+    parser.add_argument("--step", type=float, required=True, help="Unit: s")
+    parser.add_argument("--router-type", default="dijkstra")
+    args = parser.parse_args()
+
+    start_utc_time = datetime.fromisoformat(args.start).replace(tzinfo=timezone.utc)
+    topology = Topology(
+        args.tles_filepath,
+        args.facilities_filepath,
+        args.isls_filepath,
+        args.router_type,
+    )
+    TimelineCompiler(topology).compile(
+        start_utc_time,
+        start_utc_time + timedelta(seconds=args.duration),
+        args.step,
+        args.timeline_dirpath,
+    )
@@ -2,18 +2,36 @@ from skyfield.api import load, wgs84
 from datetime import datetime, timezone
 import json
 from math import inf
-
-from node import SatNode, FacilityNode
-from router import FloydRouter
+import numpy as np
+
+from node import NodeStore, SAT_NEIGHBOR_DIRECTION_LIST
+from router import (
+    ArrayFloydRouter,
+    DijkstraRouter,
+    IncrementalDijkstraRouter,
+    ParallelDijkstraRouter,
+)
+from propagator import ConstellationPropagator
+from access_selector import AccessSelector
+from topology_snapshot import TopologySnapshot
+from tick_profiler import profile_phase
 
 MIN_ELEVATION = 0  # Minimum Elevation Angle for Determining Whether Ground Facilities Can Establish a Connection with Satellites
 SPEED_OF_LIGHT = 299792458  # Speed of Light, Unit: m/s
+INCREMENTAL_ROUTER_WEIGHT_TOLERANCE = 0  # Path Improvements Ignored by the Incremental Router, 0 Keeps Every Route Shortest, Unit: ms
+PARALLEL_ROUTER_WORKER_COUNT = (
+    None  # Worker Processes of the Parallel Router, None Uses All CPUs
+)
 
 
 class Topology:
-    def __init__(self, tles_filepath, facilities_filepath, isls_filepath):
+    def __init__(
+        self, tles_filepath, facilities_filepath, isls_filepath, router_type="floyd"
+    ):
         self.satellite_dict = self._load_tle(tles_filepath)
         self.facility_dict = self._load_facilities(facilities_filepath)
+        self.propagator = ConstellationPropagator(self.satellite_dict)
+        self.access_selector = AccessSelector(self.facility_dict, MIN_ELEVATION)
 
         # Total Number of Nodes, Including Satellite Nodes and Ground Facility Nodes
         self.node_count = len(self.satellite_dict) + len(self.facility_dict)
@@ -21,14 +39,37 @@ class Topology:
         # The node name corresponds one-to-one with the node index, with satellites listed first and ground facilities following.
         self.node_list = list()
 
-        # The node name corresponds one-to-one with the node class (satellite node or facility node), and the node class actually stores the names of adjacent nodes and their latency information.
+        # The node name to node index table, the reverse of node_list.
+        self.node_index_dict = dict()
+
+        # The neighbor slots and delays of all nodes as arrays keyed by node index, names are only translated at the API boundary.
+        self.node_store = None
+
+        # The node name corresponds one-to-one with the node class (SatNode or FacilityNode), a view of the node in node_store.
         self.node_dict = dict()
 
+        # Every line of the ISLs file as (first satellite index, relative position, second satellite index, index in isl_edge_array).
+        self.isl_list = list()
+
+        # The undirected ISLs as an (E, 2) array of satellite indices, used to derive all ISL delays in one vectorized step.
+        self.isl_edge_array = None
+
+        # The index in isl_edge_array of every ISL neighbor slot of node_store, as an (S, 4) array, -1 for an empty slot.
+        self.isl_slot_edge_array = None
+
+        # Two preallocated float64 adjacency matrices used in turn, every update resets and fills the other one in place,
+        # so the router can keep reading the matrix of the previous tick without any copy.
+        self.adj_matrix_buffer_list = [
+            self.init_adj_matrix(self.node_count),
+            self.init_adj_matrix(self.node_count),
+        ]
+        self.adj_matrix_buffer_index = 0
+
         # The topology adjacency matrix, where the indices align with the node_list, stores the latency information between nodes.
-        self.adj_matrix = self.init_adj_matrix(self.node_count)
+        self.adj_matrix = self.adj_matrix_buffer_list[self.adj_matrix_buffer_index]
         self.init_topology(isls_filepath)
-        self.adj_list = self.init_adj_list(self.adj_matrix)
 
+        self.router_type = router_type
         self.router = self.init_router()
         # self.print_node_dict()
         # self.print_adj_matrix()
@@ -37,30 +78,45 @@ class Topology:
         """
         Initialize the Adjacency Matrix Based on the Number of Nodes: All elements are set to "inf" except for the diagonal elements, which are set to 0.
         """
-        adj_matrix = [[inf] * node_count for i in range(node_count)]
-        for i in range(0, node_count):
-            adj_matrix[i][i] = 0
+        adj_matrix = np.full((node_count, node_count), inf, dtype=np.float64)
+        np.fill_diagonal(adj_matrix, 0)
         return adj_matrix
 
+    def swap_adj_matrix_buffer(self):
+        """
+        Switch adj_matrix to the other buffer and reset it in place, the buffer of the previous tick is left untouched.
+        """
+        self.adj_matrix_buffer_index ^= 1
+        self.adj_matrix = self.adj_matrix_buffer_list[self.adj_matrix_buffer_index]
+        self.adj_matrix.fill(inf)
+        np.fill_diagonal(self.adj_matrix, 0)
+
     def init_adj_list(self, adj_matrix):
         """
         Update the Adjacency List Based on the Adjacency Matrix: Ensure the call sequence is reasonable — before the update, the adjacency matrix only describes the direct connection information in a two-dimensional matrix.
         """
+        row_indices, col_indices = np.nonzero((adj_matrix != 0) & (adj_matrix != inf))
         adj_list = [[] for _ in range(self.node_count)]
-        for i in range(self.node_count):
-            for j in range(self.node_count):
-                if adj_matrix[i][j] != 0 and adj_matrix[i][j] != inf:
-                    adj_list[i].append(j)
+        for i, j in zip(row_indices.tolist(), col_indices.tolist()):
+            adj_list[i].append(j)
         return adj_list
 
+    @property
+    def adj_list(self):
+        """
+        The adjacency list of the current adj_matrix, derived on access, the routers are updated from adj_matrix directly.
+        """
+        return self.init_adj_list(self.adj_matrix)
+
     def init_topology(self, isls_filepath):
         """
         Initialize the Topology Based on the ISLs File:
         Assume the reference time is 00:00 on January 1, 2025.
         The main initialization tasks include:
 
-        1. Create node_list: A string array used to store node name information.
-        2. Create node_dict: A node dictionary where the key is the node name and the value is the node object (SatNode or FacilityNode). It stores information about adjacent nodes, including relative position, name, and delay.
+        1. Create node_list and node_index_dict: The node name and node index tables in both directions.
+        2. Create node_store: The neighbor slots of every node keyed by node index (NodeStore), including the index and the delay of adjacent nodes.
+           node_dict maps every node name to its view (SatNode or FacilityNode) in node_store.
            All delays are initialized based on the reference time.
            Satellite-to-ground connection relationships are defined according to the reference time.
         """
@@ -68,149 +124,219 @@ class Topology:
         ts = load.timescale()
         skyfield_time = ts.utc(init_time)
 
-        # Fill the node_list, init the keys of node_dict
-        for sat_name in self.satellite_dict:
-            self.node_list.append(sat_name)
-            self.node_dict[sat_name] = SatNode()
-        for facility_name in self.facility_dict:
-            self.node_list.append(facility_name)
-            self.node_dict[facility_name] = FacilityNode()
-
-        # Fill the node_dict and the delay between satellites in adj_matrix
+        # Fill the node_list and the node_store
+        self.node_list.extend(self.satellite_dict)
+        self.node_list.extend(self.facility_dict)
+        self.node_store = NodeStore(self.node_list, len(self.satellite_dict))
+        self.node_index_dict = self.node_store.node_index_dict
+        self.node_dict = self.node_store.get_node_dict()
+
+        # Fill the isl_list, the isl_edge_array and the ISL neighbor slots, each undirected ISL only appears once in the isl_edge_array
+        isl_edge_index_dict = dict()
+        self.isl_slot_edge_array = np.full(
+            self.node_store.isl_neighbor_index_array.shape, -1, dtype=np.int64
+        )
         with open(isls_filepath, "r") as f:
             lines = f.readlines()
         for line in lines:
             line = line.strip("\n").split(" ")
-            first_sat_name = line[0]
+            first_sat_in_node_list_index = self.node_index_dict[line[0]]
             relative_position = line[1]
-            second_sat_name = line[2]
-            first_sat_in_node_list_index = self.node_list.index(first_sat_name)
-            second_sat_in_node_list_index = self.node_list.index(second_sat_name)
-            delay_between_two_satellites = self.get_delay_between_two_satellites(
-                first_sat_name, second_sat_name, skyfield_time
+            second_sat_in_node_list_index = self.node_index_dict[line[2]]
+            edge_key = (
+                min(first_sat_in_node_list_index, second_sat_in_node_list_index),
+                max(first_sat_in_node_list_index, second_sat_in_node_list_index),
             )
-            setattr(
-                self.node_dict[first_sat_name],
-                relative_position + "_neighbor_info",
-                [
-                    second_sat_name,
-                    delay_between_two_satellites,
-                ],
+            if edge_key not in isl_edge_index_dict:
+                isl_edge_index_dict[edge_key] = len(isl_edge_index_dict)
+            self.isl_list.append(
+                (
+                    first_sat_in_node_list_index,
+                    relative_position,
+                    second_sat_in_node_list_index,
+                    isl_edge_index_dict[edge_key],
+                )
             )
-            self.adj_matrix[first_sat_in_node_list_index][
-                second_sat_in_node_list_index
-            ] = delay_between_two_satellites
-            self.adj_matrix[second_sat_in_node_list_index][
-                first_sat_in_node_list_index
-            ] = delay_between_two_satellites
-
-        # Find the neighbor sat of ground facilities, modify the self.node_dict of sat and facility, modify the adj_matrix
-        for facility_name in self.facility_dict:
-            self.update_facility_node_info_by_skyfield_time(
-                facility_name, skyfield_time
+            direction_index = SAT_NEIGHBOR_DIRECTION_LIST.index(relative_position)
+            self.node_store.isl_neighbor_index_array[
+                first_sat_in_node_list_index, direction_index
+            ] = second_sat_in_node_list_index
+            self.isl_slot_edge_array[first_sat_in_node_list_index, direction_index] = (
+                isl_edge_index_dict[edge_key]
             )
+        self.isl_edge_array = np.array(
+            list(isl_edge_index_dict), dtype=np.int64
+        ).reshape(-1, 2)
+
+        # Fill the delay between satellites in node_store and adj_matrix
+        sat_positions = self.propagator.get_positions_km(skyfield_time)
+        self.update_all_sat_node_info_by_sat_positions(sat_positions)
+
+        # Find the neighbor sat of ground facilities, modify the node_store of facilities, modify the adj_matrix
+        self.update_all_facility_node_info_by_sat_positions(sat_positions)
 
     def init_router(self):
         """
-        Return the Router Calculator Based on the Adjacency List and Adjacency Matrix
+        Return the Router Calculator Based on the Adjacency List and Adjacency Matrix:
+        router_type "floyd" selects ArrayFloydRouter, "dijkstra" selects DijkstraRouter for large sparse constellations,
+        "incremental" selects IncrementalDijkstraRouter which only repairs the shortest-path trees changed since the previous tick,
+        "parallel" selects ParallelDijkstraRouter which splits the sources across worker processes.
         """
-        return FloydRouter(self.adj_list, self.adj_matrix)
+        if self.router_type == "floyd":
+            return ArrayFloydRouter(self.adj_list, self.adj_matrix)
+        elif self.router_type == "dijkstra":
+            return DijkstraRouter(self.adj_list, self.adj_matrix)
+        elif self.router_type == "incremental":
+            return IncrementalDijkstraRouter(
+                self.adj_list, self.adj_matrix, INCREMENTAL_ROUTER_WEIGHT_TOLERANCE
+            )
+        elif self.router_type == "parallel":
+            return ParallelDijkstraRouter(
+                self.adj_list, self.adj_matrix, PARALLEL_ROUTER_WORKER_COUNT
+            )
+        raise ValueError(f"Unknown router type: {self.router_type}")
 
-    def update_topology_by_time(self, utc_time):
+    def update_topology_by_time(self, utc_time, tick_profile=None):
         """
         Change the Topology Based on the Input Time
+        If a TickProfile is given, the propagation, access selection and adjacency update phases are timed into it.
         """
         ts = load.timescale()
         skyfield_time = ts.utc(utc_time)
 
-        # Reset the adj_matrix
-        self.adj_matrix = self.init_adj_matrix(self.node_count)
-        # Update delay between satellites, modify the self.node_dict and the adj_matrix
-        for sat_name in self.satellite_dict:
-            self.update_sat_node_info_by_skyfield_time(sat_name, skyfield_time)
+        with profile_phase(tick_profile, "propagation"):
+            # Propagate all satellites once
+            sat_positions = self.propagator.get_positions_km(skyfield_time)
+        with profile_phase(tick_profile, "access_selection"):
+            sat_index_array, access_delay_array = self.select_all_facility_access(
+                sat_positions
+            )
+        with profile_phase(tick_profile, "adjacency_update"):
+            # Reset the other adj_matrix buffer, then update the delays between satellites and between facilities and satellites,
+            # modify the self.node_store and the adj_matrix
+            self.swap_adj_matrix_buffer()
+            self.update_all_sat_node_info_by_sat_positions(sat_positions)
+            self.update_all_facility_node_info_by_access(
+                sat_index_array, access_delay_array
+            )
+            # The router reads the weights from the buffer without copying it
+            self.router.set_weight_buffer(self.adj_matrix)
 
-        # Update delay between facilities and satellites, modify the self.node_dict and the adj_matrix
-        for facility_name in self.facility_dict:
-            self.update_facility_node_info_by_skyfield_time(
-                facility_name, skyfield_time
+    def update_topology_by_link_delays(
+        self, isl_delays, access_sat_indices, access_delays, tick_profile=None
+    ):
+        """
+        Change the Topology to Precomputed Link Delays, e.g. one epoch of get_link_delays_series:
+        isl_delays is the (E,) delay array of isl_edge_array, access_sat_indices and access_delays are the (F,) access arrays of the facilities.
+        """
+        with profile_phase(tick_profile, "adjacency_update"):
+            self.swap_adj_matrix_buffer()
+            self.update_all_sat_node_info_by_isl_delays(isl_delays)
+            self.update_all_facility_node_info_by_access(
+                access_sat_indices, access_delays
             )
-        self.adj_list = self.init_adj_list(self.adj_matrix)
-        # Router Calculator Supports Modifying the Adjacency Matrix and Adjacency List
-        self.router.modify_adj_list_and_matrix(self.adj_list, self.adj_matrix)
+            self.router.set_weight_buffer(self.adj_matrix)
 
-    def update_sat_node_info_by_skyfield_time(self, sat_name, skyfield_time):
+    def get_link_delays_series(self, skyfield_time):
         """
-        Update the Delay Information Between Satellites and Their Adjacent Nodes Based on the Reference Time
+        Return the Link Delays at Every Epoch of an Array Time, with a Single Propagation of All Satellites:
+        (isl_delays, access_sat_indices, access_delays), a (T, E) float64 array of the delays of isl_edge_array,
+        a (T, F) int32 array of the access satellites of the facilities (-1 if no satellite is visible)
+        and a (T, F) float64 array of their delays (inf if no satellite is visible), unit: ms.
+        The epochs are independent of the current topology, which is left unchanged.
         """
-        sat_up_neighbor_name = self.node_dict[sat_name].up_neighbor_info[0]
-        sat_down_neighbor_name = self.node_dict[sat_name].down_neighbor_info[0]
-        sat_left_neighbor_name = self.node_dict[sat_name].left_neighbor_info[0]
-        sat_right_neighbor_name = self.node_dict[sat_name].right_neighbor_info[0]
-        self.node_dict[sat_name].ground_neighbor_info = None
+        sat_positions_series = self.propagator.get_positions_km_series(skyfield_time)
+        access_sat_indices, access_distances = (
+            self.access_selector.select_access_satellites_series(sat_positions_series)
+        )
+        return (
+            self.get_isl_delays_by_sat_positions(sat_positions_series),
+            access_sat_indices,
+            self.distance_km_to_light_travel_time_ms(access_distances),
+        )
 
-        sat_index_in_node_list = self.node_list.index(sat_name)
-        sat_up_neighbor_index_in_node_list = self.node_list.index(sat_up_neighbor_name)
-        sat_down_neighbor_index_in_node_list = self.node_list.index(
-            sat_down_neighbor_name
+    def update_all_sat_node_info_by_sat_positions(self, sat_positions):
+        """
+        Update the Delay Information Between All Satellites and Their Adjacent Satellites Based on the Satellite Positions:
+        sat_positions is the (N, 3) array returned by the propagator, the delays of all ISLs are computed as one vectorized norm.
+        """
+        self.update_all_sat_node_info_by_isl_delays(
+            self.get_isl_delays_by_sat_positions(sat_positions)
         )
-        sat_left_neighbor_index_in_node_list = self.node_list.index(
-            sat_left_neighbor_name
+
+    def update_all_sat_node_info_by_isl_delays(self, isl_delays):
+        """
+        Scatter the (E,) Delays of isl_edge_array into the ISL delay columns of node_store and into the adj_matrix in place.
+        """
+        isl_slot_mask = self.isl_slot_edge_array >= 0
+        self.node_store.isl_neighbor_delay_array[isl_slot_mask] = isl_delays[
+            self.isl_slot_edge_array[isl_slot_mask]
+        ]
+        self.adj_matrix[self.isl_edge_array[:, 0], self.isl_edge_array[:, 1]] = (
+            isl_delays
         )
-        sat_right_neighbor_index_in_node_list = self.node_list.index(
-            sat_right_neighbor_name
+        self.adj_matrix[self.isl_edge_array[:, 1], self.isl_edge_array[:, 0]] = (
+            isl_delays
         )
 
-        delay_between_sat_and_up_neighbor = self.get_delay_between_two_satellites(
-            sat_name, sat_up_neighbor_name, skyfield_time
+    def get_isl_delays_by_sat_positions(self, sat_positions):
+        """
+        Return the Delays of All ISLs in isl_edge_array as an (E,) Array, Unit: ms
+        sat_positions may also be a (T, N, 3) series, the delays are then returned as a (T, E) array.
+        """
+        isl_vectors = (
+            sat_positions[..., self.isl_edge_array[:, 1], :]
+            - sat_positions[..., self.isl_edge_array[:, 0], :]
+        )
+        return self.distance_km_to_light_travel_time_ms(
+            np.linalg.norm(isl_vectors, axis=-1)
         )
-        delay_between_sat_and_down_neighbor = self.get_delay_between_two_satellites(
-            sat_name, sat_down_neighbor_name, skyfield_time
+
+    def update_all_facility_node_info_by_sat_positions(self, sat_positions):
+        """
+        Calculate the Direct Adjacency Relationship Between Satellites and All Ground Facilities Based on the Satellite Positions:
+        The access satellites of all facilities are selected together through the spatial index of the access selector,
+        and written into the access columns of node_store in place (facilities are in the same order in both).
+        """
+        self.update_all_facility_node_info_by_access(
+            *self.select_all_facility_access(sat_positions)
         )
-        delay_between_sat_and_left_neighbor = self.get_delay_between_two_satellites(
-            sat_name, sat_left_neighbor_name, skyfield_time
+
+    def select_all_facility_access(self, sat_positions):
+        """
+        Select the Access Satellites of All Facilities Based on the Satellite Positions, the topology is left unchanged:
+        Returns the (F,) int32 access satellites (-1 if no satellite is visible) and the (F,) delays (inf if no satellite is visible), unit: ms.
+        """
+        sat_index_list, distance_list = self.access_selector.select_access_satellites(
+            sat_positions
         )
-        delay_between_sat_and_right_neighbor = self.get_delay_between_two_satellites(
-            sat_name, sat_right_neighbor_name, skyfield_time
+        sat_index_array = np.asarray(sat_index_list, dtype=np.int32)
+        return sat_index_array, np.where(
+            sat_index_array >= 0,
+            self.distance_km_to_light_travel_time_ms(
+                np.asarray(distance_list, dtype=np.float64)
+            ),
+            inf,
         )
 
-        # update the self.node_dict
-        self.node_dict[sat_name].up_neighbor_info[1] = delay_between_sat_and_up_neighbor
-        self.node_dict[sat_name].down_neighbor_info[
-            1
-        ] = delay_between_sat_and_down_neighbor
-        self.node_dict[sat_name].left_neighbor_info[
-            1
-        ] = delay_between_sat_and_left_neighbor
-        self.node_dict[sat_name].right_neighbor_info[
-            1
-        ] = delay_between_sat_and_right_neighbor
-
-        # update the self.adj_matrix
-        self.adj_matrix[sat_index_in_node_list][
-            sat_up_neighbor_index_in_node_list
-        ] = delay_between_sat_and_up_neighbor
-        self.adj_matrix[sat_index_in_node_list][
-            sat_down_neighbor_index_in_node_list
-        ] = delay_between_sat_and_down_neighbor
-        self.adj_matrix[sat_index_in_node_list][
-            sat_left_neighbor_index_in_node_list
-        ] = delay_between_sat_and_left_neighbor
-        self.adj_matrix[sat_index_in_node_list][
-            sat_right_neighbor_index_in_node_list
-        ] = delay_between_sat_and_right_neighbor
-
-        self.adj_matrix[sat_up_neighbor_index_in_node_list][
-            sat_index_in_node_list
-        ] = delay_between_sat_and_up_neighbor
-        self.adj_matrix[sat_down_neighbor_index_in_node_list][
-            sat_index_in_node_list
-        ] = delay_between_sat_and_down_neighbor
-        self.adj_matrix[sat_left_neighbor_index_in_node_list][
-            sat_index_in_node_list
-        ] = delay_between_sat_and_left_neighbor
-        self.adj_matrix[sat_right_neighbor_index_in_node_list][
-            sat_index_in_node_list
-        ] = delay_between_sat_and_right_neighbor
+    def update_all_facility_node_info_by_access(self, sat_index_array, delay_array):
+        """
+        Write the (F,) Access Satellites and Delays of All Facilities into the access columns of node_store and into the adj_matrix in place.
+        """
+        self.node_store.access_sat_index_array[:] = sat_index_array
+        self.node_store.access_delay_array[:] = delay_array
+        self.node_store.reset_ground_neighbor_index()
+        access_mask = sat_index_array >= 0
+        facility_in_node_list_indices = (
+            np.flatnonzero(access_mask) + self.node_store.sat_count
+        )
+        neighbor_sat_in_node_list_indices = sat_index_array[access_mask]
+        self.adj_matrix[
+            facility_in_node_list_indices, neighbor_sat_in_node_list_indices
+        ] = delay_array[access_mask]
+        self.adj_matrix[
+            neighbor_sat_in_node_list_indices, facility_in_node_list_indices
+        ] = delay_array[access_mask]
 
     def update_facility_node_info_by_skyfield_time(self, facility_name, skyfield_time):
         """
@@ -219,66 +345,67 @@ class Topology:
         neighbor_sat_name, delay_between_facility_and_satellite = (
             self.get_neighbor_sat_of_facility(facility_name, skyfield_time)
         )
-        facility_in_node_list_index = self.node_list.index(facility_name)
-        neighbor_sat_in_node_list_index = self.node_list.index(neighbor_sat_name)
-        setattr(
-            self.node_dict[facility_name],
-            "sat_neighbor_info",
-            (
-                neighbor_sat_name,
-                delay_between_facility_and_satellite,
-            ),
-        )
-        current_ground_neighbor_info = getattr(
-            self.node_dict[neighbor_sat_name], "ground_neighbor_info", []
+        self.update_facility_node_info(
+            facility_name, neighbor_sat_name, delay_between_facility_and_satellite
         )
-        if current_ground_neighbor_info is None:
-            current_ground_neighbor_info = []
-        current_ground_neighbor_info.append(
-            (facility_name, delay_between_facility_and_satellite)
+
+    def update_facility_node_info(
+        self, facility_name, neighbor_sat_name, delay_between_facility_and_satellite
+    ):
+        """
+        Connect the Ground Facility to Its Access Satellite, modify the self.node_store and the adj_matrix:
+        If no satellite is visible (neighbor_sat_name is None), the facility is left without a satellite neighbor.
+        """
+        facility_in_node_list_index = self.node_index_dict[facility_name]
+        facility_index = facility_in_node_list_index - self.node_store.sat_count
+        self.node_store.reset_ground_neighbor_index()
+        if neighbor_sat_name is None:
+            self.node_store.access_sat_index_array[facility_index] = -1
+            self.node_store.access_delay_array[facility_index] = inf
+            return
+        neighbor_sat_in_node_list_index = self.node_index_dict[neighbor_sat_name]
+        self.node_store.access_sat_index_array[facility_index] = (
+            neighbor_sat_in_node_list_index
         )
-        setattr(
-            self.node_dict[neighbor_sat_name],
-            "ground_neighbor_info",
-            current_ground_neighbor_info,
+        self.node_store.access_delay_array[facility_index] = (
+            delay_between_facility_and_satellite
         )
-        self.adj_matrix[facility_in_node_list_index][
-            neighbor_sat_in_node_list_index
+        self.adj_matrix[
+            facility_in_node_list_index, neighbor_sat_in_node_list_index
         ] = delay_between_facility_and_satellite
-        self.adj_matrix[neighbor_sat_in_node_list_index][
-            facility_in_node_list_index
+        self.adj_matrix[
+            neighbor_sat_in_node_list_index, facility_in_node_list_index
         ] = delay_between_facility_and_satellite
 
     def get_neighbor_dict(self):
         """
-        Update node_dict and adj_matrix.
+        Translate node_store into node names.
         Return information about adjacent nodes in the format specified in /doc/example.json.
         """
-        return {
-            node_name: self.node_dict[node_name].get_all_attributes()
-            for node_name in self.node_dict
-        }
+        return self.node_store.get_neighbor_dict()
 
     def get_all_pair_path_dict(self):
         """
         Return the shortest path information between all pairs of nodes
-        Return information in the format specified in /doc/example.json.
-        """
-        all_pair_path_dict = {}
-        self.router.calculate_adj_matrix_and_predecessor_matrix()
-        for src_index in range(self.node_count):
-            all_pair_path_dict[self.node_list[src_index]] = {}
-            route_from_src_index_to_all_dst_index = (
-                self.router.get_path_from_src_to_all(src_index)
+        Return information in the format specified in /doc/example.json, as a read-only mapping whose paths are built on access.
+        """
+        return self.get_topology_snapshot().get_all_pair_path_mapping()
+
+    def get_topology_snapshot(self, mmap_dirpath=None, tick_profile=None):
+        """
+        Calculate the routes and return them as a TopologySnapshot (int32 next hops, float32 distances),
+        memory-mapped in mmap_dirpath if it is given.
+        If a TickProfile is given, the routing and the snapshot build phases are timed into it.
+        """
+        with profile_phase(tick_profile, "routing"):
+            self.router.calculate_adj_matrix_and_predecessor_matrix()
+        with profile_phase(tick_profile, "snapshot_build"):
+            return TopologySnapshot(
+                self.node_list,
+                self.router.predecessor_matrix,
+                self.router.adj_matrix,
+                mmap_dirpath,
             )
-            for dst_index in route_from_src_index_to_all_dst_index:
-                all_pair_path_dict[self.node_list[src_index]][
-                    self.node_list[dst_index]
-                ] = [
-                    self.node_list[cur_index]
-                    for cur_index in route_from_src_index_to_all_dst_index[dst_index]
-                ]
-        return all_pair_path_dict
 
     def _load_tle(self, tles_filepath):
         """
@@ -351,27 +478,20 @@ class Topology:
     def get_neighbor_sat_of_facility(self, facility_name, skyfield_time):
         """
         Return the Access Satellite Based on the Facility Name and Reference Time:
-        Only select the nearest satellite within the visible range.
-        """
-        candidate_sat_name = None
-        candidate_sat_facility_delay = inf
-        for sat_name in self.satellite_dict:
-            if (
-                self.get_elevation_between_facility_and_satellite(
-                    facility_name, sat_name, skyfield_time
-                )
-                >= MIN_ELEVATION
-            ):
-                current_sat_facility_delay = (
-                    self.get_distance_between_facility_and_satellite(
-                        facility_name, sat_name, skyfield_time
-                    )
-                )
-                if current_sat_facility_delay < candidate_sat_facility_delay:
-                    candidate_sat_facility_delay = current_sat_facility_delay
-                    candidate_sat_name = sat_name
-        return candidate_sat_name, self.get_delay_between_facility_and_satellite(
-            facility_name, candidate_sat_name, skyfield_time
+        Only select the nearest satellite within the visible range, all satellites are the candidates of this one facility.
+        Returns (None, inf) if no satellite is visible.
+        """
+        facility_index = (
+            self.node_store.get_node_index(facility_name) - self.node_store.sat_count
+        )
+        columns, distances = self.access_selector.select_access_satellites_among(
+            self.propagator.get_positions_km(skyfield_time)[np.newaxis],
+            np.array([facility_index]),
+        )
+        if columns[0] < 0:
+            return None, inf
+        return self.node_list[columns[0]], self.distance_km_to_light_travel_time_ms(
+            float(distances[0])
         )
 
     def print_node_dict(self):
@@ -399,5 +519,5 @@ if __name__ == "__main__":
     # current_utc_time = datetime.now(timezone.utc)
     # topology.update_topology_by_time(current_utc_time)
     # print(json.dumps(topology.get_neighbor_dict()))
-    # print(json.dumps(topology.get_all_pair_path_dict()))
+    # print(json.dumps(topology.get_all_pair_path_dict().to_dict()))
     pass
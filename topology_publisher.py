@@ -0,0 +1,186 @@
+import json
+import time
+
+import numpy as np
+
+from topology_snapshot import TopologySnapshot
+
+# First bytes of a publication file, followed by the header words
+PUBLICATION_MAGIC = b"GEMINI01"
+# Header: magic, sequence, node count, size of the node names block, unit: byte
+PUBLICATION_HEADER_SIZE = 64
+# Sleep between two attempts of a reader that raced with the writer, unit: s
+READ_RETRY_INTERVAL = 0.001
+
+
+class TopologyPublisher:
+    """
+    Publish the topology of every tick into a memory-mapped file (e.g. under /dev/shm) for readers in other processes.
+    The file holds two buffers and a sequence counter (seqlock): version v is written into buffer v % 2 while the sequence is odd,
+    so the buffer of the last complete version is never modified while readers use it.
+
+    Layout: header | node names (JSON) | buffer 0 | buffer 1,
+    every buffer holds the timestamp (float64), the next hops (N, N) int32, the distances (N, N) float32 and the link delays (N, N) float32.
+    """
+
+    def __init__(self, publish_filepath, node_list):
+        self.node_list = list(node_list)
+        self.node_index_dict = {
+            node_name: node_index for node_index, node_name in enumerate(self.node_list)
+        }
+        node_count = len(self.node_list)
+        node_names_bytes = json.dumps(self.node_list).encode()
+        node_names_size = -(-len(node_names_bytes) // 8) * 8
+        buffer_size = _get_buffer_size(node_count)
+        self.mmap = np.memmap(
+            publish_filepath,
+            dtype=np.uint8,
+            mode="w+",
+            shape=(PUBLICATION_HEADER_SIZE + node_names_size + 2 * buffer_size,),
+        )
+        self.mmap[: len(PUBLICATION_MAGIC)] = np.frombuffer(
+            PUBLICATION_MAGIC, dtype=np.uint8
+        )
+        self.header = self.mmap[len(PUBLICATION_MAGIC) : PUBLICATION_HEADER_SIZE].view(
+            np.uint64
+        )
+        self.header[1] = node_count
+        self.header[2] = node_names_size
+        self.mmap[
+            PUBLICATION_HEADER_SIZE : PUBLICATION_HEADER_SIZE + len(node_names_bytes)
+        ] = np.frombuffer(node_names_bytes, dtype=np.uint8)
+        self.buffer_list = _get_buffer_list(
+            self.mmap, PUBLICATION_HEADER_SIZE + node_names_size, node_count
+        )
+        # Readers see version 0 (nothing published) until the first publish completes
+        self.header[0] = 0
+
+    def publish(self, snapshot, neighbor_dict, timestamp):
+        """
+        Publish one tick: the routes of the TopologySnapshot and the link delays of neighbor_dict, timestamp is a POSIX timestamp.
+        """
+        sequence = int(self.header[0])
+        buffer = self.buffer_list[(sequence // 2 + 1) % 2]
+        self.header[0] = sequence + 1
+        buffer["timestamp"][0] = timestamp
+        buffer["next_hops"][...] = snapshot.next_hop_matrix
+        if snapshot.distance_matrix is None:
+            buffer["distances"][...] = np.nan
+        else:
+            buffer["distances"][...] = snapshot.distance_matrix
+        self._fill_link_delays(buffer["link_delays"], neighbor_dict)
+        self.header[0] = sequence + 2
+
+    def _fill_link_delays(self, link_delays, neighbor_dict):
+        """
+        Fill the (N, N) link delay matrix from a neighbor dict in the format of /doc/example.json, inf where there is no link.
+        """
+        link_delays[...] = np.inf
+        np.fill_diagonal(link_delays, 0)
+        for node_name, neighbor_info in neighbor_dict.items():
+            node_index = self.node_index_dict[node_name]
+            for info_name, info in neighbor_info.items():
+                if info is None:
+                    continue
+                neighbor_list = info if info_name == "ground_neighbor_info" else [info]
+                for neighbor_name, delay in neighbor_list:
+                    link_delays[node_index, self.node_index_dict[neighbor_name]] = delay
+
+    def get_version(self):
+        return int(self.header[0]) // 2
+
+    def close(self):
+        """
+        Flush the file, it stays readable by the attached readers.
+        """
+        self.mmap.flush()
+
+
+class TopologyReader:
+    """
+    Attach to a file written by TopologyPublisher, readers never block the writer.
+    """
+
+    def __init__(self, publish_filepath):
+        self.mmap = np.memmap(publish_filepath, dtype=np.uint8, mode="r")
+        if self.mmap[: len(PUBLICATION_MAGIC)].tobytes() != PUBLICATION_MAGIC:
+            raise ValueError(f"{publish_filepath} is not a topology publication.")
+        self.header = self.mmap[len(PUBLICATION_MAGIC) : PUBLICATION_HEADER_SIZE].view(
+            np.uint64
+        )
+        node_count = int(self.header[1])
+        node_names_size = int(self.header[2])
+        self.node_list = json.loads(
+            self.mmap[
+                PUBLICATION_HEADER_SIZE : PUBLICATION_HEADER_SIZE + node_names_size
+            ]
+            .tobytes()
+            .rstrip(b"\0")
+        )
+        self.buffer_list = _get_buffer_list(
+            self.mmap, PUBLICATION_HEADER_SIZE + node_names_size, node_count
+        )
+
+    def get_views(self):
+        """
+        Return (version, buffer) of the last published tick without copying, or (0, None) if nothing is published yet.
+        buffer maps "timestamp", "next_hops", "distances" and "link_delays" to read-only views of the file;
+        they stay consistent as long as is_valid(version) returns True after using them.
+        """
+        sequence = int(self.header[0])
+        version = sequence // 2
+        if version == 0:
+            return 0, None
+        return version, self.buffer_list[version % 2]
+
+    def is_valid(self, version):
+        """
+        Return whether the buffer of version has not been overwritten yet: the writer starts overwriting it with version + 2.
+        """
+        return int(self.header[0]) < 2 * (version + 2) - 1
+
+    def read(self):
+        """
+        Return (version, timestamp, TopologySnapshot, link delays) copied from the last published tick, or None if nothing is published yet.
+        """
+        while True:
+            version, buffer = self.get_views()
+            if buffer is None:
+                return None
+            timestamp = float(buffer["timestamp"][0])
+            next_hop_matrix = np.array(buffer["next_hops"])
+            distance_matrix = np.array(buffer["distances"])
+            link_delays = np.array(buffer["link_delays"])
+            if self.is_valid(version):
+                return (
+                    version,
+                    timestamp,
+                    TopologySnapshot(self.node_list, next_hop_matrix, distance_matrix),
+                    link_delays,
+                )
+            time.sleep(READ_RETRY_INTERVAL)
+
+
+def _get_buffer_size(node_count):
+    return 8 + node_count * node_count * (4 + 4 + 4)
+
+
+def _get_buffer_list(mmap, offset, node_count):
+    """
+    Return the views of both buffers as dictionaries {array name: array}.
+    """
+    buffer_list = []
+    shape = (node_count, node_count)
+    for _ in range(2):
+        buffer = {"timestamp": mmap[offset : offset + 8].view(np.float64)}
+        offset += 8
+        for array_name, dtype in (
+            ("next_hops", np.int32),
+            ("distances", np.float32),
+            ("link_delays", np.float32),
+        ):
+            size = node_count * node_count * np.dtype(dtype).itemsize
+            buffer[array_name] = mmap[offset : offset + size].view(dtype).reshape(shape)
+            offset += size
+        buffer_list.append(buffer)
+    return buffer_list
@@ -0,0 +1,179 @@
+import os
+from collections.abc import Mapping
+
+import numpy as np
+
+
+class TopologySnapshot:
+    """
+    Routing tables of one tick as compact arrays: an int32 next-hop matrix and a float32 distance matrix, O(n^2) in total.
+    Paths are not stored, they are reconstructed from the next hops when accessed.
+    """
+
+    def __init__(
+        self, node_list, next_hop_matrix, distance_matrix=None, mmap_dirpath=None
+    ):
+        """
+        node_list:
+            Node names, aligned with the rows and columns of the matrices.
+
+        next_hop_matrix:
+            [src][dst] is the next node on the shortest path from src to dst, -1 if dst is unreachable.
+
+        distance_matrix:
+            [src][dst] is the length of the shortest path from src to dst, optional.
+
+        mmap_dirpath:
+            If given, the arrays are written to "<name>.npy" files in this directory and memory-mapped instead of kept on the heap,
+            the snapshot can then be opened by other processes with TopologySnapshot.load.
+        """
+        self.node_list = list(node_list)
+        self.node_index_dict = {
+            node_name: node_index for node_index, node_name in enumerate(self.node_list)
+        }
+        self.node_count = len(self.node_list)
+        array_dict = {
+            "node_names": np.array(self.node_list, dtype=str),
+            "next_hops": np.array(next_hop_matrix, dtype=np.int32),
+        }
+        if distance_matrix is not None:
+            array_dict["distances"] = np.array(distance_matrix, dtype=np.float32)
+        if mmap_dirpath is not None:
+            os.makedirs(mmap_dirpath, exist_ok=True)
+            for array_name, array in array_dict.items():
+                array_filepath = os.path.join(mmap_dirpath, array_name + ".npy")
+                mmap_array = np.lib.format.open_memmap(
+                    array_filepath, mode="w+", dtype=array.dtype, shape=array.shape
+                )
+                mmap_array[...] = array
+                mmap_array.flush()
+                array_dict[array_name] = np.load(array_filepath, mmap_mode="r")
+        self.next_hop_matrix = array_dict["next_hops"]
+        self.distance_matrix = array_dict.get("distances")
+        self.next_hop_matrix.flags.writeable = False
+        if self.distance_matrix is not None:
+            self.distance_matrix.flags.writeable = False
+
+    @classmethod
+    def load(cls, mmap_dirpath):
+        """
+        Open a snapshot written with mmap_dirpath, the arrays stay memory-mapped and read-only.
+        """
+        snapshot = cls.__new__(cls)
+        snapshot.node_list = np.load(
+            os.path.join(mmap_dirpath, "node_names.npy")
+        ).tolist()
+        snapshot.node_index_dict = {
+            node_name: node_index
+            for node_index, node_name in enumerate(snapshot.node_list)
+        }
+        snapshot.node_count = len(snapshot.node_list)
+        snapshot.next_hop_matrix = np.load(
+            os.path.join(mmap_dirpath, "next_hops.npy"), mmap_mode="r"
+        )
+        distances_filepath = os.path.join(mmap_dirpath, "distances.npy")
+        snapshot.distance_matrix = (
+            np.load(distances_filepath, mmap_mode="r")
+            if os.path.exists(distances_filepath)
+            else None
+        )
+        return snapshot
+
+    def get_next_hop(self, src, dst):
+        return int(self.next_hop_matrix[src, dst])
+
+    def get_distance(self, src, dst):
+        return float(self.distance_matrix[src, dst])
+
+    def get_path(self, src, dst):
+        """
+        Return the node indexes on the path from src to dst, or an empty list if dst is unreachable.
+        """
+        next_hops = self.next_hop_matrix[:, dst]
+        path = []
+        node = src
+        while node != dst:
+            path.append(node)
+            node = int(next_hops[node])
+            if node == -1:
+                return []
+        path.append(dst)
+        return path
+
+    def get_next_hops_from_src(self, src):
+        return np.array(self.next_hop_matrix[src])
+
+    def iter_next_hops(self, src_list=None):
+        """
+        Yield (src, dst, next_hop) for every reachable dst != src, in the same way as Router.iter_next_hops.
+        """
+        if src_list is None:
+            src_list = range(self.node_count)
+        for src in src_list:
+            for dst, next_hop in enumerate(self.next_hop_matrix[src].tolist()):
+                if dst != src and next_hop != -1:
+                    yield src, dst, next_hop
+
+    def iter_paths_from_src(self, src, dst_list=None):
+        """
+        Yield (dst, path) from src to every node, or only to those in dst_list, in the same way as Router.iter_paths_from_src.
+        """
+        if dst_list is None:
+            dst_list = range(self.node_count)
+        for dst in dst_list:
+            yield dst, self.get_path(src, dst)
+
+    def get_all_pair_path_mapping(self):
+        """
+        Return a read-only mapping with the same shape as Topology.get_all_pair_path_dict: mapping[src_name][dst_name] is the list of node names on the path.
+        """
+        return AllPairPathMapping(self)
+
+
+class AllPairPathMapping(Mapping):
+    """
+    Read-only {src_name: {dst_name: [node_name, ...]}} view of a TopologySnapshot, paths are built on access.
+    """
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+
+    def __getitem__(self, src_name):
+        return SrcPathMapping(self.snapshot, self.snapshot.node_index_dict[src_name])
+
+    def to_dict(self):
+        """
+        Materialize all paths as nested dicts, e.g. for json.dumps.
+        """
+        return {src_name: dict(self[src_name]) for src_name in self}
+
+    def __iter__(self):
+        return iter(self.snapshot.node_list)
+
+    def __len__(self):
+        return self.snapshot.node_count
+
+
+class SrcPathMapping(Mapping):
+    """
+    Read-only {dst_name: [node_name, ...]} view of the paths from one source.
+    """
+
+    def __init__(self, snapshot, src_index):
+        self.snapshot = snapshot
+        self.src_index = src_index
+
+    def __getitem__(self, dst_name):
+        node_list = self.snapshot.node_list
+        return [
+            node_list[node_index]
+            for node_index in self.snapshot.get_path(
+                self.src_index, self.snapshot.node_index_dict[dst_name]
+            )
+        ]
+
+    def __iter__(self):
+        return iter(self.snapshot.node_list)
+
+    def __len__(self):
+        return self.snapshot.node_count